@@ -18,6 +18,7 @@ const Dashboard = () => {
   const [recentActivity, setRecentActivity] = useState([]);
   const [datasets, setDatasets] = useState([]);
   const [userProgress, setUserProgress] = useState([]);
+  const [stats, setStats] = useState(null);
   const { user } = useAuth();
 
   useEffect(() => {
@@ -25,14 +26,23 @@ const Dashboard = () => {
       if (!user) return;
 
       try {
-        const progressResponse = await axios.get(`/api/progress/user/${user._id}`);
-        setUserProgress(progressResponse.data);
+        // Counts are computed by the server; only the first page of progress entries is listed
+        const [statsResponse, progressResponse] = await Promise.all([
+          axios.get(`/api/stats/${user._id}`),
+          axios.get(`/api/progress/user/${user._id}`, { params: { limit: 20 } }),
+        ]);
+        const userStats = statsResponse.data;
+        setStats(userStats);
+        setUserProgress(progressResponse.data.items);
+        setDatasets(
+          userStats.datasets.map((dataset) => ({
+            name: dataset.name || dataset.dataset_id,
+            cardCount: dataset.total,
+          }))
+        );
 
-        const totalCards = progressResponse.data.length;
-        const completedCards = progressResponse.data.filter(
-          (p) => p.status === "completed"
-        ).length;
-        const progressPercentage = totalCards > 0 ? (completedCards / totalCards) * 100 : 0;
+        const completedCards = userStats.by_status.completed || 0;
+        const progressPercentage = userStats.total > 0 ? (completedCards / userStats.total) * 100 : 0;
         setProgress(progressPercentage);
       } catch (error) {
         console.error("Error fetching data:", error);
@@ -60,8 +70,11 @@ const Dashboard = () => {
                 {progress.toFixed(2)}% of your vocabulary mastered
               </Typography>
               <Typography variant="body2" color="textSecondary" sx={{ mt: 1 }}>
-                {userProgress.filter((p) => p.status === "completed").length} /{" "}
-                {userProgress.length} cards completed
+                {stats ? stats.by_status.completed || 0 : 0} /{" "}
+                {stats ? stats.total : 0} cards completed
+              </Typography>
+              <Typography variant="body2" color="textSecondary">
+                {stats ? stats.due_today : 0} cards due today
               </Typography>
             </CardContent>
           </Card>
@@ -46,7 +46,7 @@ const Vocabulary = () => {
     const [snackbarOpen, setSnackbarOpen] = useState(false);
     const [snackbarMessage, setSnackbarMessage] = useState("");
     const [snackbarSeverity, setSnackbarSeverity] = useState("success");
-    const [audioBase64, setAudioBase64] = useState("");
+    const [audioUrl, setAudioUrl] = useState("");
 
     // Fetch vocabulary cards
     useEffect(() => {
@@ -97,7 +97,7 @@ const Vocabulary = () => {
             setAntonyms([]);
             setWordType("");
             setVocabFamily([]);
-            setAudioBase64(""); // Clear audio data
+            setAudioUrl(""); // Clear audio data
 
             // Show success message in the snackbar
             setSnackbarMessage("Vocabulary card added successfully!");
@@ -167,10 +167,12 @@ const Vocabulary = () => {
         setIsGenerating(true);
 
         try {
+            // Fields are streamed as NDJSON events and filled in as soon as each one is ready
             const response = await fetch("/cards/generate", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
+                    "Accept": "application/x-ndjson",
                 },
                 body: JSON.stringify({word: newWord}),
             });
@@ -179,25 +181,65 @@ const Vocabulary = () => {
                 throw new Error("Failed to generate fields");
             }
 
-            const data = await response.json();
-            console.log("Generated Data:", data);
-
-            // Ensure vocab_family is an array
-            const vocabFamilyArray = Array.isArray(data.vocab_family)
-                ? data.vocab_family
-                : data.vocab_family
-                    ? [data.vocab_family]
-                    : [];
-
-            setNewMeaningEn(data.meaning_en || "");
-            setNewMeaningVi(data.meaning_vi || "");
-            setIpaTranscription(data.ipa_transcription || "");
-            setSynonyms(data.synonyms || []);
-            setAntonyms(data.antonyms || []);
-            setExampleSentences(data.example_sentences_en || []);
-            setWordType(data.word_type || "");
-            setVocabFamily(vocabFamilyArray); // Ensure vocabFamily is always an array
-            setAudioBase64(data.audio_base64 || ""); // Set the base64 audio data
+            const applyField = (field, value) => {
+                switch (field) {
+                    // Meanings arrive as lists of items; the form edits them one per line
+                    case "meaning_en":
+                        setNewMeaningEn(Array.isArray(value) ? value.join("\n") : value || "");
+                        break;
+                    case "meaning_vi":
+                        setNewMeaningVi(Array.isArray(value) ? value.join("\n") : value || "");
+                        break;
+                    case "ipa_transcription":
+                        setIpaTranscription(value || "");
+                        break;
+                    case "synonyms":
+                        setSynonyms(value || []);
+                        break;
+                    case "antonyms":
+                        setAntonyms(value || []);
+                        break;
+                    case "example_sentences_en":
+                        setExampleSentences(value || []);
+                        break;
+                    case "word_type":
+                        setWordType(value || "");
+                        break;
+                    case "vocab_family":
+                        // Ensure vocab_family is an array
+                        setVocabFamily(Array.isArray(value) ? value : value ? [value] : []);
+                        break;
+                    case "audio_url":
+                        setAudioUrl(value || "");
+                        break;
+                    default:
+                        break;
+                }
+            };
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const {done, value} = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, {stream: true});
+                const lines = buffer.split("\n");
+                buffer = lines.pop(); // Keep the incomplete last line for the next chunk
+                for (const line of lines) {
+                    if (!line.trim()) {
+                        continue;
+                    }
+                    const event = JSON.parse(line);
+                    if (event.event === "field") {
+                        applyField(event.field, event.value);
+                    } else if (event.event === "error") {
+                        console.error(`Error generating ${event.field}:`, event.error);
+                    }
+                }
+            }
 
             setSnackbarMessage("Fields generated successfully!");
             setSnackbarSeverity("success");
@@ -232,10 +274,9 @@ const Vocabulary = () => {
         return wordTypeColors[type.toLowerCase()] || "default";
     };
 
-    // Function to play audio from base64 data
-    const playAudio = (audioBase64) => {
-        if (audioBase64) {
-            const audioSrc = `data:audio/mp3;base64,${audioBase64}`;
+    // Function to play audio from the media endpoint
+    const playAudio = (audioSrc) => {
+        if (audioSrc) {
             const audio = new Audio(audioSrc);
             audio.play().catch((error) => {
                 console.error("Error playing audio:", error);
@@ -400,8 +441,8 @@ const Vocabulary = () => {
                     <Button
                         variant="contained"
                         color="primary"
-                        onClick={() => playAudio(audioBase64)}
-                        disabled={!audioBase64}
+                        onClick={() => playAudio(audioUrl)}
+                        disabled={!audioUrl}
                     >
                         Play Word Audio
                     </Button>
@@ -427,10 +468,10 @@ const Vocabulary = () => {
                                     <strong>IPA:</strong> {card.ipa_transcription}
                                 </Typography>
                                 <Typography variant="body1">
-                                    <strong>English:</strong> {card.meaning_en}
+                                    <strong>English:</strong> {Array.isArray(card.meaning_en) ? card.meaning_en.join("; ") : card.meaning_en}
                                 </Typography>
                                 <Typography variant="body1">
-                                    <strong>Vietnamese:</strong> {card.meaning_vi}
+                                    <strong>Vietnamese:</strong> {Array.isArray(card.meaning_vi) ? card.meaning_vi.join("; ") : card.meaning_vi}
                                 </Typography>
                                 <Typography variant="body1">
                                     <strong>Synonyms:</strong> {card.synonyms?.join(", ")}
@@ -1,16 +1,23 @@
-import json
-import os
 import logging
+import threading
 from flask import Flask
 from flask_cors import CORS
-from bson import ObjectId
-from app.databases.db import get_db, get_test_db, close_db
+from app.databases.db import close_db
+from app.databases.repository import open_database
+from app.databases.indexes import ensure_indexes
+from app.utils.config import load_config
+from app.utils.json_provider import BSONJSONProvider
+from app.utils.job_queue import init_job_queue
+from app.utils.read_cache import init_read_cache
 
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)  # Convert ObjectId to string
-        return super().default(obj)
+def check_database(app, log_only=False):
+    try:
+        app.db.command('ping')  # Test MongoDB connection
+        app.logger.info("Database connection successful.")
+    except Exception as e:
+        app.logger.error(f"Database connection failed: {e}")
+        if not log_only:
+            raise
 
 def create_app(env='development'):
     app = Flask(__name__)
@@ -25,42 +32,37 @@ def create_app(env='development'):
     # logging.basicConfig(level=logging.DEBUG if env == 'development' else logging.INFO)
     app.logger.info(f"Starting app in '{env}' environment.")
 
-    # Load configuration from config.json
-    config_path = 'config.json'
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"Configuration file '{config_path}' not found.")
-
-    try:
-        with open(config_path, 'r') as config_file:
-            config = json.load(config_file)
-    except json.JSONDecodeError:
-        raise ValueError(f"Invalid JSON in configuration file '{config_path}'.")
+    # Load configuration from config.json and the environment-specific file (read once per process)
+    config = load_config(env)
+    app.config.update(config)
 
-    # Load environment-specific configuration
-    env_config_path = f'config_{env}.json'
-    if os.path.exists(env_config_path):
-        with open(env_config_path, 'r') as env_config_file:
-            env_config = json.load(env_config_file)
-        config.update(env_config)
+    # Set up database connection: MongoDB (the test database when testing) or an embedded SQLite
+    # database, as set by the "storage" section
+    app.db = open_database(config, env)
 
-    app.config.update(config)
+    # Test database connection: "sync" blocks startup on a ping, "deferred" pings in the background
+    # and only logs the outcome, "off" skips the check
+    health_check = config.get("startup", {}).get("db_health_check", "sync")
+    if health_check == "sync":
+        check_database(app)
+    elif health_check == "deferred":
+        threading.Thread(target=check_database, args=(app,), kwargs={"log_only": True},
+                         name="db-health-check", daemon=True).start()
 
-    # Set up database connection
-    if env == 'testing':
-        app.db = get_test_db()  # Use the test database
-    else:
-        app.db = get_db()  # Use the main database
+    # Create missing indexes (see app/databases/indexes.py); deployments can run
+    # `python -m scripts.ensure_indexes` instead and leave this off
+    if config.get("startup", {}).get("ensure_indexes", False):
+        try:
+            for collection, action, name in ensure_indexes(app.db):
+                app.logger.info(f"Index {action}: {collection}.{name}")
+        except Exception as e:
+            app.logger.error(f"Failed to ensure indexes: {e}")
 
-    # Test database connection
-    try:
-        app.db.command('ping')  # Test MongoDB connection
-        app.logger.info("Database connection successful.")
-    except Exception as e:
-        app.logger.error(f"Database connection failed: {e}")
-        raise
+    # Serialize ObjectId, datetime and Decimal128 the same way in every response
+    app.json = BSONJSONProvider(app)
 
-    # Set custom JSON encoder
-    app.json_encoder = CustomJSONEncoder
+    # Cache of single documents read on most requests (cards, users, settings), see app/utils/read_cache.py
+    init_read_cache(app)
 
     # Register blueprints
     blueprints = [
@@ -69,6 +71,9 @@ def create_app(env='development'):
         ('app.routes.user_progress_routes', 'progress_bp'),
         ('app.routes.dataset_collection_routes', 'dataset_bp'),
         ('app.routes.user_setting_routes', 'settings_bp'),
+        ('app.routes.job_routes', 'job_bp'),
+        ('app.routes.media_routes', 'media_bp'),
+        ('app.routes.health_routes', 'health_bp'),
     ]
 
     for module_name, blueprint_name in blueprints:
@@ -82,6 +87,9 @@ def create_app(env='development'):
         except AttributeError as e:
             app.logger.error(f"Blueprint '{blueprint_name}' not found in module '{module_name}': {e}")
 
+    # Set up the background job queue; tests process jobs explicitly instead of through worker threads
+    init_job_queue(app, start_workers=env != 'testing')
+
     # Ensure the database connection is closed when the app shuts down
     # @app.teardown_appcontext
     # def teardown_db(exception):
@@ -1,42 +1,205 @@
-import json
-from pymongo import MongoClient
-import constant
+import logging
+import threading
+import importlib.util
+from pymongo import MongoClient, monitoring
+from app.utils.config import load_config
 
-# Load config.json and update the password
-with open('config.json', 'r') as config_file:
-    config = json.load(config_file)
+DEFAULT = "default"
+TESTING = "testing"
 
-# Replace <db_password> with the actual password
-config['mongodb']['uri'] = config['mongodb']['uri'].replace('<db_password>', constant.MONGODB_PASSWORD)
-config['mongodb']['test_uri'] = config['mongodb']['test_uri'].replace('<db_password>', constant.MONGODB_PASSWORD)
+# Client settings, overridable through "mongodb.client" in config.json and per tenant in
+# "mongodb.tenants.<name>.client". Keys are MongoClient options.
+DEFAULT_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,  # Per server; size it to the number of threads that query at the same time
+    "minPoolSize": 0,
+    "maxIdleTimeMS": 300000,
+    "waitQueueTimeoutMS": 10000,  # Fail a request instead of queueing forever when the pool is exhausted
+    "connectTimeoutMS": 5000,
+    "serverSelectionTimeoutMS": 10000,
+    "socketTimeoutMS": None,
+    "readPreference": "primary",
+    "compressors": ["zstd", "snappy", "zlib"],  # In order of preference; unavailable ones are skipped
+}
+
+# Wire compressor -> module pymongo needs for it
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Counts connection pool events of one client, to tell how close the pool is to `maxPoolSize`.
+    """
+
+    def __init__(self, max_pool_size):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self._in_use = {}  # Server address -> checked out connections
+        self.peak_in_use = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            in_use = max(self._in_use.values(), default=0)
+            return {
+                "max_pool_size": self.max_pool_size,
+                "in_use": in_use,
+                "peak_in_use": self.peak_in_use,
+                "open": self.created - self.closed,
+                "utilization": round(in_use / self.max_pool_size, 4) if self.max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            }
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            in_use = self._in_use[event.address] = self._in_use.get(event.address, 0) + 1
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.checkouts += 1
+            self.wait_seconds += getattr(event, "duration", 0.0) or 0.0
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._in_use[event.address] = max(self._in_use.get(event.address, 0) - 1, 0)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+def available_compressors(requested):
+    """
+    The compressors of `requested` ("zstd,snappy" or a list) whose module is installed, in order. The
+    others are dropped with a warning, since the connection silently falls back to the remaining ones.
+    """
+    if isinstance(requested, str):
+        requested = [name.strip() for name in requested.split(",") if name.strip()]
+    available = []
+    for name in requested or []:
+        if name not in COMPRESSOR_MODULES:
+            logger.warning("Unknown MongoDB wire compressor %r is ignored", name)
+        elif not importlib.util.find_spec(COMPRESSOR_MODULES[name]):
+            logger.warning("MongoDB wire compressor %r is disabled: the %s package is not installed",
+                           name, COMPRESSOR_MODULES[name])
+        else:
+            available.append(name)
+    return available
+
+
+def _settings(name):
+    """
+    URI, database name and client options of an environment or tenant. Tenants are declared under
+    "mongodb.tenants"; the "testing" environment uses test_uri/test_database and every other
+    environment uses uri/database, each read with its config_<env>.json overrides.
+    """
+    config = load_config(None if name == DEFAULT else name)["mongodb"]
+    options = dict(DEFAULT_CLIENT_OPTIONS, **config.get("client", {}))
+    tenant = config.get("tenants", {}).get(name)
+    if tenant is not None:
+        uri, database = tenant["uri"], tenant["database"]
+        options.update(tenant.get("client", {}))
+    elif name == TESTING:
+        uri, database = config["test_uri"], config["test_database"]
+    else:
+        uri, database = config["uri"], config["database"]
+    if "<db_password>" in uri:
+        # The password lives outside the repository; it is only needed once a client is created
+        import constant
+        uri = uri.replace("<db_password>", constant.MONGODB_PASSWORD)
+    options["compressors"] = available_compressors(options.get("compressors")) or None
+    return uri, database, options
+
+
+# Registry: one client per distinct URI and options, shared by every environment or tenant that uses
+# them, and one database handle per name
+_clients = {}  # (uri, options) -> (client, PoolStats)
+_databases = {}  # Name -> (client key, database)
+_lock = threading.Lock()
+
+
+def get_database(name=DEFAULT):
+    """Get the database of an environment or tenant, creating its client on first use."""
+    entry = _databases.get(name)
+    if entry is None:
+        uri, database, options = _settings(name)
+        client_key = (uri, tuple(sorted((k, str(v)) for k, v in options.items())))
+        with _lock:
+            entry = _databases.get(name)
+            if entry is None:
+                if client_key not in _clients:
+                    stats = PoolStats(options["maxPoolSize"])
+                    client_options = {k: v for k, v in options.items() if v is not None}
+                    _clients[client_key] = (MongoClient(uri, event_listeners=[stats], **client_options), stats)
+                entry = _databases[name] = (client_key, _clients[client_key][0][database])
+    return entry[1]
+
+
+def get_client(name=DEFAULT):
+    """Get the MongoClient behind the database of an environment or tenant."""
+    return get_database(name).client
 
-# Global variables for client and database
-_client = None
-_db = None
 
 def get_db():
     """Get the database connection."""
-    global _client, _db
-    if _db is None:
-        _client = MongoClient(config['mongodb']['uri'])
-        _db = _client[config['mongodb']['database']]
-    return _db
+    return get_database(DEFAULT)
+
 
 def get_test_db():
     """Get the test database connection."""
-    global _client, _db
-    if _db is None:
-        _client = MongoClient(config['mongodb']['test_uri'])
-        _db = _client[config['mongodb']['test_database']]
-    return _db
-
-def close_db():
-    """Close the database connection."""
-    global _client, _db
-    if _client:
-        _client.close()
-        _client = None
-        _db = None
+    return get_database(TESTING)
+
+
+def pool_stats():
+    """Connection pool usage per environment or tenant."""
+    with _lock:
+        databases = dict(_databases)
+        clients = dict(_clients)
+    return {name: clients[client_key][1].snapshot() for name, (client_key, _) in databases.items()
+            if client_key in clients}
+
+
+def close_db(name=None):
+    """Close the database connection of `name`, or every connection. A client is closed with its last user."""
+    with _lock:
+        names = list(_databases) if name is None else [name]
+        for database_name in names:
+            client_key, _ = _databases.pop(database_name, (None, None))
+            if client_key is not None and all(key != client_key for key, _ in _databases.values()):
+                client, _ = _clients.pop(client_key)
+                client.close()
 
 # Export the database connection and test initialization function
-__all__ = ['get_db', 'get_test_db', 'close_db']
\ No newline at end of file
+__all__ = ['get_db', 'get_test_db', 'get_database', 'get_client', 'close_db', 'pool_stats', 'PoolStats',
+           'available_compressors', 'DEFAULT_CLIENT_OPTIONS']
@@ -0,0 +1,114 @@
+from pymongo import ASCENDING, IndexModel
+
+# Collection -> indexes the application's queries rely on. Every index is named, so a changed definition
+# replaces the index of the same name instead of being added next to it.
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "vocabulary_cards": [
+        IndexModel([("card_id", ASCENDING)], name="card_id_unique", unique=True),
+        # Followed by _id so listings are paged straight from the index (app/utils/pagination.py)
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+        IndexModel([("dataset_id", ASCENDING), ("_id", ASCENDING)], name="dataset_id"),
+    ],
+    "datasets": [
+        # Also serves the lookup of all datasets of a user through its prefix
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_id_name_unique", unique=True),
+    ],
+    "user_progress": [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+        # Covers the dashboard statistics (UserProgress.stats_pipeline): the fields it reads after its $match
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("dataset_id", ASCENDING),
+                    ("next_review", ASCENDING), ("ease_factor", ASCENDING), ("interval", ASCENDING)],
+                   name="user_id_stats"),
+    ],
+    "settings": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "lexicon": [
+        # Keeps concurrent upserts of the same word from creating two entries
+        IndexModel([("lemma", ASCENDING)], name="lemma_unique", unique=True),
+    ],
+    "audio_assets": [
+        IndexModel([("path", ASCENDING)], name="path"),
+    ],
+    "jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+        # One index per branch of the $or used to claim jobs
+        IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+    ],
+}
+
+# Index options that change what an index does; anything else (e.g. "v", "ns") is ignored when comparing
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "collation")
+
+
+def _key(spec):
+    # IndexModel holds the key as a mapping, index_information() as a list of (field, direction) pairs
+    key = spec["key"]
+    return list(key.items()) if hasattr(key, "items") else [tuple(item) for item in key]
+
+
+def _same_index(existing, spec):
+    return _key(existing) == _key(spec) and all(
+        existing.get(option) == spec.get(option) for option in COMPARED_OPTIONS
+    )
+
+
+def plan_indexes(db, registry=None, drop_unknown=False):
+    """
+    Compares the indexes in `db` with the registry and returns the changes needed, as a list of
+    (collection, action, index name) with action "create", "replace" or "drop". An existing index with a
+    declared key but another name or other options is replaced. Indexes the registry does not know are
+    only dropped with `drop_unknown`.
+    """
+    registry = INDEXES if registry is None else registry
+    actions = []
+    for collection, indexes in registry.items():
+        existing = db[collection].index_information()
+        declared = {index.document["name"] for index in indexes}
+        for index in indexes:
+            spec = index.document
+            name = spec["name"]
+            if name in existing:
+                if not _same_index(existing[name], spec):
+                    actions.append((collection, "replace", name))
+                continue
+            # The same key under another name (e.g. created by hand) would make the creation fail
+            for other_name, other in existing.items():
+                if other_name not in declared and other_name != "_id_" and _key(other) == _key(spec):
+                    actions.append((collection, "drop", other_name))
+            actions.append((collection, "create", name))
+        if drop_unknown:
+            for name in existing:
+                if name != "_id_" and name not in declared and (collection, "drop", name) not in actions:
+                    actions.append((collection, "drop", name))
+    return actions
+
+
+def ensure_indexes(db, registry=None, drop_unknown=False, dry_run=False):
+    """
+    Creates the indexes of the registry that are missing from `db` and replaces those whose definition
+    changed. Running it again once the indexes exist does nothing. Returns the changes as listed by
+    `plan_indexes`. Building a unique index over duplicate documents raises pymongo's OperationFailure
+    (DuplicateKeyError) and leaves the remaining indexes unchanged.
+    """
+    registry = INDEXES if registry is None else registry
+    actions = plan_indexes(db, registry, drop_unknown)
+    if dry_run:
+        return actions
+    models = {(collection, index.document["name"]): index
+              for collection, indexes in registry.items() for index in indexes}
+    for collection, action, name in actions:
+        if action in ("drop", "replace"):
+            db[collection].drop_index(name)
+        if action in ("create", "replace"):
+            db[collection].create_indexes([models[(collection, name)]])
+    return actions
+
+
+__all__ = ['INDEXES', 'plan_indexes', 'ensure_indexes']
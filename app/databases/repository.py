@@ -0,0 +1,112 @@
+import os
+import abc
+from pymongo.collection import Collection as MongoCollection
+from pymongo.database import Database as MongoDatabase
+
+# Defaults, overridable through the "storage" section of config.json
+DEFAULT_CONFIG = {
+    "backend": "mongodb",  # "mongodb", or "sqlite" for single-node installs and offline test runs
+    "sqlite_path": "data/anki_similarity.sqlite3",  # ":memory:" keeps the database in the process
+}
+
+
+class Collection(abc.ABC):
+    """
+    The storage operations models and routes perform on `current_app.db.<collection>`, with pymongo's
+    signatures and result types. pymongo's Collection is the MongoDB implementation and
+    app/databases/sqlite_store.py the embedded one; code that sticks to these methods and to the filter
+    and update operators the SQLite backend supports runs on both.
+    """
+
+    @abc.abstractmethod
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0):
+        """Returns a cursor supporting sort, skip, limit, batch_size, explain and iteration."""
+
+    @abc.abstractmethod
+    def find_one(self, filter=None, projection=None):
+        pass
+
+    @abc.abstractmethod
+    def count_documents(self, filter):
+        pass
+
+    @abc.abstractmethod
+    def aggregate(self, pipeline):
+        """Returns an iterator over the results of the aggregation `pipeline`."""
+
+    @abc.abstractmethod
+    def insert_one(self, document):
+        pass
+
+    @abc.abstractmethod
+    def insert_many(self, documents, ordered=True):
+        pass
+
+    @abc.abstractmethod
+    def update_one(self, filter, update, upsert=False):
+        pass
+
+    @abc.abstractmethod
+    def update_many(self, filter, update, upsert=False):
+        pass
+
+    @abc.abstractmethod
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False, return_document=False):
+        pass
+
+    @abc.abstractmethod
+    def delete_one(self, filter):
+        pass
+
+    @abc.abstractmethod
+    def delete_many(self, filter):
+        pass
+
+    @abc.abstractmethod
+    def create_indexes(self, indexes):
+        pass
+
+    @abc.abstractmethod
+    def index_information(self):
+        pass
+
+    @abc.abstractmethod
+    def drop_index(self, index_or_name):
+        pass
+
+
+class Database(abc.ABC):
+    """A database: collections by attribute or item, `command("ping")` and `client`."""
+
+    @abc.abstractmethod
+    def __getitem__(self, name):
+        pass
+
+    @abc.abstractmethod
+    def command(self, command):
+        pass
+
+
+Collection.register(MongoCollection)
+Database.register(MongoDatabase)
+
+
+def open_database(config, env='development'):
+    """
+    The database of the app for `env`, from the "storage" section of `config`: MongoDB through the client
+    registry of app/databases/db.py, or an embedded SQLite database. The STORAGE_BACKEND environment
+    variable overrides the configured backend, e.g. to run the test suite against MongoDB.
+    """
+    storage = dict(DEFAULT_CONFIG, **config.get("storage", {}))
+    if os.environ.get("STORAGE_BACKEND"):
+        storage["backend"] = os.environ["STORAGE_BACKEND"]
+    if storage["backend"] == "mongodb":
+        from app.databases.db import get_db, get_test_db
+        return get_test_db() if env == 'testing' else get_db()
+    if storage["backend"] == "sqlite":
+        from app.databases.sqlite_store import open_sqlite_database
+        return open_sqlite_database(storage["sqlite_path"])
+    raise ValueError(f"Unknown storage backend: {storage['backend']!r}")
+
+
+__all__ = ['Collection', 'Database', 'open_database', 'DEFAULT_CONFIG']
@@ -0,0 +1,1023 @@
+import os
+import re
+import copy
+import json
+import sqlite3
+import datetime
+import threading
+import contextlib
+import bson
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+from app.databases.repository import Collection, Database
+
+# Rows read from SQLite at a time while a cursor is iterated
+SCAN_CHUNK = 1000
+
+# Server error codes raised by this backend, as MongoDB would
+DUPLICATE_KEY = 11000
+IMMUTABLE_FIELD = 66
+INDEX_KEY_SPECS_CONFLICT = 86
+
+# Index options kept with the index; only "unique" and "sparse" change how the SQLite index works
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "collation")
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Values: MongoDB's comparison order, and the encodings stored in the indexed columns
+# ---------------------------------------------------------------------------------------------------------
+
+def _bracket(value):
+    """Type order of MongoDB's comparisons; values of different brackets are never equal or ordered by $gt/$lt."""
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float, bson.Int64, bson.Decimal128)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime.datetime):
+        return 9
+    return 10
+
+
+def _comparable(value):
+    if isinstance(value, bson.Decimal128):
+        return value.to_decimal()
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _equal(a, b):
+    return _bracket(a) == _bracket(b) and _comparable(a) == _comparable(b)
+
+
+def _compare(a, b):
+    """-1, 0 or 1, or None when MongoDB would not compare the two values."""
+    if _bracket(a) != _bracket(b) or _bracket(a) in (4, 5):
+        return None
+    a, b = _comparable(a), _comparable(b)
+    return (a > b) - (a < b)
+
+
+def _sort_key(value):
+    value = _comparable(value)
+    if _bracket(value) in (1, 4, 5, 10):
+        return _bracket(value), repr(value)
+    return _bracket(value), value
+
+
+def _index_value(value):
+    """Encoding of a value in an index: ordered like MongoDB within each type bracket."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return _comparable(value).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    return "bson:" + bson.encode({"v": value}).hex()
+
+
+def _id_key(value):
+    """Primary key of a document: ObjectIds and strings keep their order, as strings sort before ObjectIds."""
+    if isinstance(value, ObjectId):
+        return "7" + str(value)
+    if isinstance(value, str):
+        return "3" + value
+    return "9" + bson.encode({"v": value}).hex()
+
+
+def _index_column(field):
+    if field == "_id":
+        return "id_key"
+    return "json_extract(keys, '$.\"{}\"')".format(field.replace('"', '""').replace("'", "''"))
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Documents: paths, filters, projections and updates
+# ---------------------------------------------------------------------------------------------------------
+
+def _lookup(document, path):
+    """Values found at a dotted path; paths through arrays of subdocuments give one value per element."""
+    values = [document]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    found.append(value[int(part)])
+                else:
+                    found += [item[part] for item in value if isinstance(item, dict) and part in item]
+        values = found
+    return values
+
+
+def _candidates(values):
+    # A condition on an array field also matches any of its elements
+    for value in values:
+        yield value
+        if isinstance(value, list):
+            yield from value
+
+
+def _matches_value(values, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        if "$regex" in condition:
+            condition = dict(condition)
+            condition["$regex"] = _regex(condition.pop("$regex"), condition.pop("$options", ""))
+        return all(_matches_operator(values, operator, operand) for operator, operand in condition.items())
+    if isinstance(condition, re.Pattern):
+        return _matches_operator(values, "$regex", condition)
+    return _matches_operator(values, "$eq", condition)
+
+
+def _regex(pattern, options=""):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    for option, flag in (("i", re.IGNORECASE), ("m", re.MULTILINE), ("s", re.DOTALL), ("x", re.VERBOSE)):
+        if option in options:
+            flags |= flag
+    return re.compile(pattern, flags)
+
+
+def _matches_operator(values, operator, operand):
+    if operator == "$eq":
+        if operand is None and not values:
+            return True
+        return any(_equal(value, operand) for value in _candidates(values))
+    if operator == "$ne":
+        return not _matches_operator(values, "$eq", operand)
+    if operator == "$in":
+        return any(_matches_operator(values, "$eq", item) for item in operand)
+    if operator == "$nin":
+        return not _matches_operator(values, "$in", operand)
+    if operator == "$exists":
+        return bool(values) == bool(operand)
+    if operator in ("$gt", "$gte", "$lt", "$lte"):
+        accepted = {"$gt": (1,), "$gte": (0, 1), "$lt": (-1,), "$lte": (-1, 0)}[operator]
+        return any(_compare(value, operand) in accepted for value in _candidates(values))
+    if operator == "$regex":
+        return any(isinstance(value, str) and _regex(operand).search(value) for value in _candidates(values))
+    if operator == "$not":
+        return not _matches_value(values, operand)
+    raise NotImplementedError(f"Query operator {operator} is not supported by the SQLite backend")
+
+
+def matches(document, query):
+    """Whether `document` matches the MongoDB filter `query`."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, part) for part in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, part) for part in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Query operator {key} is not supported by the SQLite backend")
+        elif not _matches_value(_lookup(document, key), condition):
+            return False
+    return True
+
+
+def _get_path(document, path):
+    for part in path.split("."):
+        if not isinstance(document, dict) or part not in document:
+            return False, None
+        document = document[part]
+    return True, document
+
+
+def _set_path(document, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _unset_path(document, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+
+def project(document, projection):
+    """Applies a find() projection: a list of fields, or a mapping of fields to 1 (include) or 0 (exclude)."""
+    if not projection:
+        return document
+    if not isinstance(projection, dict):
+        projection = dict.fromkeys(projection, 1)
+    include_id = bool(projection.get("_id", 1))
+    fields = {field: bool(value) for field, value in projection.items() if field != "_id"}
+    if any(fields.values()) or (not fields and include_id):
+        result = {"_id": document["_id"]} if include_id and "_id" in document else {}
+        for field in fields:
+            found, value = _get_path(document, field)
+            if found:
+                _set_path(result, field, value)
+        return result
+    for field in fields:
+        _unset_path(document, field)
+    if not include_id:
+        document.pop("_id", None)
+    return document
+
+
+def apply_update(document, update, inserting=False):
+    """Applies the update operators of `update` to `document` in place."""
+    if not update or not all(key.startswith("$") for key in update):
+        raise ValueError("update only works with $ operators")
+    for operator, fields in update.items():
+        if operator == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if operator in ("$set", "$setOnInsert"):
+                _set_path(document, path, copy.deepcopy(value))
+            elif operator == "$unset":
+                _unset_path(document, path)
+            elif operator == "$inc":
+                _, current = _get_path(document, path)
+                _set_path(document, path, (current or 0) + value)
+            elif operator in ("$push", "$addToSet"):
+                _, current = _get_path(document, path)
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                current = list(current or [])
+                for item in items:
+                    if operator == "$push" or not any(_equal(item, existing) for existing in current):
+                        current.append(copy.deepcopy(item))
+                _set_path(document, path, current)
+            else:
+                raise NotImplementedError(f"Update operator {operator} is not supported by the SQLite backend")
+
+
+def _upsert_seed(query):
+    # The equality conditions of the filter become fields of the inserted document
+    document = {}
+    for key, condition in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if "$eq" not in condition:
+                continue
+            condition = condition["$eq"]
+        _set_path(document, key, copy.deepcopy(condition))
+    return document
+
+
+def _sort_spec(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or ASCENDING)]
+    return [(key, value) for key, value in (key_or_list.items() if isinstance(key_or_list, dict) else key_or_list)]
+
+
+def _sort_documents(documents, sort):
+    for field, direction in reversed(sort):
+        documents.sort(key=lambda document: _sort_key(min(_lookup(document, field) or [None], key=_sort_key)),
+                       reverse=direction < 0)
+    return documents
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Aggregation: the pipeline stages, expressions and accumulators the application uses
+# ---------------------------------------------------------------------------------------------------------
+
+def _field_value(document, path):
+    values = _lookup(document, path)
+    return values[0] if len(values) == 1 else (values or None)
+
+
+def _before(a, b):
+    # Expressions compare values of different types by their BSON type order, unlike query filters
+    return _sort_key(a) < _sort_key(b)
+
+
+EXPRESSION_COMPARISONS = {
+    "$eq": lambda a, b: _equal(a, b) or (a is None and b is None),
+    "$ne": lambda a, b: not (_equal(a, b) or (a is None and b is None)),
+    "$gt": lambda a, b: _before(b, a),
+    "$gte": lambda a, b: not _before(a, b),
+    "$lt": _before,
+    "$lte": lambda a, b: not _before(b, a),
+}
+
+
+def evaluate(expression, document):
+    """Value of an aggregation expression: "$field" paths, literals and the operators used by the app."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _field_value(document, expression[1:])
+    if isinstance(expression, list):
+        return [evaluate(item, document) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) != 1 or not next(iter(expression)).startswith("$"):
+        return {key: evaluate(value, document) for key, value in expression.items()}
+    operator, operand = next(iter(expression.items()))
+    if operator == "$literal":
+        return operand
+    if operator in EXPRESSION_COMPARISONS:
+        a, b = evaluate(operand, document)
+        return EXPRESSION_COMPARISONS[operator](a, b)
+    if operator == "$cond":
+        if isinstance(operand, dict):
+            operand = [operand["if"], operand["then"], operand["else"]]
+        condition, then, otherwise = operand
+        return evaluate(then if _truthy(evaluate(condition, document)) else otherwise, document)
+    if operator == "$and":
+        return all(_truthy(evaluate(item, document)) for item in operand)
+    if operator == "$or":
+        return any(_truthy(evaluate(item, document)) for item in operand)
+    if operator == "$not":
+        return not _truthy(evaluate(operand[0] if isinstance(operand, list) else operand, document))
+    if operator == "$ifNull":
+        for item in operand[:-1]:
+            value = evaluate(item, document)
+            if value is not None:
+                return value
+        return evaluate(operand[-1], document)
+    raise NotImplementedError(f"Expression operator {operator} is not supported by the SQLite backend")
+
+
+def _truthy(value):
+    return value is not None and value is not False and not (_bracket(value) == 2 and _comparable(value) == 0)
+
+
+def _numbers(values):
+    return [_comparable(value) for value in values if _bracket(value) == 2]
+
+
+ACCUMULATORS = {
+    "$sum": lambda values: sum(_numbers(values)),
+    "$avg": lambda values: sum(_numbers(values)) / len(_numbers(values)) if _numbers(values) else None,
+    "$min": lambda values: min((v for v in values if v is not None), key=_sort_key, default=None),
+    "$max": lambda values: max((v for v in values if v is not None), key=_sort_key, default=None),
+    "$first": lambda values: values[0] if values else None,
+    "$last": lambda values: values[-1] if values else None,
+    "$push": list,
+}
+
+
+def _group(documents, spec):
+    groups = {}
+    for document in documents:
+        key = evaluate(spec["_id"], document)
+        group = groups.setdefault(bson.encode({"v": key}), (key, []))
+        group[1].append(document)
+    results = []
+    for key, members in groups.values():
+        result = {"_id": key}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            if operator not in ACCUMULATORS:
+                raise NotImplementedError(f"Accumulator {operator} is not supported by the SQLite backend")
+            result[field] = ACCUMULATORS[operator]([evaluate(expression, member) for member in members])
+        results.append(result)
+    return results
+
+
+def _project_stage(document, spec):
+    if all(value in (0, 1) for value in spec.values()):
+        return project(document, spec)
+    result = {"_id": document["_id"]} if spec.get("_id", 1) in (1, True) and "_id" in document else {}
+    for field, value in spec.items():
+        if value in (1, True) and field != "_id":
+            found, included = _get_path(document, field)
+            if found:
+                _set_path(result, field, included)
+        elif value not in (0, False):
+            _set_path(result, field, evaluate(value, document))
+    return result
+
+
+def run_pipeline(documents, pipeline):
+    """Runs the aggregation `pipeline` over `documents` and returns the resulting documents."""
+    documents = list(documents)
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            documents = [document for document in documents if matches(document, spec)]
+        elif name == "$project":
+            documents = [_project_stage(document, spec) for document in documents]
+        elif name == "$group":
+            documents = _group(documents, spec)
+        elif name == "$sort":
+            documents = _sort_documents(documents, list(spec.items()))
+        elif name == "$skip":
+            documents = documents[spec:]
+        elif name == "$limit":
+            documents = documents[:spec]
+        elif name == "$count":
+            documents = [{spec: len(documents)}] if documents else []
+        elif name == "$facet":
+            documents = [{field: run_pipeline(copy.deepcopy(documents), sub_pipeline)
+                          for field, sub_pipeline in spec.items()}]
+        else:
+            raise NotImplementedError(f"Pipeline stage {name} is not supported by the SQLite backend")
+    return documents
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Cursors, collections and databases
+# ---------------------------------------------------------------------------------------------------------
+
+class SQLiteCursor:
+    """The part of pymongo's Cursor the application uses: sort, skip, limit, batch_size, explain, iteration."""
+
+    def __init__(self, collection, query=None, projection=None, sort=None, skip=0, limit=0):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self._sort = _sort_spec(sort) if sort else None
+        self._skip = skip
+        self._limit = limit
+        self._batch_size = SCAN_CHUNK
+        self._iterator = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, skip):
+        self._skip = skip
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size):
+        self._batch_size = batch_size or SCAN_CHUNK
+        return self
+
+    def _documents(self):
+        order = None
+        if self._sort and len(self._sort) == 1 and self._sort[0][0] == "_id":
+            order = self._sort[0][1]  # Read in order from the primary key
+        documents = self.collection._scan(self.query, order, self._batch_size)
+        if self._sort and order is None:
+            documents = iter(_sort_documents(list(documents), self._sort))
+        skipped = returned = 0
+        for document in documents:
+            if skipped < self._skip:
+                skipped += 1
+                continue
+            if self._limit and returned >= self._limit:
+                return
+            returned += 1
+            yield project(document, self.projection)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = self._documents()
+        return next(self._iterator)
+
+    next = __next__
+
+    def close(self):
+        self._iterator = iter(())
+
+    def explain(self):
+        """The plan of the query in the shape of MongoDB's explain(), from SQLite's EXPLAIN QUERY PLAN."""
+        sql, parameters = self.collection._select_sql(self.query, None)
+        with self.collection.database._locked() as connection:
+            details = [row[-1] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, parameters)] \
+                if self.collection._exists() else []
+        index_name = None
+        for detail in details:
+            if "PRIMARY KEY" in detail or "sqlite_autoindex" in detail:
+                index_name = "_id_"
+            elif "USING INDEX" in detail or "USING COVERING INDEX" in detail:
+                index_name = detail.split(" INDEX ")[1].split(" ")[0].strip('"').split(".", 1)[-1]
+        if index_name:
+            plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": index_name}}
+        else:
+            plan = {"stage": "COLLSCAN"}
+        return {"queryPlanner": {"winningPlan": plan}, "sqlitePlan": details}
+
+
+class SQLiteCollection(Collection):
+    """
+    A collection stored in a SQLite table, with the pymongo Collection methods the application uses. Each row
+    holds the BSON document, its `_id` and the values of its indexed fields, which are SQLite expression
+    indexes. Filters on indexed fields are narrowed in SQL and every filter is then checked in Python.
+    Differences from MongoDB: indexed fields cannot hold arrays (no multikey indexes), documents missing a
+    field of a unique index do not conflict, and TTL and partial indexes are not supported.
+    """
+
+    def __init__(self, database, name):
+        if not name or '"' in name or name.startswith("_sqlite"):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        self.database = database
+        self.name = name
+        self._table = f'"{name}"'
+
+    def __repr__(self):
+        return f"SQLiteCollection({self.database.name!r}, {self.name!r})"
+
+    # -- storage ------------------------------------------------------------------------------------------
+
+    def _exists(self):
+        return self.name in self.database._tables
+
+    def _create(self, connection):
+        if not self._exists():
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} "
+                "(id_key TEXT PRIMARY KEY, keys TEXT NOT NULL DEFAULT '{}', doc BLOB NOT NULL)"
+            )
+            self.database._tables.add(self.name)
+
+    def _indexes(self):
+        return self.database._index_specs.get(self.name, {})
+
+    def _indexed_fields(self):
+        return {field for spec in self._indexes().values() for field, _ in spec["key"] if field != "_id"}
+
+    def _row(self, document):
+        keys = {}
+        for field in self._indexed_fields():
+            values = _lookup(document, field)
+            if any(isinstance(value, list) for value in values):
+                raise OperationFailure(f"Field '{field}' of collection '{self.name}' is indexed and cannot hold an "
+                                       "array with the SQLite backend")
+            if values:
+                keys[field] = _index_value(values[0])
+        return _id_key(document["_id"]), json.dumps(keys, ensure_ascii=False), bson.encode(document)
+
+    def _write_row(self, connection, document, replace_key=None):
+        id_key, keys, doc = self._row(document)
+        try:
+            if replace_key is None:
+                connection.execute(f"INSERT INTO {self._table} (id_key, keys, doc) VALUES (?, ?, ?)", (id_key, keys, doc))
+            else:
+                connection.execute(f"UPDATE {self._table} SET keys = ?, doc = ? WHERE id_key = ?", (keys, doc, replace_key))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} ({e})", DUPLICATE_KEY)
+
+    def _select_sql(self, query, order, after=None, limit=None):
+        """SQL narrowing `query` down with the indexes of the collection; rows still need `matches`."""
+        conditions, parameters = [], []
+        indexed = self._indexed_fields() | {"_id"}
+        for field, condition in (query or {}).items():
+            if field.startswith("$") or field not in indexed:
+                continue
+            column = _index_column(field)
+            encode = _id_key if field == "_id" else _index_value
+            operators = condition if isinstance(condition, dict) and condition and all(
+                key.startswith("$") for key in condition) else {"$eq": condition}
+            for operator, operand in operators.items():
+                if operator == "$eq" and self._sql_value(field, operand):
+                    conditions.append(f"{column} = ?")
+                    parameters.append(encode(operand))
+                elif operator == "$in" and operand and all(self._sql_value(field, item) for item in operand):
+                    conditions.append(f"{column} IN ({', '.join('?' * len(operand))})")
+                    parameters += [encode(item) for item in operand]
+                elif operator in ("$gt", "$gte", "$lt", "$lte") and self._sql_value(field, operand, ordered=True):
+                    sign = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[operator]
+                    conditions.append(f"{column} {sign} ?")
+                    parameters.append(encode(operand))
+        position = "id_key" if order is not None else "rowid"
+        if after is not None:
+            conditions.append(f"{position} {'<' if order is not None and order < 0 else '>'} ?")
+            parameters.append(after)
+        sql = f"SELECT {position}, doc FROM {self._table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {position} {'DESC' if order is not None and order < 0 else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return sql, parameters
+
+    @staticmethod
+    def _sql_value(field, value, ordered=False):
+        # Values whose index encoding selects a superset of the documents MongoDB would match
+        if value is None or isinstance(value, (list, dict)):
+            return False
+        if field == "_id":
+            return not ordered or isinstance(value, (ObjectId, str))
+        if ordered:
+            return isinstance(value, (int, float, str, ObjectId, datetime.datetime)) and not isinstance(value, bool)
+        return isinstance(value, (bool, int, float, str, ObjectId, datetime.datetime))
+
+    def _scan(self, query, order=None, chunk=SCAN_CHUNK):
+        """Yields the documents matching `query`, reading `chunk` rows at a time, by _id if `order` is set."""
+        after = None
+        while self._exists():
+            sql, parameters = self._select_sql(query, order, after, chunk)
+            with self.database._locked() as connection:
+                rows = connection.execute(sql, parameters).fetchall()
+            for position, doc in rows:
+                document = bson.decode(doc)
+                if matches(document, query):
+                    yield document
+            if len(rows) < chunk:
+                return
+            after = rows[-1][0]
+
+    def _matching_rows(self, connection, query, limit=None):
+        if not self._exists():
+            return []
+        sql, parameters = self._select_sql(query, None)
+        found = []
+        for _, doc in connection.execute(sql, parameters):
+            document = bson.decode(doc)
+            if matches(document, query):
+                found.append(document)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    # -- reads --------------------------------------------------------------------------------------------
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs):
+        return SQLiteCursor(self, filter, projection, sort, skip, limit)
+
+    def find_one(self, filter=None, projection=None, *args, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        return next(iter(self.find(filter, projection, *args, **kwargs).limit(1)), None)
+
+    def count_documents(self, filter, **kwargs):
+        return sum(1 for _ in self._scan(filter))
+
+    def estimated_document_count(self, **kwargs):
+        if not self._exists():
+            return 0
+        with self.database._locked() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def distinct(self, key, filter=None, **kwargs):
+        values = []
+        for document in self._scan(filter or {}):
+            for value in _candidates(_lookup(document, key)):
+                if not isinstance(value, list) and not any(_equal(value, seen) for seen in values):
+                    values.append(value)
+        return values
+
+    def aggregate(self, pipeline, **kwargs):
+        """Runs the pipeline in Python; a leading $match is narrowed with the indexes, like find()."""
+        pipeline = list(pipeline)
+        query = pipeline.pop(0)["$match"] if pipeline and "$match" in pipeline[0] else {}
+        return iter(run_pipeline(self._scan(query), pipeline))
+
+    # -- writes -------------------------------------------------------------------------------------------
+
+    def insert_one(self, document, **kwargs):
+        document.setdefault("_id", ObjectId())
+        with self.database._transaction() as connection:
+            self._create(connection)
+            self._write_row(connection, document)
+        return InsertOneResult(document["_id"], True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        documents = list(documents)
+        inserted, errors = [], []
+        with self.database._transaction() as connection:
+            self._create(connection)
+            for index, document in enumerate(documents):
+                document.setdefault("_id", ObjectId())
+                try:
+                    self._write_row(connection, document)
+                    inserted.append(document["_id"])
+                except DuplicateKeyError as e:
+                    errors.append({"index": index, "code": DUPLICATE_KEY, "errmsg": str(e), "op": document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted),
+                                  "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []})
+        return InsertManyResult(inserted, True)
+
+    def _update(self, filter, update, upsert, many, replacement=False):
+        matched = modified = 0
+        upserted_id = None
+        with self.database._transaction() as connection:
+            self._create(connection)
+            for document in self._matching_rows(connection, filter, None if many else 1):
+                matched += 1
+                updated = copy.deepcopy(document)
+                if replacement:
+                    updated = dict(update, _id=document["_id"])
+                else:
+                    apply_update(updated, update)
+                if not _equal(updated.get("_id"), document["_id"]):
+                    raise OperationFailure("Performing an update on the path '_id' would modify the immutable "
+                                           "field '_id'", IMMUTABLE_FIELD)
+                if updated != document:
+                    self._write_row(connection, updated, replace_key=_id_key(document["_id"]))
+                    modified += 1
+            if not matched and upsert:
+                document = _upsert_seed(filter)
+                if replacement:
+                    document.update(update)
+                else:
+                    apply_update(document, update, inserting=True)
+                document.setdefault("_id", ObjectId())
+                self._write_row(connection, document)
+                upserted_id = document["_id"]
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified, "ok": 1.0}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        return self._update(filter, update, upsert, many=False)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        return self._update(filter, update, upsert, many=True)
+
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        if any(key.startswith("$") for key in replacement):
+            raise ValueError("replacement can not include $ operators")
+        return self._update(filter, replacement, upsert, many=False, replacement=True)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                            return_document=False, **kwargs):
+        """Atomic, like MongoDB's: the document is read and written in one transaction."""
+        with self.database._transaction() as connection:
+            self._create(connection)
+            documents = self._matching_rows(connection, filter, None if sort else 1)
+            if sort:
+                documents = _sort_documents(documents, _sort_spec(sort))
+            if documents:
+                before = documents[0]
+                after = copy.deepcopy(before)
+                apply_update(after, update)
+                if not _equal(after.get("_id"), before["_id"]):
+                    raise OperationFailure("Performing an update on the path '_id' would modify the immutable "
+                                           "field '_id'", IMMUTABLE_FIELD)
+                self._write_row(connection, after, replace_key=_id_key(before["_id"]))
+            elif upsert:
+                before = None
+                after = _upsert_seed(filter)
+                apply_update(after, update, inserting=True)
+                after.setdefault("_id", ObjectId())
+                self._write_row(connection, after)
+            else:
+                return None
+        result = after if return_document else before
+        return project(copy.deepcopy(result), projection) if result is not None else None
+
+    def _delete(self, filter, many):
+        with self.database._transaction() as connection:
+            documents = self._matching_rows(connection, filter, None if many else 1)
+            for document in documents:
+                connection.execute(f"DELETE FROM {self._table} WHERE id_key = ?", (_id_key(document["_id"]),))
+        return DeleteResult({"n": len(documents), "ok": 1.0}, True)
+
+    def delete_one(self, filter, **kwargs):
+        return self._delete(filter, many=False)
+
+    def delete_many(self, filter, **kwargs):
+        return self._delete(filter, many=True)
+
+    def drop(self):
+        self.database.drop_collection(self.name)
+
+    # -- indexes ------------------------------------------------------------------------------------------
+
+    def create_index(self, keys, **kwargs):
+        key = _sort_spec(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{field}_{direction}" for field, direction in key)
+        options = {option: kwargs[option] for option in INDEX_OPTIONS if kwargs.get(option) is not None}
+        for field, direction in key:
+            if direction not in (1, -1):
+                raise NotImplementedError(f"Index type {direction!r} is not supported by the SQLite backend")
+        for option in ("partialFilterExpression", "collation"):
+            if option in options:
+                raise NotImplementedError(f"Index option {option} is not supported by the SQLite backend")
+        spec = dict({"v": 2, "key": key}, **options)
+
+        existing = self._indexes().get(name)
+        if existing is not None:
+            if existing != spec:
+                raise OperationFailure(f"An existing index has the same name as the requested index: {name}",
+                                       INDEX_KEY_SPECS_CONFLICT)
+            return name
+        columns = ", ".join(f"{_index_column(field)}{' DESC' if direction < 0 else ''}" for field, direction in key)
+        where = f" WHERE {_index_column(key[0][0])} IS NOT NULL" if options.get("sparse") else ""
+        with self.database._transaction() as connection:
+            self._create(connection)
+            self.database._index_specs.setdefault(self.name, {})[name] = spec
+            try:
+                # Fill in the values of the newly indexed fields, then build the index over them
+                for _, doc in connection.execute(f"SELECT id_key, doc FROM {self._table}").fetchall():
+                    document = bson.decode(doc)
+                    self._write_row(connection, document, replace_key=_id_key(document["_id"]))
+                connection.execute(
+                    f"CREATE {'UNIQUE ' if options.get('unique') else ''}INDEX \"{self.name}.{name}\" "
+                    f"ON {self._table} ({columns}){where}"
+                )
+            except (sqlite3.IntegrityError, DuplicateKeyError) as e:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name} ({e})",
+                                        DUPLICATE_KEY)
+            connection.execute("INSERT INTO _sqlite_store_indexes (collection, name, spec) VALUES (?, ?, ?)",
+                               (self.name, name, json.dumps(spec)))
+        return name
+
+    def create_indexes(self, indexes, **kwargs):
+        names = []
+        for index in indexes:
+            document = dict(index.document)
+            names.append(self.create_index(list(document.pop("key").items()), **document))
+        return names
+
+    def index_information(self):
+        information = {"_id_": {"v": 2, "key": [("_id", 1)]}} if self._exists() else {}
+        for name, spec in self._indexes().items():
+            information[name] = dict(spec, key=[tuple(item) for item in spec["key"]])
+        return information
+
+    def drop_index(self, index_or_name):
+        name = index_or_name
+        if not isinstance(index_or_name, str):
+            key = _sort_spec(index_or_name)
+            name = next((n for n, spec in self._indexes().items() if [tuple(k) for k in spec["key"]] == key), None)
+        if name not in self._indexes():
+            raise OperationFailure(f"index not found with name [{name}]", 27)
+        with self.database._transaction() as connection:
+            connection.execute(f'DROP INDEX IF EXISTS "{self.name}.{name}"')
+            connection.execute("DELETE FROM _sqlite_store_indexes WHERE collection = ? AND name = ?", (self.name, name))
+            del self.database._index_specs[self.name][name]
+
+    def drop_indexes(self):
+        for name in list(self._indexes()):
+            self.drop_index(name)
+
+
+class SQLiteClient:
+    """Stands in for MongoClient where the application reaches the client through `db.client`."""
+
+    def __init__(self, database):
+        self._database = database
+
+    def start_session(self, **kwargs):
+        return SQLiteSession(self._database)
+
+    def close(self):
+        self._database.close()
+
+
+class SQLiteSession:
+    """
+    Stands in for pymongo's ClientSession: `with_transaction` runs the callback in one SQLite transaction,
+    so its writes are committed together or not at all. The `session` argument of the collection methods
+    is accepted and ignored, since the transaction belongs to the thread that runs the callback.
+    """
+
+    def __init__(self, database):
+        self._database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.end_session()
+
+    def with_transaction(self, callback, **kwargs):
+        with self._database._transaction():
+            return callback(self)
+
+    def end_session(self):
+        pass
+
+
+class SQLiteDatabase(Database):
+    """
+    An embedded document database in one SQLite file (or in memory with ":memory:"), with the pymongo
+    Database methods the application uses. One connection is shared by the threads of the process;
+    other processes may open the same file.
+    """
+
+    def __init__(self, path=":memory:", name=None):
+        self.path = path
+        self.name = name or path
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS _sqlite_store_indexes "
+            "(collection TEXT NOT NULL, name TEXT NOT NULL, spec TEXT NOT NULL, PRIMARY KEY (collection, name))"
+        )
+        self._collections = {}
+        self._load_schema()
+        self.client = SQLiteClient(self)
+
+    def _load_schema(self):
+        self._tables = {name for (name,) in self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE '\\_sqlite%' ESCAPE '\\'"
+        )}
+        self._index_specs = {}
+        for collection, name, spec in self._connection.execute("SELECT collection, name, spec FROM _sqlite_store_indexes"):
+            self._index_specs.setdefault(collection, {})[name] = json.loads(spec)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            yield self._connection
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            # Writes inside a session's transaction become savepoints of it
+            nested = self._connection.in_transaction
+            self._connection.execute("SAVEPOINT nested" if nested else "BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK TO nested" if nested else "ROLLBACK")
+                if nested:
+                    self._connection.execute("RELEASE nested")
+                self._load_schema()  # Tables or indexes created in the transaction are gone again
+                raise
+            self._connection.execute("RELEASE nested" if nested else "COMMIT")
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections.setdefault(name, SQLiteCollection(self, name))
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name, **kwargs):
+        return self[name]
+
+    def list_collection_names(self, **kwargs):
+        return sorted(self._tables)
+
+    def drop_collection(self, name):
+        name = getattr(name, "name", name)
+        with self._transaction() as connection:
+            connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+            connection.execute("DELETE FROM _sqlite_store_indexes WHERE collection = ?", (name,))
+            self._tables.discard(name)
+            self._index_specs.pop(name, None)
+
+    def command(self, command, **kwargs):
+        if command == "ping" or command == {"ping": 1}:
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command {command!r} is not supported by the SQLite backend")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+# One database per file, shared by the apps of the process; every ":memory:" database is a new one
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def open_sqlite_database(path):
+    """Get the SQLite database stored at `path`, opening it on first use."""
+    if path == ":memory:":
+        return SQLiteDatabase(path)
+    path = os.path.abspath(path)
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = SQLiteDatabase(path, name=os.path.splitext(os.path.basename(path))[0])
+        return _databases[path]
+
+
+def close_sqlite_databases():
+    with _databases_lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
+
+
+__all__ = ['SQLiteDatabase', 'SQLiteCollection', 'SQLiteCursor', 'SQLiteSession', 'open_sqlite_database',
+           'close_sqlite_databases', 'matches', 'project', 'apply_update', 'evaluate', 'run_pipeline']
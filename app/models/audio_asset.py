@@ -0,0 +1,217 @@
+import os
+import json
+import re
+import contextlib
+import hashlib
+import datetime
+import threading
+from pymongo import ReturnDocument
+from flask import current_app
+from app.utils.audio_encoding import describe_audio, get_audio_encoder
+from app.utils.tts import get_tts_backend
+
+AUDIO_DIR = "audio_files"
+
+# Clip ids are SHA-256 hex digests
+ASSET_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# One lock per clip being synthesized in this process, so concurrent cards never synthesize the same clip twice
+_synthesis_locks = {}
+_synthesis_locks_guard = threading.Lock()
+
+
+class AudioAsset:
+    """
+    Speech clips stored once under the hash of what they say and how: (text, voice, engine, language).
+    The engine and voice come from the configured TTS backend (see app.utils.tts); clips are then
+    re-encoded to a compact format (see app.utils.audio_encoding). Documents that store a clip's path
+    hold a reference to it; the file is removed when the last one is released.
+    """
+
+    @staticmethod
+    def content_hash(text, language="en", voice="default", engine="gtts"):
+        material = json.dumps([text.strip(), voice, engine, language], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def path_for(asset_id, extension="mp3"):
+        # Two-level fan-out keeps directories small
+        return os.path.join(AUDIO_DIR, asset_id[:2], f"{asset_id}.{extension}")
+
+    @staticmethod
+    def acquire(text, language="en"):
+        """
+        Returns the path of the clip for `text`, synthesizing it only if no such clip exists yet, and
+        takes a reference on it. The caller must store the path on a document or `release` it.
+        """
+        return AudioAsset.acquire_many([text], language)[0]
+
+    @staticmethod
+    def acquire_many(texts, language="en"):
+        """
+        Like `acquire` for several texts at once. The missing clips are synthesized in a single batch,
+        which batched backends turn into one model call. Returns the paths in the order of `texts`.
+        """
+        backend = get_tts_backend()
+        encoder = get_audio_encoder()
+        extension = encoder.extension if encoder else backend.extension
+        now = datetime.datetime.now()
+        paths = []
+        missing = {}
+        for text in texts:
+            asset_id = AudioAsset.content_hash(text, language, backend.voice, backend.name)
+            asset = current_app.db.audio_assets.find_one_and_update(
+                {"_id": asset_id},
+                {
+                    "$inc": {"ref_count": 1},
+                    "$setOnInsert": {
+                        "path": AudioAsset.path_for(asset_id, extension),
+                        "text": text.strip(),
+                        "language": language,
+                        "voice": backend.voice,
+                        "engine": backend.name,
+                        "created_at": now
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            # Clips stored before a format change keep their path until they are re-encoded
+            paths.append(asset["path"])
+            missing.setdefault(asset_id, (text, asset["path"]))
+
+        try:
+            # Lock in a fixed order so two batches sharing clips cannot deadlock
+            with contextlib.ExitStack() as stack:
+                for asset_id in sorted(missing):
+                    stack.enter_context(_synthesis_lock(asset_id))
+                batch = [(asset_id, text, filepath) for asset_id, (text, filepath) in missing.items()
+                         if not os.path.exists(filepath)]
+                if batch:
+                    infos = AudioAsset.synthesize(backend, encoder, [(text, language, path) for _, text, path in batch])
+                    for (asset_id, _, _), info in zip(batch, infos):
+                        current_app.db.audio_assets.update_one({"_id": asset_id}, {"$set": info})
+        except Exception:
+            # Nobody will store these paths: drop every reference this call took
+            for path in paths:
+                AudioAsset.release(path)
+            raise
+        return paths
+
+    @staticmethod
+    def synthesize(backend, encoder, items):
+        """
+        Synthesizes (text, language, filepath) items with `backend` and re-encodes them with `encoder`,
+        if any. Each file appears atomically, so readers never see a half-written clip. Returns the
+        duration, size and format of every clip.
+        """
+        tmp_items = []
+        for text, language, filepath in items:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.{backend.extension}"
+            tmp_items.append((text, language, tmp_path))
+        encoded_paths = [f"{tmp_path}.tmp" for _, _, tmp_path in tmp_items]
+        try:
+            backend.synthesize_batch(tmp_items)
+            infos = []
+            for (_, _, filepath), (_, _, tmp_path), encoded_path in zip(items, tmp_items, encoded_paths):
+                if encoder:
+                    infos.append(encoder.encode(tmp_path, encoded_path))
+                    os.replace(encoded_path, filepath)
+                else:
+                    infos.append(describe_audio(tmp_path))
+                    os.replace(tmp_path, filepath)
+            return infos
+        finally:
+            for path in [tmp_path for _, _, tmp_path in tmp_items] + encoded_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def get_asset(asset_id):
+        return current_app.db.audio_assets.find_one({"_id": asset_id})
+
+    @staticmethod
+    def media_url(filepath):
+        """
+        URL of the clip at `filepath` on the media endpoint, or None for files that are not content-addressed.
+        """
+        if not filepath:
+            return None
+        asset_id = os.path.splitext(os.path.basename(filepath))[0]
+        if not ASSET_ID_PATTERN.fullmatch(asset_id):
+            return None
+        return f"/media/audio/{asset_id}"
+
+    @staticmethod
+    def describe_many(paths):
+        """
+        Returns {path: {"duration": seconds, "size": bytes}} for the known clips among `paths`.
+        """
+        paths = [path for path in paths if path]
+        if not paths:
+            return {}
+        assets = current_app.db.audio_assets.find({"path": {"$in": paths}}, {"path": 1, "duration": 1, "size": 1})
+        return {asset["path"]: {"duration": asset.get("duration"), "size": asset.get("size")} for asset in assets}
+
+    @staticmethod
+    def retain(filepath):
+        """
+        Takes one more reference on the clip at `filepath`, e.g. when its path is stored on another document.
+        Returns False for paths that are not content-addressed clips.
+        """
+        if not filepath:
+            return False
+        result = current_app.db.audio_assets.update_one({"path": filepath}, {"$inc": {"ref_count": 1}})
+        return result.matched_count == 1
+
+    @staticmethod
+    def release(filepath):
+        """
+        Drops one reference on the clip at `filepath` and deletes the file once nothing uses it.
+        Returns True if the file was deleted. Paths that are not content-addressed clips are ignored.
+        """
+        if not filepath:
+            return False
+        asset = current_app.db.audio_assets.find_one_and_update(
+            {"path": filepath},
+            {"$inc": {"ref_count": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if asset is None or asset["ref_count"] > 0:
+            return False
+        # Only delete if nobody acquired the clip again in the meantime
+        result = current_app.db.audio_assets.delete_one({"_id": asset["_id"], "ref_count": {"$lte": 0}})
+        if result.deleted_count and os.path.exists(filepath):
+            os.remove(filepath)
+            return True
+        return False
+
+
+def _synthesis_lock(asset_id):
+    with _synthesis_locks_guard:
+        lock = _synthesis_locks.get(asset_id)
+        if lock is None:
+            lock = _synthesis_locks[asset_id] = _RefCountedLock(asset_id)
+        lock.users += 1
+    return lock
+
+
+class _RefCountedLock:
+    """Per-clip lock that removes itself from the registry once no thread is waiting on it."""
+
+    def __init__(self, asset_id):
+        self.asset_id = asset_id
+        self.users = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+        with _synthesis_locks_guard:
+            self.users -= 1
+            if self.users == 0:
+                _synthesis_locks.pop(self.asset_id, None)
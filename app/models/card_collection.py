@@ -1,21 +1,52 @@
 import datetime
-import eng_to_ipa as ipa
-import nltk
-from nltk.corpus import wordnet
-from gtts import gTTS
 import os
-import requests
-import json
-from flask import current_app
-
-# Download WordNet data (only needed once)
-nltk.download('wordnet')
+from bson import ObjectId
+from flask import current_app, has_app_context
+from pymongo.errors import OperationFailure
+from app.models.audio_asset import AudioAsset
+from app.models.lexicon import Lexicon
+from app.models.user_progress import UserProgress
+from app.utils.enrichment import EnrichmentExecutor
+from app.utils.ipa import get_ipa_service
+from app.utils.job_queue import register_handler
+from app.utils.llm_cache import cache_key, get_llm_cache
+from app.utils.llm_client import get_llm_client
+from app.utils.llm_output import (COMBINED_FIELDS_SCHEMA, extract_json_object, parse_example_sentences,
+                                  parse_numbered_list, validate_combined_fields)
+from app.utils.pagination import find_page, iter_batches
+from app.utils.read_cache import cached, get_read_cache, invalidate
+from app.utils.tts import get_tts_backend
+from app.utils.wordnet_index import lookup_synonyms_antonyms
+
+# Server error code for operations a deployment does not support, e.g. transactions on a standalone server
+ILLEGAL_OPERATION = 20
 
 class VocabularyCard:
+    # Every field of a card response; the shared ones are filled from the lexicon
+    FIELDS = [
+        "_id", "card_id", "user_id", "dataset_id", "word", "meaning_en", "meaning_vi", "ipa_transcription",
+        "example_sentences_en", "example_sentences_vi", "visual_image_url", "audio_url_word", "audio_url_example1",
+        "audio_url_example2", "synonyms", "antonyms", "word_type", "vocab_family", "lexicon_id", "audio_info",
+        "created_at", "updated_at",
+    ]
+
+    # Fields holding the path of a speech clip
+    AUDIO_FIELDS = ("audio_url_word", "audio_url_example1", "audio_url_example2")
+
+    # Named field sets for card responses; None returns every field
+    VIEWS = {
+        "summary": ["card_id", "word", "word_type"],
+        "study": ["card_id", "dataset_id", "word", "word_type", "ipa_transcription", "meaning_en", "meaning_vi",
+                  "example_sentences_en", "example_sentences_vi", "visual_image_url", "audio_url_word",
+                  "audio_url_example1", "audio_url_example2"],
+        "full": None,
+    }
+
     def __init__(self, card_id, user_id, dataset_id, word, meaning_en, meaning_vi,
                  ipa_transcription, example_sentences_en, example_sentences_vi,
                  visual_image_url, audio_url_word, audio_url_example1, audio_url_example2,
-                 synonyms, antonyms, word_type=None, vocab_family=None, created_at=None, updated_at=None):
+                 synonyms, antonyms, word_type=None, vocab_family=None, created_at=None, updated_at=None,
+                 lexicon_id=None, audio_info=None):
         self.card_id = card_id
         self.user_id = user_id
         self.dataset_id = dataset_id
@@ -33,48 +64,58 @@ class VocabularyCard:
         self.antonyms = antonyms
         self.word_type = word_type  # New field: word type (e.g., noun, verb, adjective)
         self.vocab_family = vocab_family  # New field: vocabulary family (related words)
+        self.lexicon_id = lexicon_id  # Shared lexicon entry holding the generated fields of this word
+        # Audio field -> {"duration": seconds, "size": bytes}; read from the audio assets, never stored on the card
+        self.audio_info = audio_info or {}
         self.created_at = created_at if created_at else datetime.datetime.now()
         self.updated_at = updated_at if updated_at else datetime.datetime.now()
 
     @staticmethod
-    def query_lm_studio(prompt, max_tokens=100):
+    def query_lm_studio(prompt, max_tokens=100, response_format=None, fresh=False, validate=None):
         """
         Sends a prompt to the LM Studio server and returns the generated text.
+        `response_format` is passed through to the server, e.g. to request JSON matching a schema.
+        Answers are cached by prompt, model, temperature and max_tokens, once `validate(answer)` accepts
+        them (any non-empty answer by default); `fresh=True` skips the cached answer and stores the newly
+        generated one in its place. Nothing is cached while the model answering cannot be told.
         """
-        url = "http://localhost:1234/v1/chat/completions"
-        headers = {"Content-Type": "application/json"}
-        payload = {
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": max_tokens,
-            "temperature": 0.7,
-        }
+        temperature = 0.7
+        client = get_llm_client()
+        cache = get_llm_cache()
+        key = None
+        if cache:
+            model = client.served_model()
+            key = cache_key(prompt, model, temperature, max_tokens, response_format) if model else None
+        if key and not fresh:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
 
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+            answer = client.complete(prompt, max_tokens=max_tokens, temperature=temperature,
+                                     response_format=response_format)
         except Exception as e:
             print(f"Error querying LM Studio: {e}")
             return None
 
+        if key and answer and (validate is None or validate(answer)):
+            cache.set(key, answer)
+        return answer
+
     @staticmethod
-    def get_word_type(word):
+    def get_word_type(word, fresh=False):
         """
         Determines the word type (e.g., noun, verb, adjective) using the LM Studio server.
         """
         prompt = f"What is the word type (part of speech) of the word '{word}'? Provide only the word type, nothing else."
-        return VocabularyCard.query_lm_studio(prompt)
+        return VocabularyCard.query_lm_studio(prompt, fresh=fresh)
 
     @staticmethod
-    def get_vocab_family(word):
+    def get_vocab_family(word, fresh=False):
         """
         Generates a list of related words or word forms (vocabulary family) using the LM Studio server.
         Specifically requests related words in different grammatical forms (noun, verb, adjective, etc.).
-        Returns the list in the format:
-        1. Word (form)
-        2. Word (form)
-        ...
+        Returns a list in the format ["Word (form)", "Word (form)", ...].
         """
         prompt = (
             f"Provide a list of related words or word forms for the word '{word}' in different grammatical forms "
@@ -85,10 +126,12 @@ class VocabularyCard:
             "3. Exaggeratedly (adverb)\n"
             "Provide only the numbered list, nothing else."
         )
-        return VocabularyCard.query_lm_studio(prompt, max_tokens=100)
+        # None when the answer is unusable, so the field is generated again for the next card
+        return parse_numbered_list(VocabularyCard.query_lm_studio(prompt, max_tokens=100, fresh=fresh,
+                                                                  validate=parse_numbered_list)) or None
 
     @staticmethod
-    def get_meaning_en(word):
+    def get_meaning_en(word, fresh=False):
         """
         Generates the English meaning of a word in multiple contexts using the LM Studio server.
         Returns a list of meanings with examples or contexts.
@@ -103,10 +146,13 @@ class VocabularyCard:
             "   - Example sentence in English.\n"
             "Provide only the numbered list, nothing else."
         )
-        return VocabularyCard.query_lm_studio(prompt, max_tokens=200)
+        # None when the answer is unusable, so the field is generated again for the next card
+        # None when the answer is unusable, so the field is generated again for the next card
+        return parse_numbered_list(VocabularyCard.query_lm_studio(prompt, max_tokens=200, fresh=fresh,
+                                                                  validate=parse_numbered_list)) or None or None
 
     @staticmethod
-    def get_meaning_vi(word):
+    def get_meaning_vi(word, fresh=False):
         """
         Translates a word from English to Vietnamese and provides its meaning in multiple contexts using the LM Studio server.
         Returns a list of meanings with examples or contexts.
@@ -121,171 +167,558 @@ class VocabularyCard:
             "   - Example sentence in Vietnamese.\n"
             "Provide only the numbered list, nothing else."
         )
-        return VocabularyCard.query_lm_studio(prompt, max_tokens=200)
+        return parse_numbered_list(VocabularyCard.query_lm_studio(prompt, max_tokens=200, fresh=fresh,
+                                                                  validate=parse_numbered_list))
 
     @staticmethod
-    def get_example_sentences(word):
+    def get_example_sentences(word, fresh=False):
         """
         Generates example sentences using the word with the LM Studio server.
+        Returns None when none could be generated, so they are generated again for the next card.
         """
         prompt = f"Write two clear and grammatically correct example sentences using the word '{word}' in English. Do not include definitions or explanations."
-        examples = VocabularyCard.query_lm_studio(prompt, max_tokens=200)
-        if examples:
-            print(f'Examples: {examples}')
-            return examples.split("\n")
-        return ["Example sentence not available."]
+        examples = parse_example_sentences(VocabularyCard.query_lm_studio(prompt, max_tokens=200, fresh=fresh,
+                                                                          validate=parse_example_sentences))
+        return examples or None
+
+    @staticmethod
+    def get_combined_fields(word, fresh=False):
+        """
+        Generates meaning_en, meaning_vi, two example sentences, word_type and vocab_family with a single
+        LM Studio request that answers in JSON. Returns only the fields that passed validation.
+        """
+        prompt = (
+            f"You are building a vocabulary flashcard for the English word '{word}'. "
+            "Answer with a single JSON object with these keys:\n"
+            "- meaning_en: list of meanings in English, each with its context and a short example, "
+            "e.g. \"Meaning (Context) - Example sentence.\"\n"
+            "- meaning_vi: the same meanings translated to Vietnamese, with Vietnamese examples\n"
+            "- example_sentences_en: exactly two clear and grammatically correct English sentences using the word "
+            "in two different situations\n"
+            "- word_type: the part of speech, e.g. \"noun\"\n"
+            "- vocab_family: related words in other grammatical forms, each followed by its form in parentheses, "
+            "e.g. \"Exaggeration (noun)\"\n"
+            "Provide only the JSON object, nothing else."
+        )
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {"name": "vocabulary_card", "strict": True, "schema": COMBINED_FIELDS_SCHEMA},
+        }
+        answer = VocabularyCard.query_lm_studio(prompt, max_tokens=600, response_format=response_format,
+                                              fresh=fresh, validate=VocabularyCard._is_complete_combined_answer)
+        return validate_combined_fields(extract_json_object(answer))
+
+    @staticmethod
+    def _is_complete_combined_answer(answer):
+        # Answers with a field that fails validation are not cached, so the word is asked again next time
+        return len(validate_combined_fields(extract_json_object(answer))) == len(COMBINED_FIELDS_SCHEMA["required"])
+
+    @staticmethod
+    def submit_text_fields(executor, word, provided, fresh=False):
+        """
+        Schedules generation of every LLM text field missing from `provided` on the enrichment executor.
+        In combined mode one JSON prompt answers all fields and only the fields it got wrong fall back to
+        their own prompt. The steps are named after the card fields. `fresh` bypasses the LLM cache.
+        """
+        generators = {
+            "example_sentences_en": VocabularyCard.get_example_sentences,
+            "meaning_en": VocabularyCard.get_meaning_en,
+            "meaning_vi": VocabularyCard.get_meaning_vi,
+            "word_type": VocabularyCard.get_word_type,
+            "vocab_family": VocabularyCard.get_vocab_family,
+        }
+        missing = {name: generator for name, generator in generators.items() if not provided.get(name)}
+        if not missing:
+            return
+
+        config = current_app.config.get("enrichment", {}) if has_app_context() else {}
+        if len(missing) == 1 or not config.get("combined", True):
+            for name, generator in missing.items():
+                executor.submit(name, generator, word, fresh=fresh, group="llm")
+            return
+
+        executor.submit("combined_fields", VocabularyCard.get_combined_fields, word, fresh=fresh, group="llm")
+        for name, generator in missing.items():
+            resolve = VocabularyCard._combined_or_fallback(name, generator, word, fresh)
+            executor.then("combined_fields", name, resolve, group="llm")
+
+    @staticmethod
+    def _combined_or_fallback(name, generator, word, fresh=False):
+        """
+        Returns a step that takes the field from the combined answer, or runs its per-field prompt.
+        """
+        def resolve(combined):
+            if name in combined:
+                return combined[name]
+            return generator(word, fresh=fresh)
+        return resolve
 
     @staticmethod
     def create_card(user_id, dataset_id, word, meaning_en=None, meaning_vi=None,
                     ipa_transcription=None, example_sentences_en=None, example_sentences_vi=None,
-                    visual_image_url=None, word_type=None, vocab_family=None):
+                    visual_image_url=None, word_type=None, vocab_family=None, fresh=False, with_progress=False):
+        """
+        Creates a card; with `with_progress`, also its initial user_progress entry, whose id is set on the
+        returned card as `progress_id`.
+        """
+        document = None
+        try:
+            new_card, document = VocabularyCard.build_card(
+                user_id, dataset_id, word, meaning_en, meaning_vi, ipa_transcription, example_sentences_en,
+                example_sentences_vi, visual_image_url, word_type, vocab_family, fresh
+            )
+
+            # Save to database
+            progress = UserProgress(user_id, new_card.card_id, dataset_id).to_dict() if with_progress else None
+            VocabularyCard.insert_card(document, progress)
+            new_card.progress_id = str(progress["_id"]) if progress else None
+            return new_card
+        except Exception as e:
+            print(f"Error creating card: {e}")
+            if document is not None:
+                VocabularyCard.release_audio(document)
+            return None
+
+    @staticmethod
+    def insert_card(document, progress=None):
+        """
+        Writes a new card in a single insert; its id was generated by build_card. With a `progress` document,
+        the card and its progress entry are written in one transaction, so neither exists without the other.
+        Deployments without transactions (a standalone server) get two inserts instead, and the card is
+        removed again if its progress entry cannot be written.
+        """
+        db = current_app.db
+        if progress is None:
+            db.vocabulary_cards.insert_one(document)
+            return
         try:
-            # Automatically generate IPA transcription if not provided
-            if not ipa_transcription:
-                ipa_transcription = VocabularyCard.get_ipa_transcription(word)
+            with db.client.start_session() as session:
+                session.with_transaction(lambda transaction: (
+                    db.vocabulary_cards.insert_one(document, session=transaction),
+                    db.user_progress.insert_one(progress, session=transaction)
+                ))
+            return
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+        except NotImplementedError:
+            pass  # Clients without session support
+
+        db.vocabulary_cards.insert_one(document)
+        try:
+            db.user_progress.insert_one(progress)
+        except Exception:
+            db.vocabulary_cards.delete_one({"_id": document["_id"]})
+            raise
+
+    @staticmethod
+    def build_card(user_id, dataset_id, word, meaning_en=None, meaning_vi=None,
+                   ipa_transcription=None, example_sentences_en=None, example_sentences_vi=None,
+                   visual_image_url=None, word_type=None, vocab_family=None, fresh=False, card_id=None):
+        """
+        Enriches a new card and returns it with the document to insert, without writing the card itself.
+        Errors are raised to the caller. `card_id` lets callers fix the id in advance, e.g. for retries.
+        """
+        # Allocate the card id up front so audio can be generated while the text fields are still running
+        card_object_id = ObjectId(card_id) if card_id else ObjectId()
+        card_id = str(card_object_id)
+
+        # Reuse what the shared lexicon entry already knows about this word.
+        # `fresh` regenerates every field for this card only and leaves the entry untouched.
+        entry = Lexicon.get_or_create_entry(word)
+        lexicon_id = str(entry["_id"])
+        shared = {} if fresh else Lexicon.shared_fields(entry)
+
+        # Store list fields as lists, even when the client sends the raw numbered text.
+        # Values equal to the lexicon entry are not overrides and are not stored on the card.
+        provided = {
+            "meaning_en": VocabularyCard._as_list(meaning_en),
+            "meaning_vi": VocabularyCard._as_list(meaning_vi),
+            "ipa_transcription": ipa_transcription,
+            "example_sentences_en": VocabularyCard._as_list(example_sentences_en),
+            "word_type": word_type,
+            "vocab_family": VocabularyCard._as_list(vocab_family),
+        }
+        provided = {k: v for k, v in provided.items() if v and shared.get(k) != v}
+        known = dict(shared, **provided)
+
+        with EnrichmentExecutor.from_config() as executor:
+            # Automatically generate IPA transcription if not known
+            if "ipa_transcription" not in known:
+                executor.submit("ipa_transcription", VocabularyCard.get_ipa_transcription, word)
 
             # Automatically generate synonyms and antonyms
-            synonyms, antonyms = VocabularyCard.get_synonyms_antonyms(word)
-
-            # Automatically generate example sentences if not provided
-            if not example_sentences_en:
-                example_sentences_en = VocabularyCard.get_example_sentences(word)
-
-            # Automatically generate English meaning if not provided
-            if not meaning_en:
-                meaning_en = VocabularyCard.get_meaning_en(word)
-
-            # Automatically generate Vietnamese meaning if not provided
-            if not meaning_vi:
-                meaning_vi = VocabularyCard.get_meaning_vi(word)
-
-            # Automatically generate word type if not provided
-            if not word_type:
-                word_type = VocabularyCard.get_word_type(word)
-
-            # Automatically generate vocabulary family if not provided
-            if not vocab_family:
-                vocab_family = VocabularyCard.get_vocab_family(word)
-
-            # Create a temporary card to get the card_id
-            new_card = VocabularyCard(
-                None,
-                user_id,
-                dataset_id,
-                word,
-                meaning_en,
-                meaning_vi,
-                ipa_transcription,
-                example_sentences_en,
-                example_sentences_vi,
-                visual_image_url,
-                None,  # audio_url_word (will be generated later)
-                None,  # audio_url_example1 (will be generated later)
-                None,  # audio_url_example2 (will be generated later)
-                synonyms,
-                antonyms,
-                word_type,  # New field: word type
-                vocab_family  # New field: vocabulary family
-            )
+            if "synonyms" not in known or "antonyms" not in known:
+                executor.submit("synonyms_antonyms", VocabularyCard.get_synonyms_antonyms, word)
+
+            # Automatically generate the LLM fields that are not known
+            VocabularyCard.submit_text_fields(executor, word, known, fresh=fresh)
+
+            # Generate audio for the word and the example sentences
+            VocabularyCard.submit_audio(executor, word, known, provided)
+
+            try:
+                results = executor.results()
+            except Exception:
+                VocabularyCard._release_audio_steps(executor)
+                raise
+            timings = executor.timing_breakdown()
+
+        generated = {k: v for k, v in results.items() if k in Lexicon.SHARED_FIELDS}
+        if "synonyms_antonyms" in results:
+            generated["synonyms"], generated["antonyms"] = results["synonyms_antonyms"]
+        generated.update(results.get("audio") or {})
+
+        # Audio for the user's own examples belongs to the card, everything else to the lexicon
+        overrides = dict(provided)
+        if "example_sentences_en" in provided:
+            for index in (1, 2):
+                overrides[f"audio_url_example{index}"] = generated.pop(f"audio_url_example{index}", None)
+        if fresh:
+            overrides.update(generated)
+        else:
+            # The entry holds the reference on its clips; drop ours where a concurrent build stored one first
+            for field in VocabularyCard.AUDIO_FIELDS:
+                if generated.get(field) and not Lexicon.save_field_if_missing(lexicon_id, field, generated[field]):
+                    AudioAsset.release(generated[field])
+                    generated[field] = Lexicon.get_entry(word).get(field)
+            Lexicon.save_fields(lexicon_id, {k: v for k, v in generated.items() if k not in VocabularyCard.AUDIO_FIELDS})
+
+        values = dict(shared, **generated)
+        values.update(overrides)
+        new_card = VocabularyCard(
+            card_id,
+            user_id,
+            dataset_id,
+            word,
+            values.get("meaning_en"),
+            values.get("meaning_vi"),
+            values.get("ipa_transcription"),
+            values.get("example_sentences_en"),
+            example_sentences_vi,
+            visual_image_url,
+            values.get("audio_url_word"),
+            values.get("audio_url_example1"),
+            values.get("audio_url_example2"),
+            values.get("synonyms") or [],
+            values.get("antonyms") or [],
+            values.get("word_type"),
+            values.get("vocab_family"),
+            lexicon_id=lexicon_id,
+            audio_info=VocabularyCard.describe_audio(values)
+        )
 
-            # Save to database to get the card_id
-            result = current_app.db.vocabulary_cards.insert_one(new_card.__dict__)
-            new_card.card_id = str(result.inserted_id)
+        # The stored document keeps only the card's own fields and overrides
+        document = {
+            k: v for k, v in new_card.__dict__.items()
+            if (k not in Lexicon.SHARED_FIELDS or k in overrides) and k != "audio_info"
+        }
+        document["_id"] = card_object_id
 
-            # Generate audio files with card_id in the filename
-            audio_dir = "audio_files"
-            os.makedirs(audio_dir, exist_ok=True)
+        # Per-step timing breakdown of the enrichment (not persisted)
+        new_card.timings = timings
+        return new_card, document
 
-            # Generate audio for the word
-            audio_url_word = VocabularyCard.generate_speech(
-                new_card.word,
-                os.path.join(audio_dir, f"audio_word_{new_card.card_id}.mp3")
-            )
+    @staticmethod
+    def run_create_card_job(payload):
+        """
+        Job handler for asynchronous card creation. The card id is fixed in the payload, so a retried job
+        never creates the card twice.
+        """
+        payload = dict(payload)
+        card_id = payload["card_id"]
+        with_progress = payload.pop("with_progress", False)
+        if current_app.db.vocabulary_cards.find_one({"card_id": card_id}, {"_id": 1}):
+            return {"card_id": card_id}
+        new_card, document = VocabularyCard.build_card(**payload)
+        progress = UserProgress(new_card.user_id, card_id, new_card.dataset_id).to_dict() if with_progress else None
+        try:
+            VocabularyCard.insert_card(document, progress)
+        except Exception:
+            VocabularyCard.release_audio(document)
+            raise
+        result = {"card_id": card_id, "timings": new_card.timings}
+        if progress:
+            result["progress_id"] = str(progress["_id"])
+        return result
 
-            # Generate audio for the first example sentence
-            audio_url_example1 = VocabularyCard.generate_speech(
-                new_card.example_sentences_en[0],
-                os.path.join(audio_dir, f"audio_example1_{new_card.card_id}.mp3")
-            )
+    @staticmethod
+    def release_audio(document):
+        """
+        Releases the clips stored on a card document, e.g. one that was built but could not be inserted.
+        """
+        for field in VocabularyCard.AUDIO_FIELDS:
+            AudioAsset.release(document.get(field))
 
-            # Generate audio for the second example sentence
-            audio_url_example2 = VocabularyCard.generate_speech(
-                new_card.example_sentences_en[1],
-                os.path.join(audio_dir, f"audio_example2_{new_card.card_id}.mp3")
-            )
+    @staticmethod
+    def move_audio_references(card, update_fields):
+        """
+        Moves the references of `card` from the clips it stores to the ones set by `update_fields`.
+        """
+        for field in VocabularyCard.AUDIO_FIELDS:
+            if field in update_fields and update_fields[field] != card.get(field):
+                AudioAsset.retain(update_fields[field])
+                AudioAsset.release(card.get(field))
 
-            # Update the card with the generated audio URLs
-            new_card.audio_url_word = audio_url_word
-            new_card.audio_url_example1 = audio_url_example1
-            new_card.audio_url_example2 = audio_url_example2
-
-            # Update the card in the database with the new audio URLs
-            current_app.db.vocabulary_cards.update_one(
-                {"_id": result.inserted_id},
-                {"$set": {
-                    "card_id": new_card.card_id,
-                    "audio_url_word": audio_url_word,
-                    "audio_url_example1": audio_url_example1,
-                    "audio_url_example2": audio_url_example2
-                }}
-            )
+    @staticmethod
+    def _release_audio_steps(executor):
+        """
+        Waits for the speech steps of a failed build and releases the clips they acquired.
+        """
+        for name in ("audio",) + VocabularyCard.AUDIO_FIELDS:
+            try:
+                result = executor.result(name)
+            except Exception:  # Not submitted, or failed itself
+                continue
+            for path in result.values() if isinstance(result, dict) else [result]:
+                AudioAsset.release(path)
 
-            return new_card
-        except Exception as e:
-            print(f"Error creating card: {e}")
+    @staticmethod
+    def describe_audio(values):
+        """
+        Duration and size of the clips referenced by the audio fields in `values`.
+        """
+        described = AudioAsset.describe_many([values.get(field) for field in VocabularyCard.AUDIO_FIELDS])
+        return {field: described[values[field]] for field in VocabularyCard.AUDIO_FIELDS if values.get(field) in described}
+
+    @staticmethod
+    def _as_list(value):
+        if isinstance(value, str):
+            return parse_numbered_list(value)
+        return value
+
+    @staticmethod
+    def submit_audio(executor, word, known, provided):
+        """
+        Submits the speech steps for the word and its example sentences. Clips are content-addressed, so a
+        clip that already exists for the same text is reused instead of synthesized again.
+        """
+        if get_tts_backend().batched:
+            # A batched backend speaks the word and both examples in one model call, so wait for the examples
+            needed = {name for name in ("audio_url_word", "audio_url_example1", "audio_url_example2") if name not in known}
+            if "example_sentences_en" in provided:
+                needed.update({"audio_url_example1", "audio_url_example2"})
+            speak = VocabularyCard._batched_speech(word, needed)
+            if "example_sentences_en" in known:
+                if needed:
+                    executor.submit("audio", speak, known["example_sentences_en"], group="tts")
+            else:
+                executor.then("example_sentences_en", "audio", speak, group="tts")
+            return
+
+        # Generate audio for the word straight away
+        if "audio_url_word" not in known:
+            executor.submit("audio_url_word", VocabularyCard.generate_speech, word, group="tts")
+
+        # Generate audio for the example sentences as soon as they exist
+        for index in (1, 2):
+            name = f"audio_url_example{index}"
+            speak = VocabularyCard._example_speech(index - 1)
+            if "example_sentences_en" in provided:
+                executor.submit(name, speak, provided["example_sentences_en"], group="tts")
+            elif "example_sentences_en" in known:
+                if name not in known:
+                    executor.submit(name, speak, known["example_sentences_en"], group="tts")
+            else:
+                executor.then("example_sentences_en", name, speak, group="tts")
+
+    @staticmethod
+    def _batched_speech(word, needed):
+        """
+        Returns a step that speaks the word and the example sentences in one batch and returns
+        a dict of audio field -> clip path for the fields in `needed`.
+        """
+        def speak(example_sentences):
+            texts = {}
+            if "audio_url_word" in needed:
+                texts["audio_url_word"] = word
+            for index, sentence in enumerate((example_sentences or [])[:2], start=1):
+                if f"audio_url_example{index}" in needed:
+                    texts[f"audio_url_example{index}"] = sentence
+            return dict(zip(texts, AudioAsset.acquire_many(list(texts.values()))))
+        return speak
+
+    @staticmethod
+    def _example_speech(index):
+        """
+        Returns a step that speaks the example sentence at `index`, or None if there is no such sentence.
+        """
+        def speak(example_sentences):
+            if example_sentences and len(example_sentences) > index:
+                return VocabularyCard.generate_speech(example_sentences[index])
             return None
+        return speak
 
     # Other methods (get_card_by_id, update_card, delete_card, etc.) remain unchanged
     @staticmethod
-    def get_card_by_id(card_id):
-        return current_app.db.vocabulary_cards.find_one({"card_id": card_id})
+    def get_card_by_id(card_id, fields=None):
+        if get_read_cache() is None:
+            return VocabularyCard.load_card(card_id, fields)
+        # The card document is cached as stored, so every view of it is served from the same entry; shared
+        # fields are resolved on each read since lexicon entries change without their cards being written
+        card = cached("cards", card_id, lambda: current_app.db.vocabulary_cards.find_one({"card_id": card_id}))
+        if card:
+            return VocabularyCard.select_fields(VocabularyCard.resolve_cards([card], fields), fields)[0]
+        return None
+
+    @staticmethod
+    def load_card(card_id, fields=None):
+        """Reads a card from the database, bypassing the read cache."""
+        card = current_app.db.vocabulary_cards.find_one({"card_id": card_id}, VocabularyCard.projection(fields))
+        if card:
+            return VocabularyCard.select_fields(VocabularyCard.resolve_cards([card], fields), fields)[0]
+        return None
 
     @staticmethod
     def update_card(card_id, update_fields):
+        card = current_app.db.vocabulary_cards.find_one({"card_id": card_id}, dict.fromkeys(VocabularyCard.AUDIO_FIELDS, 1))
         update_fields['updated_at'] = datetime.datetime.now()  # Update timestamp on modification
         current_app.db.vocabulary_cards.update_one({"card_id": card_id}, {"$set": update_fields})
+        if card:
+            VocabularyCard.move_audio_references(card, update_fields)
+        invalidate("cards", card_id)
 
     @staticmethod
     def delete_card(card_id):
-        # Delete associated audio files
+        # Release the audio clips stored on the card; a clip is deleted once no other card or lexicon entry uses it
+        card = current_app.db.vocabulary_cards.find_one({"card_id": card_id}, dict.fromkeys(VocabularyCard.AUDIO_FIELDS, 1))
+        if card:
+            VocabularyCard.release_audio(card)
+
+        # Delete per-card audio files of cards created before clips were content-addressed
+        # (possibly re-encoded to Ogg since)
         audio_dir = "audio_files"
-        for filename in [
-            f"audio_word_{card_id}.mp3",
-            f"audio_example1_{card_id}.mp3",
-            f"audio_example2_{card_id}.mp3"
-        ]:
-            file_path = os.path.join(audio_dir, filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        for extension in ["mp3", "ogg"]:
+            for filename in [
+                f"audio_word_{card_id}.{extension}",
+                f"audio_example1_{card_id}.{extension}",
+                f"audio_example2_{card_id}.{extension}"
+            ]:
+                file_path = os.path.join(audio_dir, filename)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
 
         # Delete the card from the database
         current_app.db.vocabulary_cards.delete_one({"card_id": card_id})
+        invalidate("cards", card_id)
 
     @staticmethod
     def get_cards_by_user(user_id):
-        return list(current_app.db.vocabulary_cards.find({"user_id": user_id}))
+        return VocabularyCard.resolve_cards(list(current_app.db.vocabulary_cards.find({"user_id": user_id})))
 
     @staticmethod
     def get_cards_by_dataset(dataset_id):
-        return list(current_app.db.vocabulary_cards.find({"dataset_id": dataset_id}))
+        return VocabularyCard.resolve_cards(list(current_app.db.vocabulary_cards.find({"dataset_id": dataset_id})))
+
+    @staticmethod
+    def get_cards_page(query, limit, after=None, fields=None):
+        """
+        One page of the cards matching `query` (e.g. {"user_id": ...}) and the cursor of the next page.
+        """
+        cards, next_after = find_page(
+            current_app.db.vocabulary_cards, query, limit, after, VocabularyCard.projection(fields)
+        )
+        return VocabularyCard.select_fields(VocabularyCard.resolve_cards(cards, fields), fields), next_after
+
+    @staticmethod
+    def iter_cards(query, fields=None, batch_size=None, after=None, limit=None):
+        """
+        Every card matching `query` (optionally after the card with id `after` and at most `limit`),
+        resolved against the lexicon one batch at a time.
+        """
+        batches = iter_batches(
+            current_app.db.vocabulary_cards, query, VocabularyCard.projection(fields), batch_size, after, limit
+        )
+        for batch in batches:
+            yield VocabularyCard.select_fields(VocabularyCard.resolve_cards(batch, fields), fields)
+
+    @staticmethod
+    def resolve_cards(cards, fields=None):
+        """
+        Fills the shared fields of card documents from the lexicon, and their audio_info from the audio
+        assets, which stay current when clips are re-encoded. With `fields`, only what those need.
+        """
+        if fields is not None and "audio_info" in fields:
+            fields = list(fields) + [field for field in VocabularyCard.AUDIO_FIELDS if field not in fields]
+        cards = Lexicon.resolve_cards(cards, fields)
+        if fields is None or "audio_info" in fields:
+            described = AudioAsset.describe_many(
+                [card.get(field) for card in cards for field in VocabularyCard.AUDIO_FIELDS]
+            )
+            for card in cards:
+                card["audio_info"] = {field: described[card[field]] for field in VocabularyCard.AUDIO_FIELDS
+                                      if card.get(field) in described}
+        return cards
+
+    @staticmethod
+    def requested_fields(view=None, fields=None):
+        """
+        The fields selected by a view name and/or a comma-separated field list (the union of both), or
+        None for every field. Raises ValueError for unknown views or fields.
+        """
+        if view is None and not fields:
+            return None
+        if view is not None and view not in VocabularyCard.VIEWS:
+            raise ValueError(f"Unknown view '{view}', expected one of {sorted(VocabularyCard.VIEWS)}")
+        if view is not None and VocabularyCard.VIEWS[view] is None:
+            return None
+        selected = list(VocabularyCard.VIEWS[view]) if view is not None else []
+        for field in (fields or "").split(","):
+            field = field.strip()
+            if not field or field in selected:
+                continue
+            if field not in VocabularyCard.FIELDS:
+                raise ValueError(f"Unknown field '{field}'")
+            selected.append(field)
+        return selected
+
+    @staticmethod
+    def projection(fields):
+        """
+        MongoDB projection of the card documents needed to answer with `fields`: the card keeps only its
+        overrides of shared fields, so those need its lexicon_id, and paging needs _id.
+        """
+        if fields is None:
+            return None
+        projection = dict.fromkeys(fields, 1)
+        projection["_id"] = 1
+        if "audio_info" in fields:
+            projection.update(dict.fromkeys(VocabularyCard.AUDIO_FIELDS, 1))
+        if any(field in Lexicon.SHARED_FIELDS for field in projection):
+            projection["lexicon_id"] = 1
+        return projection
+
+    @staticmethod
+    def select_fields(cards, fields):
+        """Drops the fields that were only read to resolve or page the cards."""
+        if fields is None:
+            return cards
+        return [{k: v for k, v in card.items() if k in fields} for card in cards]
 
     @staticmethod
     def get_ipa_transcription(word):
-        return ipa.convert(word)
+        return get_ipa_service().convert(word)
 
     @staticmethod
     def get_synonyms_antonyms(word):
-        synonyms = set()
-        antonyms = set()
-        for syn in wordnet.synsets(word):
-            for lemma in syn.lemmas():
-                synonyms.add(lemma.name())
-                if lemma.antonyms():
-                    antonyms.add(lemma.antonyms()[0].name())
-        return list(synonyms), list(antonyms)
-
-    @staticmethod
-    def generate_speech(text, filepath):
-        tts = gTTS(text=text, lang='en')
-        tts.save(filepath)
-        return filepath
\ No newline at end of file
+        """
+        Looks the word up in the precomputed WordNet index, walking WordNet itself only for words the
+        index does not hold. Returns (None, None) if WordNet is not available offline, so nothing is stored
+        for the word and it is looked up again once WordNet is installed.
+        """
+        try:
+            return lookup_synonyms_antonyms(word)
+        except LookupError as e:
+            print(f"WordNet is not available: {e}")
+            return None, None
+
+    @staticmethod
+    def generate_speech(text, language='en'):
+        """
+        Returns the path of the speech clip for `text`, synthesizing it only if it does not exist yet.
+        The caller owns one reference on the clip (see AudioAsset).
+        """
+        return AudioAsset.acquire(text, language)
+
+
+register_handler("create_card", VocabularyCard.run_create_card_job)
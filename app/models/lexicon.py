@@ -0,0 +1,111 @@
+import datetime
+import unicodedata
+from bson import ObjectId
+from pymongo import ReturnDocument
+from flask import current_app
+
+class Lexicon:
+    """
+    Shared, canonical data for a word, keyed by its normalized lemma. Generated fields and media are
+    stored here once and referenced by every card of that word through `lexicon_id`; the card itself
+    only keeps the fields its owner overrode.
+    """
+
+    # Fields that are generated for a word and can be shared between cards
+    SHARED_FIELDS = [
+        "ipa_transcription",
+        "synonyms",
+        "antonyms",
+        "meaning_en",
+        "meaning_vi",
+        "example_sentences_en",
+        "word_type",
+        "vocab_family",
+        "audio_url_word",
+        "audio_url_example1",
+        "audio_url_example2",
+    ]
+
+    @staticmethod
+    def normalize(word):
+        """
+        Normalized lemma used as the lexicon key: Unicode NFC, trimmed, case-folded, single spaces.
+        """
+        return " ".join(unicodedata.normalize("NFC", word).casefold().split())
+
+    @staticmethod
+    def get_entry(word):
+        return current_app.db.lexicon.find_one({"lemma": Lexicon.normalize(word)})
+
+    @staticmethod
+    def get_or_create_entry(word):
+        """
+        Returns the entry for `word`, creating an empty one if needed so its id can name media files
+        before any field has been generated.
+        """
+        now = datetime.datetime.now()
+        return current_app.db.lexicon.find_one_and_update(
+            {"lemma": Lexicon.normalize(word)},
+            {"$setOnInsert": {"word": word.strip(), "created_at": now, "updated_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def save_fields(lexicon_id, fields):
+        """
+        Stores generated fields on the entry identified by the string `lexicon_id`. Only shared fields are written;
+        None and "" (a failed generation) are skipped so the field is generated again for the next card. An empty
+        list is stored: it means the field was generated and nothing was found, e.g. a word without antonyms.
+        """
+        update_fields = {k: v for k, v in fields.items() if k in Lexicon.SHARED_FIELDS and v not in (None, "")}
+        if not update_fields:
+            return
+        update_fields["updated_at"] = datetime.datetime.now()
+        current_app.db.lexicon.update_one({"_id": ObjectId(lexicon_id)}, {"$set": update_fields})
+
+    @staticmethod
+    def save_field_if_missing(lexicon_id, field, value):
+        """
+        Stores `value` unless the entry already has the field, e.g. because a concurrent request stored
+        it first. Returns True if `value` was stored.
+        """
+        result = current_app.db.lexicon.update_one(
+            {"_id": ObjectId(lexicon_id), field: None},
+            {"$set": {field: value, "updated_at": datetime.datetime.now()}}
+        )
+        return result.modified_count == 1
+
+    @staticmethod
+    def shared_fields(entry):
+        """
+        The shared fields already present on an entry.
+        """
+        if not entry:
+            return {}
+        return {field: entry[field] for field in Lexicon.SHARED_FIELDS if entry.get(field) is not None}
+
+    @staticmethod
+    def resolve_cards(cards, fields=None):
+        """
+        Fills the shared fields of card documents from their lexicon entries, using a single query.
+        Fields stored on the card are user overrides and win over the lexicon. With `fields`, only those
+        shared fields are read from the lexicon.
+        """
+        shared = Lexicon.SHARED_FIELDS if fields is None else [f for f in Lexicon.SHARED_FIELDS if f in fields]
+        lexicon_ids = {card["lexicon_id"] for card in cards if card.get("lexicon_id")}
+        if not lexicon_ids or not shared:
+            return cards
+        entries = {
+            str(entry["_id"]): entry
+            for entry in current_app.db.lexicon.find(
+                {"_id": {"$in": [ObjectId(i) for i in lexicon_ids]}},
+                None if fields is None else dict.fromkeys(shared, 1)
+            )
+        }
+        resolved = []
+        for card in cards:
+            merged = Lexicon.shared_fields(entries.get(card.get("lexicon_id")))
+            merged.update({k: v for k, v in card.items() if v is not None or k not in merged})
+            resolved.append(merged)
+        return resolved
@@ -2,7 +2,9 @@
 import hashlib
 from datetime import datetime, timedelta
 import jwt  # Import JWT library
+from bson import ObjectId
 from flask import current_app
+from app.utils.read_cache import cached, invalidate
 
 class User:
     def __init__(self, user_id, username, email, password_hash, created_at, last_login):
@@ -16,13 +18,13 @@ class User:
     @staticmethod
     def create_user(username, email, password):
         password_hash = hashlib.sha256(password.encode()).hexdigest()
-        new_user = User(None, username, email, password_hash, datetime.now(), None)
+        # Generate the id here so the user, with user_id set, is written in a single insert
+        object_id = ObjectId()
+        new_user = User(str(object_id), username, email, password_hash, datetime.now(), None)
+        new_user._id = object_id
 
         # Save to database
         current_app.db.users.insert_one(new_user.__dict__)
-        # Update user_id with the generated ObjectId and convert it to a string
-        new_user.user_id = str(new_user._id)
-        current_app.db.users.update_one({"_id": new_user._id}, {"$set": {"user_id": new_user.user_id}})
 
         return new_user
 
@@ -52,19 +54,23 @@ class User:
 
     @staticmethod
     def get_user_by_id(user_id):
-        return current_app.db.users.find_one({"user_id": user_id})
+        # Read on every /validate-token; served from the read cache
+        return cached("users", user_id, lambda: current_app.db.users.find_one({"user_id": user_id}))
 
     @staticmethod
     def update_user(user_id, update_fields):
         current_app.db.users.update_one({"user_id": user_id}, {"$set": update_fields})
+        invalidate("users", user_id)
 
     @staticmethod
     def delete_user(user_id):
         current_app.db.users.delete_one({"user_id": user_id})
+        invalidate("users", user_id)
 
     @staticmethod
     def set_last_login(user_id):
         current_app.db.users.update_one({"user_id": user_id}, {"$set": {"last_login": datetime.now()}})
+        invalidate("users", user_id)
 
     @staticmethod
     def check_username_exists(username):
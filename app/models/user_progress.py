@@ -1,7 +1,12 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from bson import ObjectId
+from bson.errors import InvalidId
+from flask import current_app
 
 class UserProgress:
+    # Fields read by the dashboard statistics, all held by the user_id_stats index
+    STATS_FIELDS = ["status", "dataset_id", "next_review", "ease_factor", "interval"]
+
     def __init__(self, user_id, card_id, dataset_id, status="new"):
         self.progress_id = ObjectId()
         self.user_id = user_id
@@ -13,6 +18,8 @@ class UserProgress:
         self.streak = 0
         self.ease_factor = 2.5  # Default ease factor for spaced repetition
         self.interval = 1  # Default interval in days
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
 
     def to_dict(self):
         return {
@@ -25,5 +32,81 @@ class UserProgress:
             "next_review": self.next_review,
             "streak": self.streak,
             "ease_factor": self.ease_factor,
-            "interval": self.interval
-        }
\ No newline at end of file
+            "interval": self.interval,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+    @staticmethod
+    def stats_pipeline(user_id, due_before):
+        """
+        Aggregation computing every dashboard statistic of a user in one round trip. The $match and $project
+        are answered from the user_id_stats index alone; each $facet then groups the projected entries.
+        """
+        return [
+            {"$match": {"user_id": user_id}},
+            {"$project": dict({"_id": 0}, **dict.fromkeys(UserProgress.STATS_FIELDS, 1))},
+            {"$facet": {
+                "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}, {"$sort": {"_id": 1}}],
+                # next_review is a datetime, or an ISO 8601 string when set by a client
+                "due": [
+                    {"$match": {"$or": [
+                        {"next_review": {"$lt": due_before}},
+                        {"next_review": {"$lt": due_before.isoformat()}},
+                    ]}},
+                    {"$count": "count"},
+                ],
+                "datasets": [
+                    {"$group": {
+                        "_id": "$dataset_id",
+                        "total": {"$sum": 1},
+                        "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                    }},
+                    {"$sort": {"_id": 1}},
+                ],
+                "averages": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "ease_factor": {"$avg": "$ease_factor"},
+                    "interval": {"$avg": "$interval"},
+                }}],
+            }},
+        ]
+
+    @staticmethod
+    def get_stats(user_id, today=None):
+        """
+        Dashboard statistics of a user: entries per status, entries due for review by the end of `today`
+        (UTC, the current day by default), totals per dataset and the average ease factor and interval.
+        """
+        today = today or datetime.utcnow().date()
+        due_before = datetime.combine(today + timedelta(days=1), time.min)
+        facets = next(current_app.db.user_progress.aggregate(UserProgress.stats_pipeline(user_id, due_before)))
+        averages = facets["averages"][0] if facets["averages"] else {}
+
+        # Names of the datasets, in one query by _id
+        dataset_ids = []
+        for group in facets["datasets"]:
+            try:
+                dataset_ids.append(ObjectId(group["_id"]))
+            except (InvalidId, TypeError):
+                pass
+        names = {str(dataset["_id"]): dataset.get("name")
+                 for dataset in current_app.db.datasets.find({"_id": {"$in": dataset_ids}}, {"name": 1})} \
+            if dataset_ids else {}
+
+        return {
+            "user_id": user_id,
+            "date": today.isoformat(),
+            "total": averages.get("total", 0),
+            "by_status": {group["_id"]: group["count"] for group in facets["by_status"]},
+            "due_today": facets["due"][0]["count"] if facets["due"] else 0,
+            "datasets": [{
+                "dataset_id": group["_id"],
+                "name": names.get(str(group["_id"])),
+                "total": group["total"],
+                "completed": group["completed"],
+            } for group in facets["datasets"]],
+            "average_ease_factor": round(averages["ease_factor"], 3) if averages.get("ease_factor") is not None else None,
+            "average_interval": round(averages["interval"], 3) if averages.get("interval") is not None else None,
+        }
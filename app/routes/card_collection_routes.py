@@ -1,11 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app.utils.decorators import login_required
 from flask import current_app
 from app.models.card_collection import VocabularyCard  # Import the VocabularyCard model
-from bson import json_util
+from app.models.audio_asset import AudioAsset
+from app.models.lexicon import Lexicon
+from app.utils.bulk_import import BulkImport, detect_format, text_lines
+from app.utils.enrichment import EnrichmentExecutor
+from app.utils.ipa import get_ipa_service
+from app.utils.audio_encoding import get_audio_encoder
+from app.utils.tts import get_tts_backend
+from app.utils.pagination import batch_size_param, page_params, stream_listing, wants_ndjson
+from app.utils.read_cache import invalidate
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask_jwt_extended import get_jwt_identity
+import os
+import shutil
+import tempfile
 import base64
 from io import BytesIO
-from gtts import gTTS
 
 # Create a Blueprint for vocabulary cards
 vocab_bp = Blueprint('vocab', __name__)
@@ -19,6 +32,30 @@ def create_card():
     if not data.get('user_id') or not data.get('dataset_id') or not data.get('word'):
         return jsonify({"error": "Missing required fields: user_id, dataset_id, or word"}), 400
 
+    # Opt-in asynchronous mode: queue the enrichment and let the client poll the job
+    if data.get('async') or request.args.get('async', '').lower() == 'true':
+        card_id = str(ObjectId())
+        payload = {
+            "card_id": card_id,
+            "user_id": data['user_id'],
+            "dataset_id": data['dataset_id'],
+            "word": data['word'],
+            "fresh": bool(data.get('fresh', False)),
+            "with_progress": bool(data.get('with_progress', False))
+        }
+        for field in ['meaning_en', 'meaning_vi', 'ipa_transcription', 'example_sentences_en',
+                      'example_sentences_vi', 'visual_image_url', 'word_type', 'vocab_family']:
+            if data.get(field):
+                payload[field] = data[field]
+        job_id = current_app.job_queue.enqueue('create_card', payload)
+        status_url = f"/jobs/{job_id}"
+        return jsonify({
+            "job_id": job_id,
+            "card_id": card_id,
+            "status": "queued",
+            "status_url": status_url
+        }), 202, {"Location": status_url}
+
     try:
         # Create the new vocabulary card
         new_card = VocabularyCard.create_card(
@@ -32,7 +69,9 @@ def create_card():
             example_sentences_vi=data.get('example_sentences_vi', []),  # Optional field
             visual_image_url=data.get('visual_image_url', ''),  # Optional field
             word_type=data.get('word_type'),  # Optional field
-            vocab_family=data.get('vocab_family', [])  # Optional field
+            vocab_family=data.get('vocab_family', []),  # Optional field
+            fresh=bool(data.get('fresh', False)),  # Regenerate instead of reusing cached LLM answers
+            with_progress=bool(data.get('with_progress', False))  # Also create the card's user_progress entry
         )
 
         if not new_card:
@@ -57,8 +96,11 @@ def create_card():
             "antonyms": new_card.antonyms,
             "word_type": new_card.word_type,
             "vocab_family": new_card.vocab_family,
+            "lexicon_id": new_card.lexicon_id,
             "created_at": new_card.created_at,
-            "updated_at": new_card.updated_at
+            "updated_at": new_card.updated_at,
+            "progress_id": new_card.progress_id,
+            "timings": getattr(new_card, 'timings', None)  # Per-step enrichment timings in seconds
         }), 201
 
     except Exception as e:
@@ -68,9 +110,13 @@ def create_card():
 @vocab_bp.route('/cards/<card_id>', methods=['GET'])
 @login_required
 def get_card(card_id):
-    card = VocabularyCard.get_card_by_id(card_id)
+    try:
+        fields = VocabularyCard.requested_fields(request.args.get('view'), request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    card = VocabularyCard.get_card_by_id(card_id, fields)
     if card:
-        return json_util.dumps(card), 200
+        return jsonify(card), 200
     return jsonify({"error": "Card not found"}), 404
 
 @vocab_bp.route('/cards/<card_id>', methods=['PUT'])
@@ -89,6 +135,9 @@ def update_card(card_id):
 
     # Update the card in the database
     result = current_app.db.vocabulary_cards.update_one({"card_id": card_id}, {"$set": update_fields})
+    if result.modified_count:
+        VocabularyCard.move_audio_references(existing_card, update_fields)
+    invalidate("cards", card_id)
 
     if result.modified_count == 0:
         return jsonify({"error": "No changes made to the card"}), 400  # Return 400 if no changes were made
@@ -104,14 +153,112 @@ def delete_card(card_id):
 @vocab_bp.route('/users/<user_id>/cards', methods=['GET'])
 @login_required
 def get_user_cards(user_id):
-    cards = VocabularyCard.get_cards_by_user(user_id)
-    return jsonify(cards), 200
+    return _list_cards({"user_id": user_id})
 
 @vocab_bp.route('/datasets/<dataset_id>/cards', methods=['GET'])
 @login_required
 def get_dataset_cards(dataset_id):
-    cards = VocabularyCard.get_cards_by_dataset(dataset_id)
-    return jsonify(cards), 200
+    return _list_cards({"dataset_id": dataset_id})
+
+def _list_cards(query):
+    """
+    With `limit` and/or `after`, returns one page: {"items": [...], "next_after": cursor or null}; pass
+    `next_after` as `after` to get the next page. Without them, streams every card as a JSON array.
+    With `Accept: application/x-ndjson`, streams one card per line, starting after `after` and stopping
+    after `limit` cards if given. `view` (summary, study or full) and/or `fields` (comma-separated)
+    restrict the fields of each card; `batch_size` sets how many cards are read at a time when streaming.
+    """
+    try:
+        page = page_params(request.args)
+        fields = VocabularyCard.requested_fields(request.args.get('view'), request.args.get('fields'))
+        batch_size = batch_size_param(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ndjson = wants_ndjson(request.accept_mimetypes)
+    if page is None or ndjson:
+        # Sent batch by batch straight from the cursor, so a large collection is never held in memory
+        limit, after = page or (None, None)
+        limit = limit if 'limit' in request.args else None
+        cards = VocabularyCard.iter_cards(query, fields, batch_size, after, limit)
+        return stream_listing(cards, current_app.json.dumps, ndjson)
+    cards, next_after = VocabularyCard.get_cards_page(query, *page, fields=fields)
+    return jsonify({"items": cards, "next_after": next_after}), 200
+
+@vocab_bp.route('/datasets/<dataset_id>/cards/bulk', methods=['POST'])
+@login_required
+def bulk_import_cards(dataset_id):
+    """
+    Imports many words into a dataset from a CSV, JSONL or plain word list upload, sent either as the
+    raw request body or as a multipart "file" field. Progress and per-row errors are streamed back as
+    NDJSON events while the import runs.
+    """
+    try:
+        dataset = current_app.db.datasets.find_one({"_id": ObjectId(dataset_id)})
+    except InvalidId:
+        return jsonify({"error": "Invalid dataset id"}), 400
+    if not dataset:
+        return jsonify({"error": "Dataset not found"}), 404
+    # Cards are created for the dataset's owner, so only the owner may import into it
+    if str(dataset['user_id']) != str(get_jwt_identity()):
+        return jsonify({"error": "Forbidden"}), 403
+
+    # Only touch request.files for multipart uploads, otherwise read the raw body as a stream
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    if request.mimetype == 'multipart/form-data' and not upload:
+        return jsonify({"error": "Missing upload field: file"}), 400
+    try:
+        fmt = detect_format(
+            request.args.get('format'),
+            upload.content_type if upload else request.content_type,
+            upload.filename if upload else None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if upload:
+        # Werkzeug closes uploaded files when the view returns, before the response is streamed,
+        # so the upload is copied in chunks to a temporary file that the import owns
+        stream = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, stream)
+        stream.seek(0)
+    else:
+        stream = request.stream
+
+    user_id = dataset['user_id']
+    fresh = request.args.get('fresh', '').lower() == 'true'
+
+    def enrich(row):
+        fields = dict(row)
+        word = fields.pop('word')
+        new_card, document = VocabularyCard.build_card(user_id, dataset_id, word, fresh=fresh, **fields)
+        return document
+
+    # Words already in the dataset are reported as duplicates instead of being imported twice
+    existing_words = (
+        Lexicon.normalize(card['word'])
+        for card in current_app.db.vocabulary_cards.find({"dataset_id": dataset_id}, {"word": 1, "_id": 0})
+    )
+    # Transcribe each chunk's words in one dictionary query; build_card then finds them cached
+    def prefetch(rows):
+        get_ipa_service().convert_many([row['word'] for row in rows if not row.get('ipa_transcription')])
+
+    importer = BulkImport.from_config(current_app.db.vocabulary_cards, enrich, Lexicon.normalize, existing_words,
+                                      prefetch=prefetch, discard=VocabularyCard.release_audio)
+
+    def generate_events():
+        try:
+            for event in importer.run(text_lines(stream), fmt):
+                yield current_app.json.dumps(event) + "\n"
+        finally:
+            if upload:
+                stream.close()
+
+    return Response(stream_with_context(generate_events()), mimetype='application/x-ndjson'), 200
+
+# Media types of the streaming variants of /cards/generate, selected through the Accept header or ?stream=
+STREAM_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
 
 @vocab_bp.route('/cards/generate', methods=['POST'])
 @login_required
@@ -122,31 +269,62 @@ def generate_fields():
     if not word:
         return jsonify({"error": "Word is required"}), 400
 
-    # Generate IPA transcription
-    ipa_transcription = VocabularyCard.get_ipa_transcription(word)
+    fresh = bool(data.get('fresh', False))
 
-    # Generate synonyms and antonyms
-    synonyms, antonyms = VocabularyCard.get_synonyms_antonyms(word)
+    # Start from what the shared lexicon entry already knows about this word
+    entry = Lexicon.get_or_create_entry(word)
+    shared = {} if fresh else Lexicon.shared_fields(entry)
 
-    # Generate example sentences
-    example_sentences_en = VocabularyCard.get_example_sentences(word)
+    stream = request.args.get('stream', '').lower()
+    if stream not in STREAM_MIMETYPES:
+        best = request.accept_mimetypes.best_match(["application/json"] + list(STREAM_MIMETYPES.values()))
+        stream = next((name for name, mimetype in STREAM_MIMETYPES.items() if mimetype == best), None)
+    if stream:
+        events = _generate_field_events(word, entry, shared, fresh)
+        encode = _encode_sse if stream == "sse" else _encode_ndjson
+        response = Response(stream_with_context(encode(event) for event in events), mimetype=STREAM_MIMETYPES[stream])
+        # Ask proxies not to buffer, so every event reaches the client when it is sent
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response, 200
 
-    # Generate English meaning
-    meaning_en = VocabularyCard.get_meaning_en(word)
+    # Generate the missing fields concurrently
+    with EnrichmentExecutor.from_config() as executor:
+        _submit_generation(executor, word, shared, fresh)
+        results = executor.results()
 
-    # Generate Vietnamese meaning
-    meaning_vi = VocabularyCard.get_meaning_vi(word)
+    generated = {k: v for k, v in results.items() if k in Lexicon.SHARED_FIELDS}
+    if "synonyms_antonyms" in results:
+        generated["synonyms"], generated["antonyms"] = results["synonyms_antonyms"]
+    if not fresh:
+        Lexicon.save_fields(str(entry["_id"]), generated)
+    fields = dict(shared, **generated)
 
-    # Generate word type
-    word_type = VocabularyCard.get_word_type(word)
+    ipa_transcription = fields.get("ipa_transcription")
+    synonyms, antonyms = fields.get("synonyms") or [], fields.get("antonyms") or []
+    example_sentences_en = fields.get("example_sentences_en")
+    meaning_en = fields.get("meaning_en")
+    meaning_vi = fields.get("meaning_vi")
+    word_type = fields.get("word_type")
+    vocab_family = fields.get("vocab_family")
 
-    # Generate vocabulary family
-    vocab_family = VocabularyCard.get_vocab_family(word)
-
-    # Generate audio for the word
-    tts = gTTS(text=word, lang='en')
+    # Reuse the word audio of the lexicon entry, or generate it
     audio_buffer = BytesIO()
-    tts.write_to_fp(audio_buffer)
+    if shared.get("audio_url_word") and os.path.exists(shared["audio_url_word"]):
+        with open(shared["audio_url_word"], 'rb') as audio_file:
+            audio_buffer.write(audio_file.read())
+    else:
+        backend = get_tts_backend()
+        encoder = get_audio_encoder()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, f"word.{backend.extension}")
+            backend.synthesize(word, 'en', tmp_path)
+            if encoder:
+                encoded_path = os.path.join(tmp_dir, f"word_encoded.{encoder.extension}")
+                encoder.encode(tmp_path, encoded_path)
+                tmp_path = encoded_path
+            with open(tmp_path, 'rb') as audio_file:
+                audio_buffer.write(audio_file.read())
     audio_buffer.seek(0)
 
     # Convert audio to base64
@@ -163,4 +341,76 @@ def generate_fields():
         "word_type": word_type,  # New field: word type
         "vocab_family": vocab_family,  # New field: vocabulary family
         "audio_base64": audio_base64  # New field: base64-encoded audio
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+def _submit_generation(executor, word, shared, fresh):
+    if "ipa_transcription" not in shared:
+        executor.submit("ipa_transcription", VocabularyCard.get_ipa_transcription, word)
+    if "synonyms" not in shared or "antonyms" not in shared:
+        executor.submit("synonyms_antonyms", VocabularyCard.get_synonyms_antonyms, word)
+    VocabularyCard.submit_text_fields(executor, word, shared, fresh=fresh)
+
+def _generate_field_events(word, entry, shared, fresh):
+    """
+    Yields a "field" event for every field of `word` as soon as it is known: fields of the lexicon entry
+    at once, then generated fields as their steps finish. The word audio is sent as a media URL.
+    Ends with a "done" event carrying the timing breakdown.
+    """
+    lexicon_id = str(entry["_id"])
+    for field, value in shared.items():
+        if not field.startswith("audio_url"):
+            yield {"event": "field", "field": field, "value": value}
+
+    # The word audio depends only on the word, so the entry's clip is reused even when `fresh` is set
+    word_audio = entry.get("audio_url_word")
+    if word_audio:
+        yield {"event": "field", "field": "audio_url", "value": AudioAsset.media_url(word_audio)}
+
+    generated = {}
+    with EnrichmentExecutor.from_config() as executor:
+        _submit_generation(executor, word, shared, fresh)
+        if not word_audio:
+            executor.submit("audio_url_word", VocabularyCard.generate_speech, word, group="tts")
+
+        for name, result, error in executor.as_completed():
+            if name == "synonyms_antonyms":
+                fields = ["synonyms", "antonyms"]
+            elif name == "audio_url_word":
+                fields = ["audio_url"]
+            elif name in Lexicon.SHARED_FIELDS:
+                fields = [name]
+            else:
+                continue  # Intermediate step, e.g. the combined LLM request
+
+            if error is not None:
+                for field in fields:
+                    yield {"event": "error", "field": field, "error": str(error)}
+                continue
+
+            if name == "synonyms_antonyms":
+                values = dict(zip(fields, result))
+            elif name == "audio_url_word":
+                # The entry holds the reference on the clip; drop ours if another request stored one first
+                if not Lexicon.save_field_if_missing(lexicon_id, "audio_url_word", result):
+                    AudioAsset.release(result)
+                    result = Lexicon.get_entry(word).get("audio_url_word")
+                values = {"audio_url": AudioAsset.media_url(result)}
+            else:
+                values = {name: result}
+
+            for field, value in values.items():
+                yield {"event": "field", "field": field, "value": value}
+            if name != "audio_url_word":
+                generated.update(values)
+        timings = executor.timing_breakdown()
+
+    if not fresh:
+        Lexicon.save_fields(lexicon_id, generated)
+    yield {"event": "done", "timings": timings}
+
+def _encode_ndjson(event):
+    return current_app.json.dumps(event) + "\n"
+
+def _encode_sse(event):
+    return f"event: {event['event']}\ndata: {current_app.json.dumps(event)}\n\n"
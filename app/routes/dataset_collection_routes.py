@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app  # Import current_app
 from bson import ObjectId
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 from app.utils.decorators import login_required
+from app.utils.pagination import batch_size_param, iter_batches, stream_listing, wants_ndjson
 
 dataset_bp = Blueprint('dataset', __name__)
 
@@ -24,7 +26,11 @@ def create_dataset():
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
-    result = current_app.db.datasets.insert_one(dataset)  # Use current_app
+    try:
+        result = current_app.db.datasets.insert_one(dataset)  # Use current_app
+    except DuplicateKeyError:
+        # Created concurrently; the unique (user_id, name) index keeps a single dataset
+        return jsonify({'message': 'Dataset name already exists for this user'}), 400
     return jsonify({'message': 'Dataset created successfully', 'dataset_id': str(result.inserted_id)}), 201
 
 @dataset_bp.route('/datasets/<dataset_id>', methods=['GET'])
@@ -49,6 +55,16 @@ def get_all_datasets():
     if not user_id:
         return jsonify({'message': 'user_id is required'}), 400
 
+    if wants_ndjson(request.accept_mimetypes):
+        # One dataset per line, streamed straight from the cursor
+        try:
+            batch_size = batch_size_param(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        batches = iter_batches(current_app.db.datasets, {"user_id": user_id}, batch_size=batch_size)
+        return stream_listing(([dict(d, _id=str(d['_id'])) for d in batch] for batch in batches),
+                              current_app.json.dumps, ndjson=True)
+
     datasets = list(current_app.db.datasets.find({"user_id": user_id}))  # Fetch datasets for the user
     for dataset in datasets:
         dataset['_id'] = str(dataset['_id'])  # Convert ObjectId to string
@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+from app.databases.db import pool_stats
+from app.utils.read_cache import get_read_cache
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/health', methods=['GET'])
+def health():
+    # Connection pool usage per environment/tenant; an "in_use" close to "max_pool_size" means requests queue for connections
+    read_cache = get_read_cache()
+    return jsonify({
+        'status': 'ok',
+        'database_pools': pool_stats(),
+        # Hit ratio of the card/user/settings cache; "max_served_age" is the oldest answer it gave, in seconds
+        'read_cache': read_cache.stats() if read_cache else None
+    }), 200
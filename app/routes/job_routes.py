@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify, current_app
+from app.utils.decorators import login_required
+
+job_bp = Blueprint('jobs', __name__)
+
+@job_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    job = current_app.job_queue.get(job_id)
+    if job:
+        return jsonify({
+            'job_id': job['job_id'],
+            'type': job['type'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'max_attempts': job['max_attempts'],
+            'result': job.get('result'),
+            'error': job.get('error'),
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at']
+        }), 200
+    return jsonify({'message': 'Job not found'}), 404
@@ -0,0 +1,42 @@
+import os
+from flask import Blueprint, jsonify, send_file
+from app.models.audio_asset import AudioAsset, ASSET_ID_PATTERN
+
+media_bp = Blueprint('media', __name__)
+
+# A clip id always names the same speech, but its bytes change when the clip is re-encoded or synthesized
+# again, so clients keep it for a short while and then revalidate with If-None-Match (a cheap 304)
+CACHE_MAX_AGE = 3600
+
+AUDIO_MIMETYPES = {
+    ".ogg": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+}
+
+@media_bp.route('/media/audio/<asset_id>', methods=['GET'])
+def get_audio(asset_id):
+    if not ASSET_ID_PATTERN.fullmatch(asset_id):
+        return jsonify({'message': 'Audio not found'}), 404
+    asset = AudioAsset.get_asset(asset_id)
+    if not asset:
+        return jsonify({'message': 'Audio not found'}), 404
+    try:
+        stat = os.stat(asset['path'])
+    except FileNotFoundError:
+        return jsonify({'message': 'Audio not found'}), 404
+
+    extension = os.path.splitext(asset['path'])[1]
+    # send_file answers Range and If-None-Match/If-Range requests (206/304) and hands the file to the
+    # WSGI server's file wrapper (sendfile) or, with USE_X_SENDFILE, to the front-end web server.
+    # The id is a hash of the text, not of the bytes: a clip synthesized again or re-encoded keeps its id,
+    # so the strong ETag comes from the file itself (files are replaced atomically, never written in place).
+    response = send_file(
+        os.path.abspath(asset['path']),
+        mimetype=AUDIO_MIMETYPES.get(extension, 'application/octet-stream'),
+        conditional=True,
+        etag=f"{asset_id}-{stat.st_size:x}-{stat.st_mtime_ns:x}",
+        max_age=CACHE_MAX_AGE
+    )
+    response.cache_control.public = True
+    return response
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app  # Import current_app
 from bson import ObjectId
-from datetime import datetime
+from datetime import date, datetime
+from app.models.user_progress import UserProgress
 from app.utils.decorators import login_required
+from app.utils.pagination import batch_size_param, page_params, find_page, iter_batches, stream_listing, wants_ndjson
 
 progress_bp = Blueprint('progress', __name__)
 
@@ -90,21 +92,48 @@ def delete_progress(progress_id):
 @progress_bp.route('/api/progress/user/<user_id>', methods=['GET'])
 @login_required
 def get_progress_by_user(user_id):
-    progress_entries = current_app.db.user_progress.find({"user_id": user_id})  # Fetch all progress entries for the user
-    progress_list = []
-    for progress in progress_entries:
-        progress_list.append({
-            'progress_id': str(progress['_id']),
-            'user_id': str(progress['user_id']),
-            'card_id': str(progress['card_id']),
-            'dataset_id': str(progress['dataset_id']),
-            'status': progress['status'],
-            'last_reviewed': progress.get('last_reviewed'),
-            'next_review': progress.get('next_review'),
-            'streak': progress['streak'],
-            'ease_factor': progress['ease_factor'],
-            'interval': progress['interval'],
-            'created_at': progress['created_at'],
-            'updated_at': progress['updated_at']
-        })
-    return jsonify(progress_list), 200
\ No newline at end of file
+    # With `limit` and/or `after`, one page: {"items": [...], "next_after": cursor or null}; without them,
+    # every progress entry of the user as a JSON array, streamed batch by batch. `Accept: application/x-ndjson`
+    # streams one entry per line instead (see _list_cards in card_collection_routes.py)
+    try:
+        page = page_params(request.args)
+        batch_size = batch_size_param(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = {"user_id": user_id}
+    ndjson = wants_ndjson(request.accept_mimetypes)
+    if page is None or ndjson:
+        limit, after = page or (None, None)
+        limit = limit if 'limit' in request.args else None
+        batches = iter_batches(current_app.db.user_progress, query, batch_size=batch_size, after=after, limit=limit)
+        progress_batches = ([_progress_to_dict(p) for p in batch] for batch in batches)
+        return stream_listing(progress_batches, current_app.json.dumps, ndjson)
+    progress_entries, next_after = find_page(current_app.db.user_progress, query, *page)
+    return jsonify({'items': [_progress_to_dict(p) for p in progress_entries], 'next_after': next_after}), 200
+
+@progress_bp.route('/api/stats/<user_id>', methods=['GET'])
+@login_required
+def get_stats(user_id):
+    # Dashboard statistics computed by one aggregation, instead of the whole progress listing;
+    # `date` (YYYY-MM-DD) sets the day whose end "due_today" counts up to, today (UTC) by default
+    try:
+        today = date.fromisoformat(request.args['date']) if request.args.get('date') else None
+    except ValueError:
+        return jsonify({'error': 'date must be formatted as YYYY-MM-DD'}), 400
+    return jsonify(UserProgress.get_stats(user_id, today)), 200
+
+def _progress_to_dict(progress):
+    return {
+        'progress_id': str(progress['_id']),
+        'user_id': str(progress['user_id']),
+        'card_id': str(progress['card_id']),
+        'dataset_id': str(progress['dataset_id']),
+        'status': progress['status'],
+        'last_reviewed': progress.get('last_reviewed'),
+        'next_review': progress.get('next_review'),
+        'streak': progress['streak'],
+        'ease_factor': progress['ease_factor'],
+        'interval': progress['interval'],
+        'created_at': progress['created_at'],
+        'updated_at': progress['updated_at']
+    }
\ No newline at end of file
@@ -6,6 +6,7 @@ from app.models.user import User
 import hashlib
 from app.utils.decorators import login_required
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from pymongo.errors import DuplicateKeyError
 
 user_bp = Blueprint('user', __name__)
 
@@ -18,7 +19,11 @@ def register():
     if User.check_email_exists(data['email']):
         return jsonify({'message': 'Email already exists'}), 400
 
-    user = User.create_user(data['username'], data['email'], data['password'])
+    try:
+        user = User.create_user(data['username'], data['email'], data['password'])
+    except DuplicateKeyError:
+        # Registered concurrently; the unique indexes on username and email keep a single account
+        return jsonify({'message': 'Username or email already exists'}), 400
     return jsonify({'message': 'User created successfully'}), 201
 
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app  # Import current_app
 from bson import ObjectId
 from app.utils.decorators import login_required
+from app.utils.read_cache import cached, invalidate
 
 settings_bp = Blueprint('settings', __name__)
 
@@ -24,12 +25,13 @@ def create_settings():
         "theme": theme
     }
     result = current_app.db.settings.insert_one(settings)  # Use current_app
+    invalidate("settings", user_id)
     return jsonify({'message': 'Settings created successfully', 'settings_id': str(result.inserted_id)}), 201
 
 @settings_bp.route('/settings/<user_id>', methods=['GET'])
 @login_required
 def get_settings(user_id):
-    settings = current_app.db.settings.find_one({"user_id": user_id})  # Use current_app
+    settings = cached("settings", user_id, lambda: current_app.db.settings.find_one({"user_id": user_id}))
     if settings:
         return jsonify({
             'settings_id': str(settings['_id']),
@@ -63,6 +65,7 @@ def update_settings(user_id):
         {"user_id": user_id},
         {"$set": update_fields}
     )
+    invalidate("settings", user_id)
     if result.matched_count > 0:
         return jsonify({'message': 'Settings updated successfully'}), 200
     return jsonify({'message': 'Settings not found'}), 404
@@ -71,6 +74,7 @@ def update_settings(user_id):
 @login_required
 def delete_settings(user_id):
     result = current_app.db.settings.delete_one({"user_id": user_id})  # Use current_app
+    invalidate("settings", user_id)
     if result.deleted_count > 0:
         return jsonify({'message': 'Settings deleted successfully'}), 200
     return jsonify({'message': 'Settings not found'}), 404
\ No newline at end of file
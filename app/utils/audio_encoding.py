@@ -0,0 +1,144 @@
+import os
+import threading
+from flask import current_app, has_app_context
+
+# Defaults, overridable through the "audio_encoding" section of config.json
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "format": "opus",  # "opus" (in an OGG container) or "mp3"; falls back to mp3 if Opus is unavailable
+    "bitrate": 24000,  # Target bits per second; speech stays clear well below music bitrates
+    "sample_rate": 24000,
+    "trim_silence": True,
+    "top_db": 40,  # Leading/trailing audio quieter than this many dB below the peak counts as silence
+}
+
+FORMATS = {
+    "opus": {"extension": "ogg", "container": "OGG", "subtype": "OPUS"},
+    "mp3": {"extension": "mp3", "container": "MP3", "subtype": "MPEG_LAYER_III"},
+}
+
+# Opus only encodes at these sample rates
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class AudioEncoder:
+    """
+    Re-encodes speech clips to compact mono files: decodes whatever the TTS engine produced, trims
+    leading and trailing silence and writes low-bitrate Opus (or MP3 where libsndfile has no Opus).
+    """
+
+    def __init__(self, format=DEFAULT_CONFIG["format"], bitrate=DEFAULT_CONFIG["bitrate"],
+                 sample_rate=DEFAULT_CONFIG["sample_rate"], trim_silence=DEFAULT_CONFIG["trim_silence"],
+                 top_db=DEFAULT_CONFIG["top_db"]):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown audio format '{format}', expected one of {sorted(FORMATS)}")
+        self.format = AudioEncoder._supported_format(format)
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+        if self.format == "opus":
+            self.sample_rate = min((rate for rate in OPUS_SAMPLE_RATES if rate >= sample_rate), default=48000)
+        self.trim_silence = trim_silence
+        self.top_db = top_db
+
+    @classmethod
+    def from_config(cls, config=None):
+        """
+        Build an encoder from the "audio_encoding" section of the app configuration, or None if encoding
+        is disabled or no target format is available.
+        """
+        if config is None:
+            config = current_app.config.get("audio_encoding", {}) if has_app_context() else {}
+        config = dict(DEFAULT_CONFIG, **config)
+        if not config.pop("enabled"):
+            return None
+        encoder = cls(**config)
+        return encoder if encoder.format else None
+
+    @property
+    def extension(self):
+        return FORMATS[self.format]["extension"]
+
+    def settings(self):
+        """Constructor arguments, e.g. to rebuild the encoder in another process."""
+        return {"format": self.format, "bitrate": self.bitrate, "sample_rate": self.sample_rate,
+                "trim_silence": self.trim_silence, "top_db": self.top_db}
+
+    @staticmethod
+    def _supported_format(format):
+        import soundfile
+        for candidate in (format, "mp3"):
+            spec = FORMATS[candidate]
+            try:
+                if spec["subtype"] in soundfile.available_subtypes(spec["container"]):
+                    return candidate
+            except Exception:
+                continue
+        return None
+
+    def _compression_level(self):
+        # libsndfile takes a compression level in [0, 1] and maps it linearly onto each codec's bitrate range
+        if self.format == "opus":
+            highest, lowest = 256000, 6000
+        elif self.sample_rate >= 32000:
+            highest, lowest = 320000, 32000
+        else:
+            highest, lowest = 160000, 8000
+        return min(max((highest - self.bitrate) / (highest - lowest), 0.0), 1.0)
+
+    def encode(self, source_path, target_path):
+        """
+        Encodes the clip at `source_path` into `target_path` and returns its duration in seconds, size in
+        bytes and format.
+        """
+        import librosa
+        import soundfile
+
+        samples, _ = librosa.load(source_path, sr=self.sample_rate, mono=True)
+        if self.trim_silence and len(samples):
+            samples, _ = librosa.effects.trim(samples, top_db=self.top_db)
+
+        spec = FORMATS[self.format]
+        # The format is given explicitly, so the target can have any name (e.g. a temporary one)
+        soundfile.write(
+            target_path, samples, self.sample_rate, format=spec["container"], subtype=spec["subtype"],
+            compression_level=self._compression_level(),
+            bitrate_mode="CONSTANT" if self.format == "mp3" else None
+        )
+        return {
+            "duration": round(len(samples) / self.sample_rate, 3),
+            "size": os.path.getsize(target_path),
+            "format": self.format,
+        }
+
+
+def describe_audio(path):
+    """
+    Duration, size and format of a clip that was stored without re-encoding.
+    """
+    info = {"duration": None, "size": os.path.getsize(path), "format": os.path.splitext(path)[1].lstrip(".")}
+    try:
+        import soundfile
+        info["duration"] = round(soundfile.info(path).duration, 3)
+    except Exception:
+        pass
+    return info
+
+
+# Shared encoder, created on first use from the "audio_encoding" section of the app configuration
+_encoder = None
+_encoder_config = None
+_encoder_lock = threading.Lock()
+
+
+def get_audio_encoder():
+    """Get the configured audio encoder, or None if clips are stored as the TTS engine produced them."""
+    global _encoder, _encoder_config
+    config = current_app.config.get("audio_encoding", {}) if has_app_context() else {}
+    with _encoder_lock:
+        if _encoder_config is None or config != _encoder_config:
+            _encoder = AudioEncoder.from_config(config)
+            _encoder_config = dict(config)
+    return _encoder
+
+
+__all__ = ['AudioEncoder', 'describe_audio', 'get_audio_encoder', 'FORMATS']
@@ -0,0 +1,251 @@
+import io
+import csv
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+# Defaults, overridable through the "bulk_import" section of config.json
+DEFAULT_CONCURRENCY = 4  # Words enriched at the same time
+DEFAULT_CHUNK_SIZE = 100  # Cards per insert_many
+DEFAULT_PROGRESS_EVERY = 25  # Processed rows between progress events
+
+# Card fields a row may provide besides the word
+ROW_FIELDS = [
+    "meaning_en", "meaning_vi", "ipa_transcription", "example_sentences_en", "example_sentences_vi",
+    "visual_image_url", "word_type", "vocab_family",
+]
+
+FORMATS = {"csv", "jsonl", "words"}
+
+
+class ImportRowError(Exception):
+    """Raised for a row that cannot be imported; the import carries on with the next row."""
+
+    def __init__(self, message, word=None):
+        super().__init__(message)
+        self.word = word
+
+
+def detect_format(requested=None, content_type=None, filename=None):
+    """
+    Picks the upload format from an explicit `format`, the file extension or the content type.
+    Plain word lists are the default.
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unsupported format '{requested}', expected one of {sorted(FORMATS)}")
+        return requested
+    filename = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if filename.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if filename.endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return "words"
+
+
+def text_lines(stream, encoding="utf-8"):
+    """
+    Decodes a binary upload stream line by line without reading it all into memory.
+    """
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline="")
+
+
+def parse_rows(lines, fmt):
+    """
+    Yields (line_number, row) pairs, where row is a dict with at least "word", or an ImportRowError.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ImportRowError(f"Invalid JSON: {e.msg}")
+                continue
+            if isinstance(row, str):
+                row = {"word": row}
+            if not isinstance(row, dict):
+                yield line_number, ImportRowError("Expected a JSON object or string")
+                continue
+            yield line_number, row
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            word = line.strip()
+            if word and not word.startswith("#"):
+                yield line_number, {"word": word}
+
+
+def normalize_rows(rows):
+    """
+    Trims the word, keeps only known card fields and turns rows without a word into errors.
+    """
+    for line_number, row in rows:
+        if isinstance(row, Exception):
+            yield line_number, row
+            continue
+        word = row.get("word")
+        if not isinstance(word, str) or not word.strip():
+            yield line_number, ImportRowError("Missing word")
+            continue
+        fields = {k: row[k] for k in ROW_FIELDS if row.get(k)}
+        fields["word"] = " ".join(word.split())
+        yield line_number, fields
+
+
+def dedupe_rows(rows, key, seen=None):
+    """
+    Drops rows whose `key(word)` was already seen in this upload or is in `seen` (e.g. the dataset).
+    Only keys are remembered, never rows.
+    """
+    seen = set(seen or ())
+    for line_number, row in rows:
+        if isinstance(row, Exception):
+            yield line_number, row
+            continue
+        row_key = key(row["word"])
+        if row_key in seen:
+            yield line_number, ImportRowError(f"Duplicate word '{row['word']}'", word=row["word"])
+            continue
+        seen.add(row_key)
+        yield line_number, row
+
+
+def prefetch_rows(rows, prefetch, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calls `prefetch(rows)` once per chunk of valid rows before passing them on, so per-row enrichment
+    can be served from work done for the whole chunk (e.g. one dictionary query for all its words).
+    """
+    chunk = []
+    for line_number, row in rows:
+        chunk.append((line_number, row))
+        if len(chunk) >= chunk_size:
+            prefetch([row for _, row in chunk if not isinstance(row, Exception)])
+            yield from chunk
+            chunk = []
+    if chunk:
+        prefetch([row for _, row in chunk if not isinstance(row, Exception)])
+        yield from chunk
+
+
+def enrich_rows(rows, enrich, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Runs `enrich(row)` for each row on a pool of `concurrency` threads, yielding
+    (line_number, row, result_or_exception) in input order. At most 2 * concurrency rows are in flight,
+    so memory stays bounded however long the upload is.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def run(row):
+        if app is not None:
+            with app.app_context():
+                return enrich(row)
+        return enrich(row)
+
+    def finish(entry):
+        line_number, row, future = entry
+        if future is None:
+            return line_number, None, row  # `row` is the ImportRowError raised upstream
+        try:
+            return line_number, row, future.result()
+        except Exception as e:
+            return line_number, row, e
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-import") as pool:
+        pending = deque()
+        for line_number, row in rows:
+            if isinstance(row, Exception):
+                # Keep errors in order with the enriched rows around them
+                pending.append((line_number, row, None))
+            else:
+                pending.append((line_number, row, pool.submit(run, row)))
+            while len(pending) >= 2 * concurrency:
+                yield finish(pending.popleft())
+        while pending:
+            yield finish(pending.popleft())
+
+
+class BulkImport:
+    """
+    Streams an upload into a dataset: parse -> normalize -> dedupe -> enrich (bounded concurrency)
+    -> insert_many in chunks. `run` is a generator of progress events, so callers can stream them
+    back to the client while the import is running. `discard` is called with every enriched document
+    that could not be inserted, e.g. to release what enriching it acquired.
+    """
+
+    def __init__(self, collection, enrich, key, existing_keys=(), concurrency=DEFAULT_CONCURRENCY,
+                 chunk_size=DEFAULT_CHUNK_SIZE, progress_every=DEFAULT_PROGRESS_EVERY, prefetch=None, discard=None):
+        self.collection = collection
+        self.enrich = enrich
+        self.prefetch = prefetch
+        self.discard = discard
+        self.key = key
+        self.existing_keys = existing_keys
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.progress_every = progress_every
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, collection, enrich, key, existing_keys=(), prefetch=None, discard=None):
+        config = current_app.config.get("bulk_import", {}) if has_app_context() else {}
+        return cls(
+            collection, enrich, key, existing_keys, prefetch=prefetch, discard=discard,
+            concurrency=config.get("concurrency", DEFAULT_CONCURRENCY),
+            chunk_size=config.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            progress_every=config.get("progress_every", DEFAULT_PROGRESS_EVERY),
+        )
+
+    def progress(self, event="progress"):
+        return {"event": event, "processed": self.processed, "inserted": self.inserted, "failed": self.failed}
+
+    def _flush(self, chunk):
+        # Unordered so one bad document does not stop the rest of the chunk
+        try:
+            self.collection.insert_many([document for _, _, document in chunk], ordered=False)
+            self.inserted += len(chunk)
+        except Exception as e:
+            details = getattr(e, "details", None) or {}
+            failed_indexes = {error["index"] for error in details.get("writeErrors", [])}
+            if not failed_indexes:
+                failed_indexes = set(range(len(chunk)))
+            self.inserted += len(chunk) - len(failed_indexes)
+            for index in sorted(failed_indexes):
+                line_number, row, document = chunk[index]
+                if self.discard:
+                    self.discard(document)
+                self.failed += 1
+                yield {"event": "error", "line": line_number, "word": row["word"], "error": f"Insert failed: {e}"}
+
+    def run(self, lines, fmt):
+        rows = normalize_rows(parse_rows(lines, fmt))
+        rows = dedupe_rows(rows, self.key, self.existing_keys)
+        if self.prefetch:
+            rows = prefetch_rows(rows, self.prefetch, self.chunk_size)
+        chunk = []
+        for line_number, row, result in enrich_rows(rows, self.enrich, self.concurrency):
+            self.processed += 1
+            if isinstance(result, Exception):
+                self.failed += 1
+                word = row["word"] if row else getattr(result, "word", None)
+                yield {"event": "error", "line": line_number, "word": word, "error": str(result)}
+            else:
+                chunk.append((line_number, row, result))
+                if len(chunk) >= self.chunk_size:
+                    yield from self._flush(chunk)
+                    chunk = []
+            if self.processed % self.progress_every == 0:
+                yield self.progress()
+        if chunk:
+            yield from self._flush(chunk)
+        yield self.progress("done")
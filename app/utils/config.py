@@ -0,0 +1,37 @@
+import os
+import json
+import copy
+import threading
+
+CONFIG_PATH = 'config.json'
+
+# env -> merged configuration, so the files are read once per process
+_configs = {}
+_lock = threading.Lock()
+
+
+def load_config(env=None):
+    """
+    Loads config.json, updated with config_<env>.json if that file exists. The files are read once per
+    process; callers get their own copy.
+    """
+    with _lock:
+        if env not in _configs:
+            if not os.path.exists(CONFIG_PATH):
+                raise FileNotFoundError(f"Configuration file '{CONFIG_PATH}' not found.")
+            try:
+                with open(CONFIG_PATH, 'r') as config_file:
+                    config = json.load(config_file)
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON in configuration file '{CONFIG_PATH}'.")
+
+            # Load environment-specific configuration
+            env_config_path = f'config_{env}.json'
+            if env and os.path.exists(env_config_path):
+                with open(env_config_path, 'r') as env_config_file:
+                    config.update(json.load(env_config_file))
+            _configs[env] = config
+        return copy.deepcopy(_configs[env])
+
+
+__all__ = ['load_config', 'CONFIG_PATH']
@@ -0,0 +1,152 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from flask import current_app, has_app_context
+
+# Default concurrency limits, overridable through the "enrichment" section of config.json
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_LIMITS = {
+    "llm": 4,  # Concurrent LM Studio requests
+    "tts": 3,  # Concurrent text-to-speech requests
+}
+
+# Group semaphores shared by every executor of the process, so the limits bound the requests of all cards
+# being enriched at once (concurrent requests, bulk imports), not those of each card
+_group_semaphores = {}
+_group_semaphores_lock = threading.Lock()
+
+
+def _group_semaphore(group, size):
+    with _group_semaphores_lock:
+        if (group, size) not in _group_semaphores:
+            _group_semaphores[(group, size)] = threading.BoundedSemaphore(size)
+        return _group_semaphores[(group, size)]
+
+
+class EnrichmentExecutor:
+    """
+    Runs the independent enrichment steps of a card (IPA, WordNet, LLM prompts, TTS) on a bounded
+    thread pool and records how long each step took. The group limits are shared by every executor
+    of the process with the same limits.
+
+    Steps are submitted by name. A step can depend on another one with `then`, so it starts as soon
+    as its input is ready instead of waiting for every other step to finish.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, limits=None):
+        self.max_workers = max_workers
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self._semaphores = {group: _group_semaphore(group, size) for group, size in self.limits.items()}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrichment")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.timings = {}
+        # Steps run outside the request thread, so they need the app context pushed explicitly
+        self._app = current_app._get_current_object() if has_app_context() else None
+
+    @classmethod
+    def from_config(cls):
+        """
+        Build an executor using the "enrichment" section of the app configuration.
+        """
+        config = current_app.config.get("enrichment", {}) if has_app_context() else {}
+        return cls(
+            max_workers=config.get("max_workers", DEFAULT_MAX_WORKERS),
+            limits=config.get("limits"),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=exc_type is None)
+
+    def _run_step(self, name, group, fn, args, kwargs):
+        semaphore = self._semaphores.get(group)
+        if semaphore:
+            semaphore.acquire()
+        try:
+            start = time.perf_counter()
+            try:
+                if self._app is not None:
+                    with self._app.app_context():
+                        return fn(*args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                self.timings[name] = round(time.perf_counter() - start, 4)
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def submit(self, name, fn, *args, group=None, **kwargs):
+        """
+        Schedule `fn(*args, **kwargs)` as the step `name`. `group` selects a concurrency limit
+        (e.g. "llm" or "tts") on top of the pool size.
+        """
+        future = self._pool.submit(self._run_step, name, group, fn, args, kwargs)
+        with self._lock:
+            self._futures[name] = future
+        return future
+
+    def then(self, dependency, name, fn, group=None):
+        """
+        Schedule the step `name` as `fn(result_of_dependency)` once `dependency` has finished.
+        The step never occupies a worker while it waits.
+        """
+        placeholder = Future()
+        with self._lock:
+            self._futures[name] = placeholder
+
+        def _chain(done):
+            if done.exception() is not None:
+                placeholder.set_exception(done.exception())
+                return
+            try:
+                inner = self._pool.submit(self._run_step, name, group, fn, (done.result(),), {})
+            except RuntimeError as e:  # Pool already shut down
+                placeholder.set_exception(e)
+                return
+            inner.add_done_callback(lambda f: _copy_result(f, placeholder))
+
+        self._futures[dependency].add_done_callback(_chain)
+        return placeholder
+
+    def result(self, name, timeout=None):
+        return self._futures[name].result(timeout=timeout)
+
+    def results(self, timeout=None):
+        """
+        Wait for every submitted step and return a dict of step name -> result.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+        return {name: future.result(timeout=timeout) for name, future in futures.items()}
+
+    def as_completed(self, timeout=None):
+        """
+        Yield (name, result, exception) for every step submitted so far, as soon as each one finishes.
+        """
+        with self._lock:
+            names = {future: name for name, future in self._futures.items()}
+        for future in as_completed(names, timeout=timeout):
+            error = future.exception()
+            yield names[future], None if error else future.result(), error
+
+    def timing_breakdown(self):
+        """
+        Per-step durations in seconds, plus the wall-clock time since the executor was created.
+        """
+        breakdown = dict(self.timings)
+        breakdown["total"] = round(time.perf_counter() - self._started, 4)
+        return breakdown
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _copy_result(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
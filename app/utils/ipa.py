@@ -0,0 +1,182 @@
+import os
+import json
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from flask import current_app, has_app_context
+
+# Defaults, overridable through the "ipa" section of config.json
+DEFAULT_CONFIG = {
+    "cache_size": 10000,  # Transcriptions kept in memory
+    "preload": False,  # Load the whole CMU dictionary (~135k words) into memory on first use
+    "fallback_path": "ipa_fallback.json",  # Optional {"word": "ipa"} file for words missing from the dictionary
+}
+
+
+def _dictionary_path():
+    from eng_to_ipa import transcribe
+    return os.path.join(os.path.dirname(os.path.abspath(transcribe.__file__)), "resources", "CMU_dict.db")
+
+
+class IPAService:
+    """
+    IPA transcription with the same output as `eng_to_ipa.convert`, but with an in-memory LRU of
+    transcriptions, one dictionary query per batch of words on a connection that stays open, and
+    an optional preloaded dictionary. Words the dictionary does not know are looked up in a fallback
+    list; words missing from both keep eng_to_ipa's `word*` marking and are counted in `stats`.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CONFIG["cache_size"], preload=DEFAULT_CONFIG["preload"],
+                 fallback=None, dictionary_path=None):
+        self.cache_size = cache_size
+        self.preload = preload
+        self.fallback = {word.lower(): ipa for word, ipa in (fallback or {}).items()}
+        self.dictionary_path = dictionary_path
+        self._cache = OrderedDict()
+        self._dictionary = None
+        self._connection = None
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.out_of_vocabulary = Counter()
+
+    @classmethod
+    def from_config(cls, config=None):
+        if config is None:
+            config = current_app.config.get("ipa", {}) if has_app_context() else {}
+        config = dict(DEFAULT_CONFIG, **config)
+        fallback = {}
+        if config["fallback_path"] and os.path.exists(config["fallback_path"]):
+            with open(config["fallback_path"], "r", encoding="utf-8") as fallback_file:
+                fallback = json.load(fallback_file)
+        return cls(cache_size=config["cache_size"], preload=config["preload"], fallback=fallback)
+
+    def convert(self, text):
+        return self.convert_many([text])[0]
+
+    def convert_many(self, texts):
+        """
+        Transcribes several words or phrases, looking every uncached word up in a single query.
+        Returns the transcriptions in the order of `texts`.
+        """
+        results = {}
+        with self._lock:
+            for text in texts:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+                    results[text] = self._cache[text]
+                    self.hits += 1
+        missing = [text for text in dict.fromkeys(texts) if text not in results]
+        if missing:
+            from eng_to_ipa import transcribe
+
+            # Same tokenization as eng_to_ipa.convert: lower case, punctuation kept aside
+            tokenized = {text: [transcribe.preserve_punc(w.lower())[0] for w in text.split()] for text in missing}
+            phonemes = self._phonemes({token[1] for tokens in tokenized.values() for token in tokens})
+            for text, tokens in tokenized.items():
+                results[text] = self._transcribe(transcribe, tokens, phonemes)
+            with self._lock:
+                self.misses += len(missing)
+                for text in missing:
+                    self._cache[text] = results[text]
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [results[text] for text in texts]
+
+    def _transcribe(self, transcribe, tokens, phonemes):
+        words = [token[1] for token in tokens]
+        cmu = [phonemes.get(word) or ["__IGNORE__" + word] for word in words]
+        ipa = transcribe.cmu_to_ipa(cmu, stress_marking="both")
+        for index, word in enumerate(words):
+            if word not in phonemes and word:
+                if word in self.fallback:
+                    ipa[index] = [self.fallback[word]]
+                else:
+                    with self._lock:
+                        self.out_of_vocabulary[word] += 1
+        ipa = transcribe._punct_replace_word(tokens, ipa)
+        return transcribe.get_top(ipa)
+
+    def _phonemes(self, words):
+        """
+        Returns {word: [phonemes, ...]} for the `words` found in the CMU dictionary.
+        """
+        words = [word for word in words if word]
+        if not words:
+            return {}
+        if self.preload:
+            dictionary = self._load_dictionary()
+            return {word: dictionary[word] for word in words if word in dictionary}
+
+        found = {}
+        with self._db_lock:
+            cursor = self._connect().cursor()
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(words), 500):
+                chunk = words[start:start + 500]
+                cursor.execute(
+                    f"SELECT word, phonemes FROM dictionary WHERE word IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                for word, word_phonemes in cursor.fetchall():
+                    found.setdefault(word, []).append(word_phonemes)
+        return found
+
+    def _connect(self):
+        if self._connection is None:
+            path = self.dictionary_path or _dictionary_path()
+            self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        return self._connection
+
+    def _load_dictionary(self):
+        with self._db_lock:
+            if self._dictionary is None:
+                dictionary = {}
+                for word, word_phonemes in self._connect().execute("SELECT word, phonemes FROM dictionary"):
+                    dictionary.setdefault(word, []).append(word_phonemes)
+                self._dictionary = dictionary
+        return self._dictionary
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._cache),
+                "out_of_vocabulary": dict(self.out_of_vocabulary.most_common(20)),
+            }
+
+    def close(self):
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Shared service, created on first use from the "ipa" section of the app configuration
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_ipa_service():
+    """Get the shared IPA service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = IPAService.from_config()
+    return _service
+
+
+def close_ipa_service():
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.close()
+            _service = None
+
+
+__all__ = ['IPAService', 'get_ipa_service', 'close_ipa_service']
@@ -0,0 +1,184 @@
+import os
+import socket
+import random
+import datetime
+import threading
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Defaults, overridable through the "jobs" section of config.json
+DEFAULT_CONFIG = {
+    "workers": 2,  # Worker threads per process; 0 disables processing in this process
+    "max_attempts": 3,  # Attempts before a job is marked failed
+    "lease_seconds": 300,  # A running job whose lease expired is assumed lost and is picked up again
+    "poll_interval": 1.0,  # Seconds an idle worker waits before looking for work again
+    "retry_backoff": 5.0,  # Base delay before a failed job is retried, doubled on each attempt
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Job type -> function(payload) returning a JSON-serializable result
+_handlers = {}
+
+
+def register_handler(job_type, handler):
+    _handlers[job_type] = handler
+
+
+class JobQueue:
+    """
+    Durable job queue stored in the `jobs` collection, processed by worker threads inside the app.
+    Workers claim jobs atomically with a lease, so several processes can share the queue without an
+    external broker. Jobs from a crashed worker are retried once their lease expires.
+    """
+
+    def __init__(self, collection, workers=DEFAULT_CONFIG["workers"], max_attempts=DEFAULT_CONFIG["max_attempts"],
+                 lease_seconds=DEFAULT_CONFIG["lease_seconds"], poll_interval=DEFAULT_CONFIG["poll_interval"],
+                 retry_backoff=DEFAULT_CONFIG["retry_backoff"]):
+        self.collection = collection
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def enqueue(self, job_type, payload, max_attempts=None):
+        """
+        Stores a new job and returns its id.
+        """
+        now = datetime.datetime.utcnow()
+        job_id = ObjectId()
+        self.collection.insert_one({
+            "_id": job_id,
+            "job_id": str(job_id),
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "result": None,
+            "error": None,
+            "run_after": now,
+            "lease_expires_at": None,
+            "lease_id": None,
+            "worker_id": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        self._wakeup.set()
+        return str(job_id)
+
+    def get(self, job_id):
+        return self.collection.find_one({"job_id": job_id})
+
+    def claim(self):
+        """
+        Atomically takes the oldest runnable job: a queued job whose retry delay has passed, or a
+        running job whose lease expired because its worker crashed.
+        """
+        now = datetime.datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "run_after": {"$lte": now}},
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker_id": self.worker_id,
+                    "lease_id": ObjectId(),
+                    "lease_expires_at": now + datetime.timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def run_job(self, job):
+        """
+        Runs a claimed job and records its outcome. Failures are retried with exponential backoff
+        until `max_attempts` is reached.
+        """
+        now = datetime.datetime.utcnow()
+        handler = _handlers.get(job["type"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job['type']}'")
+            if job["attempts"] > job["max_attempts"]:
+                # Claimed again after its lease expired on every attempt
+                raise TimeoutError("Job did not finish within its lease")
+            result = handler(job["payload"])
+        except Exception as e:
+            if handler is not None and job["attempts"] < job["max_attempts"]:
+                delay = self.retry_backoff * (2 ** (job["attempts"] - 1)) * random.uniform(0.5, 1.0)
+                update = {"status": QUEUED, "run_after": now + datetime.timedelta(seconds=delay)}
+            else:
+                update = {"status": FAILED}
+            update.update({"error": str(e), "lease_expires_at": None, "updated_at": datetime.datetime.utcnow()})
+        else:
+            update = {
+                "status": SUCCEEDED, "result": result, "error": None,
+                "lease_expires_at": None, "updated_at": datetime.datetime.utcnow()
+            }
+        # Only the holder of the current lease may record the outcome
+        self.collection.update_one({"_id": job["_id"], "lease_id": job["lease_id"]}, {"$set": update})
+
+    def process_one(self):
+        job = self.claim()
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def _work(self, app):
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    worked = self.process_one()
+            except Exception as e:
+                app.logger.error(f"Job worker error: {e}")
+                worked = False
+            if not worked:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self, app):
+        """
+        Starts the worker threads for `app`. Safe to call more than once.
+        """
+        if self._threads or self.workers <= 0:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(app,), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def init_job_queue(app, start_workers=True):
+    """
+    Attaches a job queue to `app` as `app.job_queue` and starts its workers.
+    """
+    config = dict(DEFAULT_CONFIG, **app.config.get("jobs", {}))
+    app.job_queue = JobQueue(app.db.jobs, **config)
+    if start_workers:
+        app.job_queue.start(app)
+    return app.job_queue
+
+
+__all__ = ['JobQueue', 'register_handler', 'init_job_queue', 'QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED']
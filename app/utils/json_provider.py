@@ -0,0 +1,77 @@
+import json
+import uuid
+import decimal
+import datetime
+from bson import ObjectId, Decimal128
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library produces the same output, only slower
+    orjson = None
+
+
+def to_json_value(obj):
+    """
+    Wire format of the BSON and Python types the JSON libraries do not know: ObjectIds as their hex
+    string, decimals as strings (to keep their precision), naive datetimes as UTC. Raises TypeError for
+    anything else.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, datetime.datetime) and obj.tzinfo is None:
+        # Naive datetimes are UTC (as stored by MongoDB); say so, like orjson's OPT_NAIVE_UTC
+        return obj.replace(tzinfo=datetime.timezone.utc).isoformat()
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()  # Same as orjson, for the fallback
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class BSONJSONProvider(JSONProvider):
+    """
+    JSON for every route (jsonify, request.get_json, current_app.json.dumps) with one wire format for
+    MongoDB documents: ObjectId as a hex string, datetimes in ISO 8601 with their offset (naive ones are
+    UTC), Decimal128 as a string. Uses orjson when it is installed. Keys are not sorted and non-ASCII text
+    is sent as UTF-8.
+    """
+
+    mimetype = "application/json"
+    # orjson options: dict keys that are not strings (e.g. ints) are converted instead of rejected, and
+    # naive datetimes get a +00:00 offset, so browsers do not read them as local time
+    orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj, **kwargs).decode("utf-8") if orjson else self._dumps_stdlib(obj, **kwargs)
+
+    def dumpb(self, obj, **kwargs):
+        """Like `dumps`, but returns UTF-8 bytes, which orjson produces without an extra copy."""
+        if orjson and not kwargs:
+            return orjson.dumps(obj, default=to_json_value, option=self.orjson_options)
+        return self._dumps_stdlib(obj, **kwargs).encode("utf-8")
+
+    @staticmethod
+    def _dumps_stdlib(obj, **kwargs):
+        kwargs.setdefault("default", to_json_value)
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+
+__all__ = ['BSONJSONProvider', 'to_json_value']
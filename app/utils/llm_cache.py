@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "path": "cache/llm_cache.sqlite3",
+    "memory_entries": 1024,  # Entries kept in the in-process LRU tier
+    "max_bytes": 100 * 1024 * 1024,  # Size of the disk tier before least recently used entries are evicted
+    "ttl": 30 * 24 * 3600,  # Seconds a completion stays valid
+}
+
+
+def cache_key(prompt, model, temperature, max_tokens, response_format=None):
+    """
+    Content address of a completion: every input that changes the model's answer.
+    """
+    material = json.dumps(
+        [prompt, model, temperature, max_tokens, response_format],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM completions: an in-process LRU in front of a SQLite file shared by every
+    worker on the host. Entries expire after `ttl` seconds and the file is kept under `max_bytes` by
+    evicting the least recently used entries.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG["path"], memory_entries=DEFAULT_CONFIG["memory_entries"],
+                 max_bytes=DEFAULT_CONFIG["max_bytes"], ttl=DEFAULT_CONFIG["ttl"], clock=time.time):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires_at ON llm_cache (expires_at)")
+        self._create_size_counter()
+
+    def _create_size_counter(self):
+        # Running total of the entry sizes, kept by triggers so every write adjusts it and every worker
+        # sharing the file sees the same value; it is summed from the table only once, when first created
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)"
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO llm_cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM llm_cache"
+                )
+                self._conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS llm_cache_size_insert AFTER INSERT ON llm_cache BEGIN "
+                    "UPDATE llm_cache_size SET total = total + NEW.size WHERE id = 0; END"
+                )
+                self._conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS llm_cache_size_update AFTER UPDATE OF size ON llm_cache BEGIN "
+                    "UPDATE llm_cache_size SET total = total + NEW.size - OLD.size WHERE id = 0; END"
+                )
+                self._conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS llm_cache_size_delete AFTER DELETE ON llm_cache BEGIN "
+                    "UPDATE llm_cache_size SET total = total - OLD.size WHERE id = 0; END"
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _total_size(self):
+        return self._conn.execute("SELECT total FROM llm_cache_size WHERE id = 0").fetchone()[0]
+
+    def get(self, key):
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._remember(key, row[0], row[1])
+            self.hits["disk"] += 1
+            return row[0]
+
+    def set(self, key, value):
+        now = self._clock()
+        expires_at = now + self.ttl
+        size = len(key) + len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, expires_at)
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would not fire the size trigger
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                (key, value, size, expires_at, now)
+            )
+            self._evict(now)
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        # Drop expired entries first (through the expires_at index), then the least recently used ones until
+        # the file fits. The size counter makes the check O(1), so a write that fits never scans the table.
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            size = self._total_size()
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+                "disk_bytes": size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Shared cache, created on first use from the "llm_cache" section of the app configuration
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Get the shared LLM completion cache, or None when caching is disabled."""
+    global _cache
+    if _cache is None:
+        config = dict(DEFAULT_CONFIG)
+        if has_app_context():
+            config.update(current_app.config.get("llm_cache", {}))
+        if not config.pop("enabled"):
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(**config)
+    return _cache
+
+
+def close_llm_cache():
+    """Close the shared LLM completion cache."""
+    global _cache
+    with _cache_lock:
+        if _cache:
+            _cache.close()
+            _cache = None
+
+
+__all__ = ['LLMCache', 'cache_key', 'get_llm_cache', 'close_llm_cache']
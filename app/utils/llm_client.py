@@ -0,0 +1,240 @@
+import time
+import random
+import threading
+from flask import current_app, has_app_context
+
+DEFAULT_CONFIG = {
+    "base_url": "http://localhost:1234/v1",
+    "model": None,  # Model identifier sent to the server; None uses whichever model is loaded
+    "connect_timeout": 3.0,  # Seconds to establish the connection
+    "read_timeout": 60.0,  # Seconds to wait for the model to answer
+    "pool_size": 10,  # Keep-alive connections kept open to the server
+    "max_retries": 2,  # Retries after the first attempt, only when the request never reached the model
+    "backoff_base": 0.5,  # First retry waits up to this many seconds, doubling each time
+    "backoff_max": 8.0,
+    "failure_threshold": 5,  # Consecutive failures that open the circuit breaker
+    "reset_timeout": 30.0,  # Seconds the breaker stays open before letting a trial request through
+    "model_ttl": 60.0,  # Seconds the model reported by the server is trusted when "model" is None
+}
+
+# Status codes worth retrying: the proxy or server turned the request away before the model worked on it.
+# Completions are expensive and not idempotent, so nothing else is sent twice.
+RETRY_STATUS_CODES = {502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the LLM server could not produce an answer."""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without contacting the server while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures. After `failure_threshold` of them the breaker opens and every call
+    fails fast for `reset_timeout` seconds; then a single trial call is let through (half-open) and its
+    outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class LLMClient:
+    """
+    Client for an OpenAI-compatible chat completions server (LM Studio). Reuses keep-alive connections
+    from a pooled session, bounds every request with connect/read timeouts, retries transient failures
+    with jittered exponential backoff and stops calling a failing server through a circuit breaker.
+    """
+
+    def __init__(self, base_url=DEFAULT_CONFIG["base_url"], model=DEFAULT_CONFIG["model"],
+                 connect_timeout=DEFAULT_CONFIG["connect_timeout"], read_timeout=DEFAULT_CONFIG["read_timeout"],
+                 pool_size=DEFAULT_CONFIG["pool_size"],
+                 max_retries=DEFAULT_CONFIG["max_retries"], backoff_base=DEFAULT_CONFIG["backoff_base"],
+                 backoff_max=DEFAULT_CONFIG["backoff_max"], failure_threshold=DEFAULT_CONFIG["failure_threshold"],
+                 reset_timeout=DEFAULT_CONFIG["reset_timeout"], model_ttl=DEFAULT_CONFIG["model_ttl"]):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.model_ttl = model_ttl
+        self._served_model = (None, None)  # (model id or None, time.monotonic() it was read)
+        self._served_model_lock = threading.Lock()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        # requests is imported on first use to keep it out of application startup
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def _backoff(self, attempt):
+        # "Full jitter": a random wait between 0 and the capped exponential delay
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat_completion(self, payload):
+        """
+        POST `payload` to /chat/completions and return the decoded JSON response. Only connection errors
+        and RETRY_STATUS_CODES are retried: after a read timeout the model may still be generating.
+        Raises CircuitOpenError when the breaker is open and LLMError once retries are exhausted.
+        """
+        import requests
+        url = f"{self.base_url}/chat/completions"
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"LLM circuit breaker is open for {self.base_url}")
+            retry = False
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code < 400:
+                    result = response.json()
+                    self.breaker.record_success()
+                    return result
+            except requests.ConnectionError as e:
+                last_error = e
+                retry = True
+            except (requests.RequestException, ValueError) as e:
+                # Read timeouts, but also broken or undecodable responses: every one must reach the breaker,
+                # or a failed half-open trial would keep it from ever closing
+                last_error = e
+            else:
+                last_error = LLMError(f"LLM server returned HTTP {response.status_code}")
+                if response.status_code < 500 and response.status_code != 429:
+                    # The request itself is wrong; retrying will not help and the server is healthy
+                    self.breaker.record_success()
+                    raise last_error
+                retry = response.status_code in RETRY_STATUS_CODES
+
+            self.breaker.record_failure()
+            if not retry or attempt == self.max_retries:
+                raise LLMError(f"LLM request failed after {attempt + 1} attempt(s): {last_error}")
+            time.sleep(self._backoff(attempt))
+
+    def served_model(self):
+        """
+        The model answering requests: the configured one or else the only model the server lists as
+        loaded, re-read every `model_ttl` seconds. None when it cannot be told, e.g. the server is down
+        or lists several models.
+        """
+        if self.model:
+            return self.model
+        with self._served_model_lock:
+            model, read_at = self._served_model
+            if read_at is not None and time.monotonic() - read_at < self.model_ttl:
+                return model
+            model = None
+            if self.breaker.state == CircuitBreaker.CLOSED:
+                import requests
+                try:
+                    response = self.session.get(f"{self.base_url}/models", timeout=self.timeout)
+                    if response.status_code < 400:
+                        models = [entry.get("id") for entry in response.json().get("data", [])]
+                        model = models[0] if len(models) == 1 else None
+                except (requests.RequestException, ValueError, AttributeError):
+                    pass
+            self._served_model = (model, time.monotonic())
+            return model
+
+    def complete(self, prompt, max_tokens=100, temperature=0.7, response_format=None):
+        """
+        Send a single user prompt and return the stripped text of the first choice.
+        """
+        payload = {
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if self.model:
+            payload["model"] = self.model
+        if response_format:
+            payload["response_format"] = response_format
+        result = self.chat_completion(payload)
+        try:
+            return result["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise LLMError(f"Unexpected LLM response: {result}") from e
+
+    def close(self):
+        self.session.close()
+
+
+# Shared client, created on first use from the "llm" section of the app configuration
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Get the shared LLM client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = dict(DEFAULT_CONFIG)
+                if has_app_context():
+                    config.update(current_app.config.get("llm", {}))
+                _client = LLMClient(**config)
+    return _client
+
+
+def close_llm_client():
+    """Close the shared LLM client."""
+    global _client
+    with _client_lock:
+        if _client:
+            _client.close()
+            _client = None
+
+
+__all__ = ['LLMClient', 'LLMError', 'CircuitOpenError', 'CircuitBreaker', 'get_llm_client', 'close_llm_client']
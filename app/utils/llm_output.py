@@ -0,0 +1,101 @@
+import re
+import json
+
+# JSON schema sent to LM Studio for the combined enrichment prompt
+COMBINED_FIELDS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "meaning_en": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "meaning_vi": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "example_sentences_en": {"type": "array", "items": {"type": "string"}, "minItems": 2, "maxItems": 2},
+        "word_type": {"type": "string"},
+        "vocab_family": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["meaning_en", "meaning_vi", "example_sentences_en", "word_type", "vocab_family"],
+}
+
+_NUMBERED_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+")
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_numbered_list(text):
+    """
+    Turns a numbered LLM answer into a list of items. Indented "- detail" lines are folded into the
+    item above them, so "1. Meaning (Context)\\n   - Example." becomes "Meaning (Context) - Example.".
+    """
+    if not text:
+        return []
+    items = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        is_detail = line[:1].isspace() and stripped.startswith("-")
+        if items and is_detail:
+            items[-1] = f"{items[-1]} {stripped}"
+        else:
+            items.append(_NUMBERED_ITEM.sub("", stripped))
+    return [item for item in items if item]
+
+
+def parse_example_sentences(text, count=2):
+    """
+    Returns up to `count` clean example sentences from a raw LLM answer, dropping blank lines and numbering.
+    """
+    return parse_numbered_list(text)[:count]
+
+
+def extract_json_object(text):
+    """
+    Returns the first JSON object found in an LLM answer, or None. Tolerates ```json fences and leading prose.
+    """
+    if not text:
+        return None
+    text = _CODE_FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        value = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _string_list(value, min_items=1, max_items=None):
+    if not isinstance(value, list):
+        return None
+    items = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+    if len(items) < min_items:
+        return None
+    return items[:max_items] if max_items else items
+
+
+def _string(value):
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+_VALIDATORS = {
+    "meaning_en": _string_list,
+    "meaning_vi": _string_list,
+    "example_sentences_en": lambda value: _string_list(value, min_items=2, max_items=2),
+    "word_type": _string,
+    "vocab_family": lambda value: _string_list(value, min_items=0),
+}
+
+
+def validate_combined_fields(data):
+    """
+    Validates each field of a combined enrichment answer independently. Returns a dict containing
+    only the fields that passed; missing keys should fall back to their per-field prompt.
+    """
+    valid = {}
+    if not isinstance(data, dict):
+        return valid
+    for field, validator in _VALIDATORS.items():
+        value = validator(data.get(field))
+        if value is not None:
+            valid[field] = value
+    return valid
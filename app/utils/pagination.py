@@ -0,0 +1,139 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Response, current_app, has_app_context, stream_with_context
+
+# Defaults, overridable through the "pagination" section of config.json
+DEFAULT_CONFIG = {
+    "default_limit": 100,  # Page size when only `after` is given
+    "max_limit": 1000,
+    "batch_size": 500,  # Documents fetched and serialized at a time when a whole listing is streamed
+}
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _config():
+    config = dict(DEFAULT_CONFIG)
+    if has_app_context():
+        config.update(current_app.config.get("pagination", {}))
+    return config
+
+
+def page_params(args):
+    """
+    Reads the `limit` and `after` query parameters. Returns None if neither is given, meaning the whole
+    listing is wanted, otherwise (limit, after) with `after` an ObjectId or None for the first page.
+    Raises ValueError for invalid values.
+    """
+    if "limit" not in args and "after" not in args:
+        return None
+    config = _config()
+    try:
+        limit = int(args.get("limit", config["default_limit"]))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    after = args.get("after") or None
+    if after is not None:
+        try:
+            after = ObjectId(after)
+        except InvalidId:
+            raise ValueError("after must be the next_after value of the previous page")
+    return min(limit, config["max_limit"]), after
+
+
+def find_page(collection, query, limit, after=None, projection=None):
+    """
+    Returns one page of the documents matching `query` in `_id` (i.e. creation) order, starting after the
+    document whose id is `after`, and the cursor of the next page (None on the last page). The page is
+    read straight from an index on the query fields followed by `_id`, however deep it is.
+    """
+    if after is not None:
+        query = dict(query, _id={"$gt": after})
+    # One extra document tells whether another page follows
+    documents = list(collection.find(query, projection).sort("_id", 1).limit(limit + 1))
+    next_after = str(documents[limit - 1]["_id"]) if len(documents) > limit else None
+    return documents[:limit], next_after
+
+
+def batch_size_param(args):
+    """
+    Reads the `batch_size` query parameter of a streamed listing, or None for the configured size.
+    Raises ValueError for invalid values.
+    """
+    if not args.get("batch_size"):
+        return None
+    try:
+        batch_size = int(args["batch_size"])
+    except ValueError:
+        raise ValueError("batch_size must be an integer")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    return min(batch_size, _config()["max_limit"])
+
+
+def iter_batches(collection, query, projection=None, batch_size=None, after=None, limit=None):
+    """
+    Yields the documents matching `query` in `_id` order as lists of `batch_size`, straight from the
+    cursor, so a whole listing can be sent without holding it in memory. `after` and `limit` optionally
+    start after a given document and stop after a number of documents.
+    """
+    batch_size = batch_size or _config()["batch_size"]
+    if after is not None:
+        query = dict(query, _id={"$gt": after})
+    cursor = collection.find(query, projection).sort("_id", 1).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_json_array(batches, dumps):
+    """
+    Yields a JSON array of every item of `batches`, one chunk per batch, each item encoded with `dumps`.
+    """
+    yield "["
+    separator = ""
+    for batch in batches:
+        if batch:
+            yield separator + ",".join(dumps(item) for item in batch)
+            separator = ","
+    yield "]"
+
+
+def stream_ndjson(batches, dumps):
+    """
+    Yields one JSON document per line for every item of `batches`, one chunk per batch.
+    """
+    for batch in batches:
+        if batch:
+            yield "".join(dumps(item) + "\n" for item in batch)
+
+
+def wants_ndjson(accept_mimetypes):
+    """Whether the Accept header prefers NDJSON over a JSON array."""
+    return accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def stream_listing(batches, dumps, ndjson=False):
+    """
+    Streaming response of every item of `batches`: NDJSON if `ndjson`, else a JSON array. Only one
+    batch is held in memory at a time, whatever the size of the listing.
+    """
+    if not ndjson:
+        return Response(stream_with_context(stream_json_array(batches, dumps)), mimetype="application/json")
+    response = Response(stream_with_context(stream_ndjson(batches, dumps)), mimetype=NDJSON_MIMETYPE)
+    # Ask proxies not to buffer, so clients can process documents as they arrive
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+__all__ = ['page_params', 'batch_size_param', 'find_page', 'iter_batches', 'stream_json_array', 'stream_ndjson',
+           'wants_ndjson', 'stream_listing', 'NDJSON_MIMETYPE']
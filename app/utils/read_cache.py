@@ -0,0 +1,213 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+import bson
+from flask import current_app, has_app_context
+
+# Defaults, overridable through the "read_cache" section of config.json
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "max_entries": 10000,  # Documents kept in the in-process LRU
+    "ttl": 30,  # Seconds a document is served from the in-process LRU; bounds staleness across workers
+    "shared_url": None,  # Optional Redis URL of a tier shared by every worker, e.g. "redis://localhost:6379/0"
+    "shared_ttl": 300,  # Seconds a document stays in the shared tier
+}
+
+
+class ReadCache:
+    """
+    Read-through cache for single documents looked up by id (cards, users, settings): an in-process LRU
+    whose entries expire after `ttl` seconds, in front of an optional shared tier (a Redis client). Writes
+    go to the database and then call `invalidate`, which drops the entry from this process and from the
+    shared tier; other workers may serve their own copy for up to `ttl` seconds, which `stats` reports as
+    the age of the entries served. Missing documents are not cached.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CONFIG["max_entries"], ttl=DEFAULT_CONFIG["ttl"], shared=None,
+                 shared_ttl=DEFAULT_CONFIG["shared_ttl"], clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (namespace, key) -> (document, cached_at)
+        self._invalidations = 0  # Loads that started before an invalidation are not cached
+        self.hits = {"memory": 0, "shared": 0}
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.shared_errors = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def get(self, namespace, key, loader):
+        """
+        Returns the document cached under (namespace, key), or `loader()` (a document or None) on a miss.
+        The caller gets its own copy.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry and entry[1] + self.ttl > now:
+                self._entries.move_to_end((namespace, key))
+                self.hits["memory"] += 1
+                self._served(now - entry[1])
+                return copy.deepcopy(entry[0])
+            if entry:
+                del self._entries[(namespace, key)]
+                self.expirations += 1
+            invalidations = self._invalidations
+
+        cached = self._shared_get(namespace, key)
+        if cached is not None:
+            document, cached_at = cached["document"], cached["cached_at"]
+            with self._lock:
+                self.hits["shared"] += 1
+                self._served(now - cached_at)
+        else:
+            document, cached_at = loader(), now
+            with self._lock:
+                self.misses += 1
+            if document is None:
+                return None
+            if self._stale(invalidations):
+                return document
+            self._shared_set(namespace, key, {"document": document, "cached_at": cached_at})
+            if self._stale(invalidations):
+                # An invalidation ran while the entry was written: its delete may have come first
+                self._shared_delete(namespace, key)
+                return document
+
+        with self._lock:
+            if invalidations == self._invalidations:
+                self._entries[(namespace, key)] = (copy.deepcopy(document), cached_at)
+                self._entries.move_to_end((namespace, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return document
+
+    def _stale(self, invalidations):
+        with self._lock:
+            return invalidations != self._invalidations
+
+    def invalidate(self, namespace, key):
+        """Drops the document cached under (namespace, key); call it after every write to that document."""
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+            self._invalidations += 1
+            self.invalidations += 1
+        self._shared_delete(namespace, key)
+
+    def _served(self, age):
+        self._served_age_total += age
+        self._served_age_max = max(self._served_age_max, age)
+
+    @staticmethod
+    def _shared_key(namespace, key):
+        return f"read_cache:{namespace}:{key}"
+
+    def _shared_get(self, namespace, key):
+        if self.shared is None:
+            return None
+        try:
+            value = self.shared.get(self._shared_key(namespace, key))
+            return bson.decode(value) if value is not None else None
+        except Exception as e:
+            # The shared tier is only an optimization: fall back to the database
+            self.shared_errors += 1
+            print(f"Error reading shared cache entry {namespace}:{key}: {e}")
+            return None
+
+    def _shared_set(self, namespace, key, value):
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(self._shared_key(namespace, key), bson.encode(value), ex=self.shared_ttl)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Error writing shared cache entry {namespace}:{key}: {e}")
+
+    def _shared_delete(self, namespace, key):
+        if self.shared is None:
+            return
+        try:
+            self.shared.delete(self._shared_key(namespace, key))
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Error invalidating shared cache entry {namespace}:{key}: {e}")
+
+    def stats(self):
+        """
+        Hit ratio per tier, and the age in seconds of the entries served from the cache: how stale an
+        answer can be when another worker changed the document.
+        """
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["shared"]
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.hits["memory"],
+                "shared_hits": self.hits["shared"],
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "shared_errors": self.shared_errors,
+                "mean_served_age": round(self._served_age_total / hits, 3) if hits else 0.0,
+                "max_served_age": round(self._served_age_max, 3),
+                "ttl": self.ttl,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+
+def init_read_cache(app):
+    """
+    Attaches a read cache to `app` as `app.read_cache`, or None when the "read_cache" section disables it.
+    The shared tier needs the `redis` package; without it the cache stays in-process.
+    """
+    config = dict(DEFAULT_CONFIG, **app.config.get("read_cache", {}))
+    app.read_cache = None
+    if not config["enabled"]:
+        return None
+    shared = None
+    if config["shared_url"]:
+        try:
+            import redis
+            shared = redis.Redis.from_url(config["shared_url"])
+        except ImportError:
+            app.logger.error("read_cache.shared_url is set but the redis package is not installed")
+    app.read_cache = ReadCache(max_entries=config["max_entries"], ttl=config["ttl"], shared=shared,
+                               shared_ttl=config["shared_ttl"])
+    return app.read_cache
+
+
+def get_read_cache():
+    """The current app's read cache, or None when it is disabled or there is no app context."""
+    return getattr(current_app, "read_cache", None) if has_app_context() else None
+
+
+def cached(namespace, key, loader):
+    """Read-through lookup in the current app's read cache; calls `loader` directly when there is none."""
+    cache = get_read_cache()
+    if cache is None:
+        return loader()
+    return cache.get(namespace, key, loader)
+
+
+def invalidate(namespace, key):
+    cache = get_read_cache()
+    if cache is not None:
+        cache.invalidate(namespace, key)
+
+
+__all__ = ['ReadCache', 'init_read_cache', 'get_read_cache', 'cached', 'invalidate']
@@ -0,0 +1,185 @@
+import io
+import math
+import wave
+import struct
+import hashlib
+import threading
+from flask import current_app, has_app_context
+
+DEFAULT_CONFIG = {
+    "engine": "gtts",  # "gtts", "local" or "stub"
+    "local_models": {  # Language -> Hugging Face model used by the local engine
+        "en": "facebook/mms-tts-eng",
+        "vi": "facebook/mms-tts-vie",
+    },
+    "device": "cpu",
+}
+
+
+class TTSBackend:
+    """
+    Turns text into speech files. `name` and `voice` identify the output for content addressing, so two
+    backends never share a clip. Backends with `batched = True` synthesize several texts in one call
+    much faster than one by one.
+    """
+
+    name = None
+    voice = "default"
+    extension = "mp3"
+    batched = False
+
+    def synthesize(self, text, language, filepath):
+        raise NotImplementedError
+
+    def synthesize_batch(self, items):
+        """
+        Synthesizes a list of (text, language, filepath) tuples.
+        """
+        for text, language, filepath in items:
+            self.synthesize(text, language, filepath)
+
+    def warm(self):
+        """Loads whatever the backend needs ahead of the first request."""
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS. Needs network access for every clip."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def synthesize(self, text, language, filepath):
+        from gtts import gTTS
+        gTTS(text=text, lang=language).save(filepath)
+
+
+class LocalVitsBackend(TTSBackend):
+    """
+    Offline CPU synthesis with a VITS model (Meta MMS-TTS) through transformers. Models are loaded once per
+    process and shared by every request; a batch of texts is synthesized in a single forward pass.
+    """
+
+    name = "mms-tts"
+    extension = "wav"
+    batched = True
+
+    _models = {}  # Model name -> (model, tokenizer), shared by every instance in the process
+    _load_lock = threading.Lock()
+
+    def __init__(self, local_models=None, device="cpu"):
+        self.local_models = dict(DEFAULT_CONFIG["local_models"], **(local_models or {}))
+        self.device = device
+        self.voice = self.local_models.get("en")
+
+    def _model_name(self, language):
+        try:
+            return self.local_models[language]
+        except KeyError:
+            raise ValueError(f"No local TTS model configured for language '{language}'")
+
+    def _load(self, model_name):
+        loaded = LocalVitsBackend._models.get(model_name)
+        if loaded is None:
+            with LocalVitsBackend._load_lock:
+                loaded = LocalVitsBackend._models.get(model_name)
+                if loaded is None:
+                    from transformers import AutoTokenizer, VitsModel
+                    model = VitsModel.from_pretrained(model_name).to(self.device)
+                    model.eval()
+                    tokenizer = AutoTokenizer.from_pretrained(model_name)
+                    loaded = LocalVitsBackend._models[model_name] = (model, tokenizer)
+        return loaded
+
+    def warm(self):
+        self._load(self._model_name("en"))
+
+    def synthesize(self, text, language, filepath):
+        self.synthesize_batch([(text, language, filepath)])
+
+    def synthesize_batch(self, items):
+        import torch
+        import soundfile
+
+        by_language = {}
+        for text, language, filepath in items:
+            by_language.setdefault(language, []).append((text, filepath))
+
+        for language, batch in by_language.items():
+            model, tokenizer = self._load(self._model_name(language))
+            inputs = tokenizer([text for text, _ in batch], return_tensors="pt", padding=True).to(self.device)
+            with torch.inference_mode():
+                output = model(**inputs)
+            for (text, filepath), waveform, length in zip(batch, output.waveform, output.sequence_lengths):
+                # The batch is padded to its longest clip; keep only this clip's samples
+                samples = waveform[:int(length)].cpu().numpy()
+                soundfile.write(filepath, samples, model.config.sampling_rate, format="WAV")
+
+
+class StubBackend(TTSBackend):
+    """
+    Deterministic offline backend for tests: a short tone whose pitch and length depend only on the text.
+    """
+
+    name = "stub"
+    extension = "wav"
+    batched = True
+    sample_rate = 8000
+
+    @staticmethod
+    def render(text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        frequency = 200 + digest[0] * 2
+        frame_count = int(StubBackend.sample_rate * min(0.05 * max(len(text.split()), 1), 1.0))
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(StubBackend.sample_rate)
+            wav.writeframes(b"".join(
+                struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / StubBackend.sample_rate)))
+                for i in range(frame_count)
+            ))
+        return buffer.getvalue()
+
+    def synthesize(self, text, language, filepath):
+        with open(filepath, "wb") as f:
+            f.write(StubBackend.render(text))
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "local": LocalVitsBackend,
+    "stub": StubBackend,
+}
+
+
+def create_tts_backend(engine="gtts", **options):
+    try:
+        backend_class = BACKENDS[engine]
+    except KeyError:
+        raise ValueError(f"Unknown TTS engine '{engine}', expected one of {sorted(BACKENDS)}")
+    if backend_class is LocalVitsBackend:
+        return backend_class(local_models=options.get("local_models"), device=options.get("device", "cpu"))
+    return backend_class()
+
+
+# Shared backend, created on first use from the "tts" section of the app configuration
+_backend = None
+_backend_config = None
+_backend_lock = threading.Lock()
+
+
+def get_tts_backend():
+    """Get the TTS backend selected in the configuration."""
+    global _backend, _backend_config
+    config = dict(DEFAULT_CONFIG)
+    if has_app_context():
+        config.update(current_app.config.get("tts", {}))
+    with _backend_lock:
+        if _backend is None or config != _backend_config:
+            _backend = create_tts_backend(**config)
+            _backend_config = config
+    return _backend
+
+
+__all__ = ['TTSBackend', 'GTTSBackend', 'LocalVitsBackend', 'StubBackend', 'create_tts_backend', 'get_tts_backend']
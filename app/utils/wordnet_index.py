@@ -0,0 +1,196 @@
+import os
+import mmap
+import struct
+import hashlib
+import threading
+from flask import current_app, has_app_context
+
+# Defaults, overridable through the "wordnet" section of config.json
+DEFAULT_CONFIG = {
+    "index_path": "cache/wordnet_index.bin",  # Built by `python -m scripts.build_wordnet_index`
+    "download": True,  # Download the WordNet corpus on first use if it is missing (never at startup)
+}
+
+# File layout: header, then an open-addressing table of slots, then the records the slots point to.
+# Every integer is little-endian, so the file can be memory-mapped and read in place.
+MAGIC = b"WNIX"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # Magic, version, slot count (a power of two)
+SLOT = struct.Struct("<QI")  # Key hash, record offset (0 marks an empty slot)
+RECORD = struct.Struct("<HI")  # Key length, payload length; followed by the key and the payload
+ITEM_SEPARATOR = "\x1f"
+LIST_SEPARATOR = "\x1e"
+
+
+def normalize(word):
+    """Key of a word in WordNet: lower case, underscores instead of spaces."""
+    return "_".join(word.strip().lower().split())
+
+
+def _hash(key):
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def synonyms_antonyms(wordnet, word):
+    """
+    Walks the synsets of `word` and returns its (synonyms, antonyms), sorted.
+    """
+    synonyms = set()
+    antonyms = set()
+    for syn in wordnet.synsets(word):
+        for lemma in syn.lemmas():
+            synonyms.add(lemma.name())
+            if lemma.antonyms():
+                antonyms.add(lemma.antonyms()[0].name())
+    return sorted(synonyms), sorted(antonyms)
+
+
+def build_index(wordnet, path):
+    """
+    Precomputes (synonyms, antonyms) for every lemma of `wordnet` and writes the index to `path`.
+    Returns the number of lemmas.
+    """
+    records = []
+    for lemma_name in wordnet.all_lemma_names():
+        synonyms, antonyms = synonyms_antonyms(wordnet, lemma_name)
+        payload = ITEM_SEPARATOR.join(synonyms) + LIST_SEPARATOR + ITEM_SEPARATOR.join(antonyms)
+        records.append((normalize(lemma_name).encode("utf-8"), payload.encode("utf-8")))
+
+    # Keep the table at most half full so probe sequences stay short
+    slot_count = 1
+    while slot_count < 2 * len(records):
+        slot_count *= 2
+    slots = [(0, 0)] * slot_count
+    data = bytearray()
+    data_start = HEADER.size + slot_count * SLOT.size
+    for key, payload in records:
+        key_hash = _hash(key)
+        index = key_hash & (slot_count - 1)
+        while slots[index][1]:
+            index = (index + 1) & (slot_count - 1)
+        slots[index] = (key_hash, data_start + len(data))
+        data += RECORD.pack(len(key), len(payload)) + key + payload
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, slot_count))
+        for slot in slots:
+            f.write(SLOT.pack(*slot))
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+class WordNetIndex:
+    """
+    Read-only lemma -> (synonyms, antonyms) index, memory-mapped so forked workers share its pages.
+    Lookups hash the key once and probe a few slots.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a WordNet index of version {VERSION}")
+
+    def lookup(self, word):
+        """
+        Returns (synonyms, antonyms) for `word`, or None if it is not a WordNet lemma.
+        """
+        key = normalize(word).encode("utf-8")
+        key_hash = _hash(key)
+        mask = self.slot_count - 1
+        index = key_hash & mask
+        while True:
+            slot_hash, offset = SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+            if not offset:
+                return None
+            if slot_hash == key_hash:
+                key_length, payload_length = RECORD.unpack_from(self._map, offset)
+                start = offset + RECORD.size
+                if self._map[start:start + key_length] == key:
+                    payload = self._map[start + key_length:start + key_length + payload_length].decode("utf-8")
+                    synonyms, antonyms = payload.split(LIST_SEPARATOR)
+                    return (synonyms.split(ITEM_SEPARATOR) if synonyms else [],
+                            antonyms.split(ITEM_SEPARATOR) if antonyms else [])
+            index = (index + 1) & mask
+
+    def close(self):
+        self._map.close()
+
+
+def _config():
+    config = dict(DEFAULT_CONFIG)
+    if has_app_context():
+        config.update(current_app.config.get("wordnet", {}))
+    return config
+
+
+# Shared index and corpus, opened on first use
+_index = None
+_index_path = None
+_wordnet = None
+_download_attempted = False
+_lock = threading.Lock()
+_wordnet_lock = threading.Lock()
+
+
+def get_wordnet_index():
+    """Get the precomputed index, or None if it has not been built."""
+    global _index, _index_path
+    path = _config()["index_path"]
+    with _lock:
+        if _index_path != path:
+            if _index is not None:
+                _index.close()
+            _index = WordNetIndex(path) if path and os.path.exists(path) else None
+            _index_path = path
+    return _index
+
+
+def get_wordnet():
+    """
+    Get the NLTK WordNet corpus, loading it on first use. Raises LookupError if it is not installed and
+    cannot be downloaded; the download is attempted at most once per process.
+    """
+    global _wordnet, _download_attempted
+    if _wordnet is not None:
+        return _wordnet
+    download = _config()["download"]
+    with _wordnet_lock:
+        if _wordnet is None:
+            import nltk
+            from nltk.corpus import wordnet
+            try:
+                wordnet.synsets  # Any attribute access loads the lazy corpus reader
+            except LookupError:
+                if not download or _download_attempted:
+                    raise
+                _download_attempted = True
+                if not nltk.download("wordnet", quiet=True):
+                    raise
+                wordnet.synsets
+            _wordnet = wordnet
+    return _wordnet
+
+
+def lookup_synonyms_antonyms(word):
+    """
+    (synonyms, antonyms) of `word` from the index, falling back to walking WordNet for words the index
+    does not hold, such as inflected forms.
+    """
+    index = get_wordnet_index()
+    if index is not None:
+        found = index.lookup(word)
+        if found is not None:
+            return found
+    return synonyms_antonyms(get_wordnet(), word)
+
+
+__all__ = ['WordNetIndex', 'build_index', 'synonyms_antonyms', 'lookup_synonyms_antonyms',
+           'get_wordnet_index', 'get_wordnet']
@@ -0,0 +1,93 @@
+"""
+Times the serialization of a card listing with the JSON paths the routes used before BSONJSONProvider
+(bson.json_util, Flask's default provider with an ObjectId hook) and with BSONJSONProvider itself.
+
+    python -m benchmarks.json_benchmark --cards 5000 --repeat 10
+"""
+import argparse
+import datetime
+import json
+import time
+from bson import ObjectId, Decimal128, json_util
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils import json_provider
+from app.utils.json_provider import BSONJSONProvider
+
+
+class ObjectIdJSONProvider(DefaultJSONProvider):
+    """Flask's default provider (sorted keys, ASCII output), taught ObjectId and Decimal128."""
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, Decimal128):
+            return str(obj.to_decimal())
+        return DefaultJSONProvider.default(obj)
+
+
+def make_cards(count):
+    now = datetime.datetime(2024, 5, 1, 12, 30, 15, 123000)
+    return [{
+        "_id": ObjectId(),
+        "card_id": str(ObjectId()),
+        "user_id": str(ObjectId()),
+        "dataset_id": str(ObjectId()),
+        "lexicon_id": str(ObjectId()),
+        "word": f"word{i}",
+        "word_type": "noun",
+        "ipa_transcription": "ˈæpəl",
+        "meaning_en": ["A round fruit with red or green skin", "The tree that bears it"],
+        "meaning_vi": ["Quả táo", "Cây táo"],
+        "example_sentences_en": ["I ate an apple.", "Apples are red."],
+        "example_sentences_vi": ["Tôi đã ăn một quả táo.", "Táo có màu đỏ."],
+        "synonyms": ["malus", "pome"],
+        "antonyms": [],
+        "vocab_family": ["apples", "applesauce"],
+        "audio_url_word": f"/media/audio/{'a' * 64}",
+        "audio_info": {"audio_url_word": {"duration": 0.812, "size": 4096, "format": "opus"}},
+        "ease_factor": Decimal128("2.5"),
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(count)]
+
+
+def measure(label, dumps, cards, repeat):
+    dumps(cards)  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(dumps(cards))
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<34} {elapsed * 1000:8.1f} ms   {size / 1e6:.2f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    app = Flask(__name__)
+    default_provider = ObjectIdJSONProvider(app)
+    provider = BSONJSONProvider(app)
+
+    print(f"Serializing {args.cards} cards, mean of {args.repeat} runs")
+    baseline = measure("bson.json_util.dumps", json_util.dumps, cards, args.repeat)
+    measure("Flask default provider (jsonify)", default_provider.dumps, cards, args.repeat)
+    orjson_module, json_provider.orjson = json_provider.orjson, None
+    try:
+        measure("BSONJSONProvider, stdlib json", provider.dumpb, cards, args.repeat)
+    finally:
+        json_provider.orjson = orjson_module
+    if orjson_module is not None:
+        fastest = measure("BSONJSONProvider, orjson", provider.dumpb, cards, args.repeat)
+        print(f"orjson is {baseline / fastest:.1f}x faster than bson.json_util")
+    # The wire format does not depend on the serializer
+    assert json.loads(provider.dumps(cards[:1])) == json.loads(provider._dumps_stdlib(cards[:1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures cold start: importing the card model and building the app with create_app, each in a fresh
+interpreter, and checks both against the budgets in the "startup" section of config.json.
+
+    python -m benchmarks.startup_benchmark --runs 5 [--env testing] [--skip-create-app]
+
+Exits with status 1 if a median is over budget or a heavy library is loaded at import time.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from app.utils.config import load_config
+
+# Libraries that must only be imported when a request needs them
+HEAVY_MODULES = ("nltk", "gtts", "eng_to_ipa", "requests", "torch", "transformers", "librosa", "soundfile")
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import app.models.card_collection
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "heavy": [m for m in %r if m in sys.modules]}))
+"""
+
+CREATE_APP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app(%r)
+elapsed = time.perf_counter() - start
+app.job_queue.stop()
+print(json.dumps({"ms": elapsed * 1000, "heavy": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure(snippet, runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(result["ms"] for result in results), sorted({m for r in results for m in r["heavy"]})
+
+
+def main():
+    budgets = load_config().get("startup", {})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--env", default="testing")
+    parser.add_argument("--skip-create-app", action="store_true", help="Only measure imports (no database needed)")
+    args = parser.parse_args()
+
+    checks = [("import app.models.card_collection", IMPORT_SNIPPET % (HEAVY_MODULES,),
+               budgets.get("import_budget_ms"))]
+    if not args.skip_create_app:
+        checks.append((f"create_app({args.env!r})", CREATE_APP_SNIPPET % (args.env, HEAVY_MODULES),
+                       budgets.get("create_app_budget_ms")))
+
+    failed = False
+    for label, snippet, budget in checks:
+        median_ms, heavy = measure(snippet, args.runs)
+        over = budget is not None and median_ms > budget
+        failed = failed or over or bool(heavy)
+        print(f"{label}: {median_ms:.0f} ms median over {args.runs} runs"
+              f" (budget {budget if budget is not None else '-'} ms{', OVER' if over else ''})")
+        if heavy:
+            print(f"  heavy modules loaded at startup: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
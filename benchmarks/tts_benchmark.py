@@ -0,0 +1,68 @@
+"""
+Compares per-clip latency of the TTS backends, synthesizing a card's clips one by one and as one batch.
+
+    python -m benchmarks.tts_benchmark --engines stub gtts local --cards 5
+
+The local engine downloads its model on first use; model loading is reported separately from synthesis.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from app.utils.tts import create_tts_backend
+
+# Word + the two example sentences of a card, as build_card synthesizes them
+SAMPLE_CARDS = [
+    ("apple", "She ate a crisp red apple after lunch.", "An apple a day keeps the doctor away."),
+    ("journey", "The journey across the mountains took three days.", "Life is a journey, not a destination."),
+    ("reluctant", "He was reluctant to leave the party early.", "The reluctant witness finally spoke."),
+    ("harvest", "Farmers gather the harvest in the autumn.", "This year's harvest was better than expected."),
+    ("whisper", "She leaned over to whisper a secret.", "The wind seemed to whisper through the trees."),
+]
+
+
+def bench_engine(engine, cards, tmp_dir):
+    backend = create_tts_backend(engine)
+
+    start = time.perf_counter()
+    backend.warm()
+    warm_seconds = time.perf_counter() - start
+
+    sequential, batched = [], []
+    for card_index, texts in enumerate(cards):
+        items = [(text, "en", os.path.join(tmp_dir, f"{engine}-{card_index}-{i}.{backend.extension}"))
+                 for i, text in enumerate(texts)]
+
+        start = time.perf_counter()
+        for item in items:
+            backend.synthesize(*item)
+        sequential.append((time.perf_counter() - start) / len(items))
+
+        start = time.perf_counter()
+        backend.synthesize_batch(items)
+        batched.append((time.perf_counter() - start) / len(items))
+
+    return warm_seconds, statistics.median(sequential), statistics.median(batched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=["stub", "gtts", "local"])
+    parser.add_argument("--cards", type=int, default=len(SAMPLE_CARDS))
+    args = parser.parse_args()
+
+    cards = [SAMPLE_CARDS[i % len(SAMPLE_CARDS)] for i in range(args.cards)]
+    print(f"{'engine':<8} {'warm (s)':>10} {'one by one (ms/clip)':>22} {'batched (ms/clip)':>19}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for engine in args.engines:
+            try:
+                warm, sequential, batched = bench_engine(engine, cards, tmp_dir)
+            except Exception as e:
+                print(f"{engine:<8} unavailable: {e}")
+                continue
+            print(f"{engine:<8} {warm:>10.2f} {sequential * 1000:>22.1f} {batched * 1000:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares synonym/antonym lookups in the precomputed index against walking WordNet synsets.
+
+    python -m scripts.build_wordnet_index
+    python -m benchmarks.wordnet_benchmark --words 5000
+"""
+import argparse
+import random
+import time
+from app.utils.wordnet_index import DEFAULT_CONFIG, WordNetIndex, get_wordnet, synonyms_antonyms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=DEFAULT_CONFIG["index_path"])
+    parser.add_argument("--words", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    wordnet = get_wordnet()
+    lemma_names = list(wordnet.all_lemma_names())
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = WordNetIndex(args.index)
+    open_seconds = time.perf_counter() - start
+
+    words = random.Random(0).sample(lemma_names, min(args.words, len(lemma_names)))
+
+    start = time.perf_counter()
+    walked = [synonyms_antonyms(wordnet, word) for word in words]
+    walk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looked_up = [index.lookup(word) for word in words]
+    index_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(walked, looked_up) if a != b)
+    print(f"WordNet load: {load_seconds * 1000:.0f} ms, index open: {open_seconds * 1000:.2f} ms")
+    print(f"synset walk: {walk_seconds / len(words) * 1e6:.1f} us/word")
+    print(f"index:       {index_seconds / len(words) * 1e6:.1f} us/word "
+          f"({walk_seconds / index_seconds:.0f}x faster, {mismatches} mismatches)")
+
+
+if __name__ == "__main__":
+    main()
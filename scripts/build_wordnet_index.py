@@ -0,0 +1,27 @@
+"""
+Precomputes the lemma -> (synonyms, antonyms) index used by card enrichment (see app.utils.wordnet_index).
+
+    python -m scripts.build_wordnet_index [--output cache/wordnet_index.bin]
+
+Needs the NLTK WordNet corpus, which is downloaded if it is missing. Workers pick the index up on start.
+"""
+import argparse
+import time
+from app.utils.config import load_config
+from app.utils.wordnet_index import DEFAULT_CONFIG, build_index, get_wordnet
+
+
+def main():
+    config = dict(DEFAULT_CONFIG, **load_config().get("wordnet", {}))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=config["index_path"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_index(get_wordnet(), args.output)
+    print(f"Indexed {count} lemmas into {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Creates the indexes declared in app.databases.indexes, replacing those whose definition changed. The
+database is the one the app opens for --env: MongoDB or SQLite, as set by the "storage" section of the
+config or the STORAGE_BACKEND environment variable.
+
+    python -m scripts.ensure_indexes --env development [--dry-run] [--drop-unknown]
+
+Safe to run repeatedly and on every deploy: indexes that already match are left alone. Building a unique
+index fails if the collection holds duplicates; remove them and run the command again.
+"""
+import argparse
+from pymongo.errors import OperationFailure
+from app.databases.db import close_db
+from app.databases.indexes import ensure_indexes
+from app.databases.repository import open_database
+from app.databases.sqlite_store import close_sqlite_databases
+from app.utils.config import load_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", default="development")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the changes")
+    parser.add_argument("--drop-unknown", action="store_true", help="Also drop indexes the registry does not declare")
+    args = parser.parse_args()
+
+    db = open_database(load_config(args.env), args.env)
+    try:
+        actions = ensure_indexes(db, drop_unknown=args.drop_unknown, dry_run=args.dry_run)
+    except OperationFailure as e:
+        parser.exit(1, f"Index migration failed: {e}\n")
+    finally:
+        close_db()
+        close_sqlite_databases()
+
+    for collection, action, name in actions:
+        print(f"{'Would ' + action if args.dry_run else action.capitalize()}: {collection}.{name}")
+    if not actions:
+        print("Indexes are up to date")
+
+
+if __name__ == "__main__":
+    main()
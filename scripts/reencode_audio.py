@@ -0,0 +1,103 @@
+"""
+Re-encodes the existing audio_files/ tree to the configured compact format (see app.utils.audio_encoding)
+in a process pool, then points clips, cards and lexicon entries at the new files and removes the old ones.
+
+    python -m scripts.reencode_audio --env development --workers 4
+
+Files already in the target format are skipped, so the command can be re-run after an interruption.
+Run it while no cards are being created, since a card created mid-run may still receive an old path.
+Cards are dropped from the shared read cache as their paths change; app workers may serve their own
+cached copy of a card for up to read_cache.ttl seconds afterwards.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from app.models.audio_asset import AUDIO_DIR
+from app.utils.audio_encoding import AudioEncoder, get_audio_encoder
+
+AUDIO_FIELDS = ("audio_url_word", "audio_url_example1", "audio_url_example2")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+
+def find_clips(audio_dir, extension):
+    """Clips under `audio_dir` that are not in the target format yet."""
+    for root, _, filenames in os.walk(audio_dir):
+        for filename in sorted(filenames):
+            name, ext = os.path.splitext(filename)
+            if ext in AUDIO_EXTENSIONS and ext != f".{extension}":
+                yield os.path.join(root, filename)
+
+
+def _reencode(task):
+    # Runs in a worker process: only touches files, the database is updated by the parent
+    source, settings = task
+    encoder = AudioEncoder(**settings)
+    target = f"{os.path.splitext(source)[0]}.{encoder.extension}"
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        size_before = os.path.getsize(source)
+        info = encoder.encode(source, tmp_path)
+        os.replace(tmp_path, target)
+        return source, target, size_before, info, None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return source, None, 0, None, str(e)
+
+
+def update_references(db, source, target, info, read_cache=None):
+    db.audio_assets.update_one({"path": source}, {"$set": dict(info, path=target)})
+    for field in AUDIO_FIELDS:
+        card_ids = [card["card_id"] for card in db.vocabulary_cards.find({field: source}, {"card_id": 1})]
+        db.vocabulary_cards.update_many({field: source}, {"$set": {field: target}})
+        db.lexicon.update_many({field: source}, {"$set": {field: target}})
+        if read_cache is not None:
+            # The old file is removed next: drop cached cards still pointing at it
+            for card_id in card_ids:
+                read_cache.invalidate("cards", card_id)
+
+
+def reencode_tree(db, encoder, audio_dir=AUDIO_DIR, workers=None, read_cache=None):
+    """
+    Re-encodes every clip under `audio_dir` with `encoder` and returns a summary of the run. Cards whose
+    paths change are dropped from `read_cache` (and so from its shared tier).
+    """
+    summary = {"converted": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0, "errors": {}}
+    tasks = [(source, encoder.settings()) for source in find_clips(audio_dir, encoder.extension)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for source, target, size_before, info, error in pool.map(_reencode, tasks, chunksize=8):
+            if error:
+                summary["failed"] += 1
+                summary["errors"][source] = error
+                continue
+            update_references(db, source, target, info, read_cache)
+            os.remove(source)
+            summary["converted"] += 1
+            summary["bytes_before"] += size_before
+            summary["bytes_after"] += info["size"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", default="development")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app(args.env)
+    app.job_queue.stop()  # This command does not process background jobs
+    with app.app_context():
+        encoder = get_audio_encoder()
+        if encoder is None:
+            parser.exit(1, "Audio encoding is disabled or no target format is available.\n")
+        summary = reencode_tree(app.db, encoder, workers=args.workers, read_cache=app.read_cache)
+
+    for source, error in summary["errors"].items():
+        print(f"Failed: {source}: {error}")
+    print(f"Re-encoded {summary['converted']} clips ({summary['failed']} failed): "
+          f"{summary['bytes_before']} -> {summary['bytes_after']} bytes")
+
+
+if __name__ == "__main__":
+    main()
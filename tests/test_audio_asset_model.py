@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from app.databases.db import close_db
+from app.models import audio_asset
+from app.models.audio_asset import AudioAsset
+from app.models.card_collection import VocabularyCard
+from app.models.lexicon import Lexicon
+from app import create_app
+
+class TestAudioAssetModel(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.app.db.audio_assets.delete_many({})
+        self.app.db.lexicon.delete_many({})
+        self.app.db.vocabulary_cards.delete_many({})
+
+        # Keep clips out of the working tree and use the offline stub instead of a real TTS engine
+        self.app.config['tts'] = {'engine': 'stub'}
+        self.audio_dir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(audio_asset, 'AUDIO_DIR', self.audio_dir),
+            mock.patch.object(AudioAsset, 'synthesize', wraps=AudioAsset.synthesize),
+        ]
+        self.synthesize = [p.start() for p in self.patches][1]
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.audio_dir)
+        self.app.db.audio_assets.delete_many({})
+        self.app.db.lexicon.delete_many({})
+        self.app.db.vocabulary_cards.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def test_hash_depends_on_text_and_language(self):
+        self.assertEqual(AudioAsset.content_hash("apple"), AudioAsset.content_hash(" apple "))
+        self.assertNotEqual(AudioAsset.content_hash("apple"), AudioAsset.content_hash("apple", language="vi"))
+
+    def test_same_text_is_synthesized_once(self):
+        first = AudioAsset.acquire("I ate an apple.")
+        second = AudioAsset.acquire("I ate an apple.")
+        self.assertEqual(first, second)
+        self.assertEqual(self.synthesize.call_count, 1)
+        self.assertEqual(self.app.db.audio_assets.find_one({"path": first})['ref_count'], 2)
+
+    def test_missing_clips_are_synthesized_in_one_batch(self):
+        AudioAsset.acquire("apple")
+        paths = AudioAsset.acquire_many(["apple", "I ate an apple.", "Apples are red.", "I ate an apple."])
+
+        self.assertEqual(paths[1], paths[3])
+        self.assertTrue(all(path.endswith('.ogg') and os.path.exists(path) for path in paths))
+        # One call for the first clip, then a single batch with only the two new sentences
+        self.assertEqual(self.synthesize.call_count, 2)
+        self.assertEqual(len(self.synthesize.call_args[0][2]), 2)
+        self.assertEqual(self.app.db.audio_assets.find_one({"path": paths[1]})['ref_count'], 2)
+
+    def test_duration_and_size_are_recorded(self):
+        path = AudioAsset.acquire("I ate an apple.")
+        info = AudioAsset.describe_many([path, None])[path]
+        self.assertEqual(info['size'], os.path.getsize(path))
+        self.assertGreater(info['duration'], 0)
+
+    def test_failed_synthesis_releases_its_references(self):
+        existing = AudioAsset.acquire("apple")
+        self.synthesize.side_effect = RuntimeError("TTS down")
+        with self.assertRaises(RuntimeError):
+            AudioAsset.acquire_many(["apple", "I ate an apple."])
+        self.assertEqual(self.app.db.audio_assets.find_one({"path": existing})['ref_count'], 1)
+        self.assertEqual(self.app.db.audio_assets.count_documents({}), 1)
+
+        # The clip can still be freed by its remaining reference
+        self.assertTrue(AudioAsset.release(existing))
+
+    def test_file_is_deleted_with_last_reference(self):
+        path = AudioAsset.acquire("apple")
+        AudioAsset.acquire("apple")
+
+        self.assertFalse(AudioAsset.release(path))
+        self.assertTrue(os.path.exists(path))
+
+        self.assertTrue(AudioAsset.release(path))
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(self.app.db.audio_assets.find_one({"path": path}))
+
+    def ref_count(self, path):
+        asset = self.app.db.audio_assets.find_one({"path": path})
+        return asset["ref_count"] if asset else 0
+
+    def build(self, word):
+        return VocabularyCard.build_card(
+            "user", "dataset", word, meaning_en=["A fruit"], meaning_vi=["Quả táo"], ipa_transcription="/ˈæpəl/",
+            example_sentences_en=["I ate an apple.", "Apples are red."], word_type="noun", vocab_family=["apples"]
+        )
+
+    def test_concurrent_builds_keep_one_reference_on_the_lexicon_clip(self):
+        with mock.patch.object(VocabularyCard, 'get_synonyms_antonyms', return_value=([], [])):
+            self.build("apple")
+            # The second build read the entry before the first one stored its clip
+            with mock.patch.object(Lexicon, 'shared_fields', return_value={}):
+                _, document = self.build("apple")
+
+        path = Lexicon.get_entry("apple")["audio_url_word"]
+        self.assertEqual(self.ref_count(path), 1)
+        self.assertNotIn("audio_url_word", document)
+        # The card's own examples hold their clips
+        self.assertEqual(self.ref_count(document["audio_url_example1"]), 2)
+
+    def test_failed_build_releases_its_clips(self):
+        with mock.patch.object(VocabularyCard, 'get_synonyms_antonyms', side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                self.build("apple")
+        self.assertEqual(self.app.db.audio_assets.count_documents({}), 0)
+
+    def test_updated_card_moves_its_references(self):
+        old, new = AudioAsset.acquire("apple"), AudioAsset.acquire("pear")
+        self.app.db.vocabulary_cards.insert_one({"card_id": "c1", "word": "apple", "audio_url_word": old})
+
+        VocabularyCard.update_card("c1", {"audio_url_word": new})
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(self.ref_count(new), 2)
+        self.assertTrue(AudioAsset.retain(new))
+        self.assertFalse(AudioAsset.retain("audio_files/audio_word_legacy.mp3"))
+
+    def test_release_ignores_unknown_paths(self):
+        self.assertFalse(AudioAsset.release("audio_files/audio_word_legacy.mp3"))
+        self.assertFalse(AudioAsset.release(None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import soundfile
+from app.utils.audio_encoding import AudioEncoder
+from scripts.reencode_audio import find_clips, _reencode
+
+class TestAudioEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # One second of tone between half a second of silence on each side
+        rate = 22050
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(rate) / rate)
+        silence = np.zeros(rate // 2)
+        self.source = os.path.join(self.tmp_dir, 'clip.wav')
+        soundfile.write(self.source, np.concatenate([silence, tone, silence]), rate)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_encode_opus_trims_silence_and_shrinks(self):
+        target = os.path.join(self.tmp_dir, 'clip.ogg')
+        info = AudioEncoder(format='opus', bitrate=24000).encode(self.source, target)
+
+        self.assertEqual(info['format'], 'opus')
+        self.assertAlmostEqual(info['duration'], 1.0, delta=0.1)
+        self.assertEqual(info['size'], os.path.getsize(target))
+        self.assertLess(info['size'], os.path.getsize(self.source) / 5)
+        self.assertEqual(soundfile.info(target).channels, 1)
+
+    def test_lower_bitrate_gives_smaller_file(self):
+        small = AudioEncoder(format='mp3', bitrate=16000).encode(self.source, os.path.join(self.tmp_dir, 'a.mp3'))
+        large = AudioEncoder(format='mp3', bitrate=64000).encode(self.source, os.path.join(self.tmp_dir, 'b.mp3'))
+        self.assertLess(small['size'], large['size'])
+
+    def test_from_config(self):
+        self.assertIsNone(AudioEncoder.from_config({'enabled': False}))
+        encoder = AudioEncoder.from_config({'format': 'opus', 'sample_rate': 22050})
+        self.assertEqual(encoder.sample_rate, 24000)  # Opus only supports a few sample rates
+        with self.assertRaises(ValueError):
+            AudioEncoder.from_config({'format': 'flac'})
+
+    def test_reencode_task_replaces_extension(self):
+        encoder = AudioEncoder(format='opus')
+        self.assertEqual(list(find_clips(self.tmp_dir, encoder.extension)), [self.source])
+
+        source, target, size_before, info, error = _reencode((self.source, encoder.settings()))
+        self.assertIsNone(error)
+        self.assertEqual(target, os.path.join(self.tmp_dir, 'clip.ogg'))
+        self.assertTrue(os.path.exists(target))
+        self.assertEqual(list(find_clips(self.tmp_dir, encoder.extension)), [self.source])  # Parent removes the source
+
+if __name__ == '__main__':
+    unittest.main()
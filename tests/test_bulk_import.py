@@ -0,0 +1,100 @@
+import io
+import threading
+import time
+import unittest
+from app.utils.bulk_import import (BulkImport, detect_format, dedupe_rows, enrich_rows, normalize_rows, parse_rows,
+                                   prefetch_rows, text_lines)
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+def lines(text):
+    return text_lines(io.BytesIO(text.encode('utf-8')))
+
+class TestBulkImportPipeline(unittest.TestCase):
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format(filename="words.CSV"), "csv")
+        self.assertEqual(detect_format(content_type="application/x-ndjson"), "jsonl")
+        self.assertEqual(detect_format(content_type="text/plain"), "words")
+        self.assertEqual(detect_format("jsonl", "text/csv"), "jsonl")
+        with self.assertRaises(ValueError):
+            detect_format("xml")
+
+    def test_parse_csv_with_optional_fields(self):
+        rows = list(parse_rows(lines("word,word_type\napple,noun\nbanana,\n"), "csv"))
+        self.assertEqual(rows, [(2, {"word": "apple", "word_type": "noun"}), (3, {"word": "banana"})])
+
+    def test_parse_jsonl_reports_bad_lines(self):
+        rows = list(parse_rows(lines('{"word": "apple"}\n{bad\n"banana"\n'), "jsonl"))
+        self.assertEqual(rows[0], (1, {"word": "apple"}))
+        self.assertIsInstance(rows[1][1], Exception)
+        self.assertEqual(rows[2], (3, {"word": "banana"}))
+
+    def test_normalize_and_dedupe(self):
+        rows = [(1, {"word": "  Apple  pie ", "user_id": "ignored"}), (2, {"word": ""}), (3, {"word": "apple PIE"})]
+        result = list(dedupe_rows(normalize_rows(rows), key=str.lower, seen={"banana"}))
+        self.assertEqual(result[0], (1, {"word": "Apple pie"}))
+        self.assertIsInstance(result[1][1], Exception)
+        self.assertIsInstance(result[2][1], Exception)
+
+    def test_prefetch_rows_once_per_chunk(self):
+        batches = []
+        rows = [(1, {"word": "a"}), (2, ValueError("bad")), (3, {"word": "b"}), (4, {"word": "c"})]
+        result = list(prefetch_rows(iter(rows), batches.append, chunk_size=3))
+        self.assertEqual(result, rows)
+        self.assertEqual(batches, [[{"word": "a"}, {"word": "b"}], [{"word": "c"}]])
+
+    def test_enrich_rows_is_bounded_and_ordered(self):
+        in_flight = []
+        active = [0]
+        lock = threading.Lock()
+
+        def enrich(row):
+            with lock:
+                active[0] += 1
+                in_flight.append(active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return row["word"].upper()
+
+        rows = ((i, {"word": f"w{i}"}) for i in range(20))
+        result = list(enrich_rows(rows, enrich, concurrency=3))
+        self.assertEqual([r[2] for r in result], [f"W{i}" for i in range(20)])
+        self.assertLessEqual(max(in_flight), 3)
+
+    def test_bulk_import_inserts_in_chunks_and_reports_failures(self):
+        def enrich(row):
+            if row["word"] == "boom":
+                raise RuntimeError("LLM unavailable")
+            return {"word": row["word"]}
+
+        collection = FakeCollection()
+        importer = BulkImport(collection, enrich, key=str.lower, chunk_size=2, progress_every=100)
+        events = list(importer.run(lines("a\nb\nboom\nc\nA\n"), "words"))
+
+        self.assertEqual([len(batch) for batch in collection.batches], [2, 1])
+        errors = [e for e in events if e["event"] == "error"]
+        self.assertEqual([(e["line"], e["word"]) for e in errors], [(3, "boom"), (5, "A")])
+        self.assertEqual(events[-1], {"event": "done", "processed": 5, "inserted": 3, "failed": 2})
+
+    def test_documents_that_cannot_be_inserted_are_discarded(self):
+        class RejectingCollection(FakeCollection):
+            def insert_many(self, documents, ordered=True):
+                error = RuntimeError("duplicate key")
+                error.details = {"writeErrors": [{"index": 1}]}
+                raise error
+
+        discarded = []
+        importer = BulkImport(RejectingCollection(), lambda row: {"word": row["word"]}, key=str.lower,
+                              discard=discarded.append)
+        list(importer.run(lines("a\nb\n"), "words"))
+        self.assertEqual(discarded, [{"word": "b"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 import unittest
 from datetime import datetime
 from bson import ObjectId
+from unittest import mock
 
 from app.databases.db import close_db
 from app.models.card_collection import VocabularyCard
+from app.models.user_progress import UserProgress
 from app import create_app
 
 class TestVocabularyCardModel(unittest.TestCase):
@@ -208,5 +210,56 @@ class TestVocabularyCardModel(unittest.TestCase):
         self.assertEqual(cards[0]['word'], "apple")
         self.assertEqual(cards[1]['word'], "banana")
 
+    def test_views_return_only_their_fields(self):
+        lexicon_id = self.test_db.lexicon.insert_one(
+            {"lemma": "pear", "word_type": "noun", "meaning_en": "A fruit"}
+        ).inserted_id
+        self.test_db.vocabulary_cards.insert_one({
+            "card_id": "pear-card", "user_id": str(self.user_id), "dataset_id": str(self.dataset_id),
+            "word": "pear", "lexicon_id": str(lexicon_id), "meaning_vi": "Quả lê"
+        })
+
+        fields = VocabularyCard.requested_fields("summary")
+        card = VocabularyCard.get_card_by_id("pear-card", fields)
+        self.assertEqual(card, {"card_id": "pear-card", "word": "pear", "word_type": "noun"})
+
+        fields = VocabularyCard.requested_fields("summary", "meaning_vi, meaning_en")
+        cards, _ = VocabularyCard.get_cards_page({"dataset_id": str(self.dataset_id)}, 10, fields=fields)
+        self.assertEqual(cards[0]["meaning_en"], "A fruit")
+        self.assertEqual(cards[0]["meaning_vi"], "Quả lê")
+        self.assertNotIn("lexicon_id", cards[0])
+
+        self.assertIsNone(VocabularyCard.requested_fields("full"))
+        self.assertIn("lexicon_id", VocabularyCard.get_card_by_id("pear-card"))
+        self.test_db.lexicon.delete_many({"lemma": "pear"})
+
+    def test_card_and_progress_are_written_together(self):
+        self.test_db.user_progress.delete_many({})
+        card_id = str(ObjectId())
+        document = {"_id": ObjectId(card_id), "card_id": card_id, "user_id": str(self.user_id), "word": "plum"}
+        progress = UserProgress(str(self.user_id), card_id, str(self.dataset_id)).to_dict()
+
+        VocabularyCard.insert_card(document, progress)
+        self.assertIsNotNone(self.test_db.vocabulary_cards.find_one({"card_id": card_id}))
+        self.assertEqual(self.test_db.user_progress.find_one({"card_id": card_id})["status"], "new")
+        self.test_db.user_progress.delete_many({})
+
+    def test_card_is_removed_if_its_progress_cannot_be_written(self):
+        card_id = str(ObjectId())
+        document = {"_id": ObjectId(card_id), "card_id": card_id, "user_id": str(self.user_id), "word": "plum"}
+        progress = UserProgress(str(self.user_id), card_id, str(self.dataset_id)).to_dict()
+
+        with mock.patch.object(self.test_db.client, 'start_session', side_effect=NotImplementedError), \
+                mock.patch.object(type(self.test_db.user_progress), 'insert_one', side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                VocabularyCard.insert_card(document, progress)
+        self.assertIsNone(self.test_db.vocabulary_cards.find_one({"card_id": card_id}))
+
+    def test_unknown_view_or_field_is_rejected(self):
+        with self.assertRaises(ValueError):
+            VocabularyCard.requested_fields("compact")
+        with self.assertRaises(ValueError):
+            VocabularyCard.requested_fields(fields="word,password")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
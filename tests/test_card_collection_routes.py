@@ -1,6 +1,10 @@
 import unittest
+from unittest import mock
 from flask import json
+from flask_jwt_extended import JWTManager, create_access_token
 from app import create_app
+from app.models.card_collection import VocabularyCard
+from app.models.lexicon import Lexicon
 from app.databases.db import close_db  # Import close_db for cleanup
 
 class TestVocabularyCardRoutes(unittest.TestCase):
@@ -89,5 +93,107 @@ class TestVocabularyCardRoutes(unittest.TestCase):
         response = self.client.delete(f'/cards/{self.card_id}')
         self.assertEqual(response.status_code, 204)
 
+class TestGenerateFieldsRoute(unittest.TestCase):
+    """/cards/generate, authenticated and with the LLM and speech synthesis replaced, so it runs offline."""
+
+    CLIP = f"audio_files/{'a' * 64}.ogg"
+
+    COMBINED_ANSWER = json.dumps({
+        "meaning_en": ["A word used in tests (Testing) - This is a testword."],
+        "meaning_vi": ["Một từ dùng để thử (Kiểm thử) - Đây là một testword."],
+        "example_sentences_en": ["We checked the testword.", "The testword appears twice."],
+        "word_type": "noun",
+        "vocab_family": ["Testwords (noun)"],
+    })
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+        # Authenticate the test client: the route is behind login_required
+        self.app.config['JWT_SECRET_KEY'] = self.app.config['SECRET_KEY']
+        JWTManager(self.app)
+        self.client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity='test_user_id')}"
+
+        patches = [
+            mock.patch.object(VocabularyCard, 'query_lm_studio', return_value=self.COMBINED_ANSWER),
+            mock.patch.object(VocabularyCard, 'generate_speech', return_value=self.CLIP),
+            mock.patch.object(VocabularyCard, 'get_synonyms_antonyms', return_value=(["exam"], [])),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.app.db.lexicon.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def events(self, response, stream):
+        if stream == "sse":
+            return [json.loads(line[len("data: "):]) for line in response.data.decode().splitlines()
+                    if line.startswith("data: ")]
+        return [json.loads(line) for line in response.data.decode().splitlines()]
+
+    def test_generate_fields_stream(self):
+        for stream, mimetype in [("ndjson", "application/x-ndjson"), ("sse", "text/event-stream")]:
+            with self.subTest(stream=stream):
+                self.app.db.lexicon.delete_many({})
+                # Fields arrive as events, ending with a "done" event
+                response = self.client.post('/cards/generate', json={"word": "testword"}, headers={"Accept": mimetype})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.mimetype, mimetype)
+                self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+                events = self.events(response, stream)
+                self.assertEqual(events[-1]['event'], 'done')
+                fields = {event['field']: event['value'] for event in events if event['event'] == 'field'}
+                self.assertEqual(fields['word_type'], "noun")
+                self.assertEqual(fields['synonyms'], ["exam"])
+                self.assertEqual(fields['audio_url'], f"/media/audio/{'a' * 64}")
+                self.assertIn('ipa_transcription', fields)
+
+                # Generated fields are stored on the lexicon entry for the next card of the word
+                self.assertEqual(Lexicon.get_entry("testword")['audio_url_word'], self.CLIP)
+                self.assertEqual(Lexicon.get_entry("testword")['word_type'], "noun")
+
+    def test_generate_fields_twice_for_a_word_without_antonyms(self):
+        self.app.config['tts'] = {'engine': 'stub'}
+        for _ in range(2):
+            response = self.client.post('/cards/generate', json={"word": "testword"})
+            self.assertEqual(response.status_code, 200, msg=response.data.decode())
+            self.assertEqual((response.json['synonyms'], response.json['antonyms']), (["exam"], []))
+        # "No antonyms" is stored, so the second request did not look the word up again
+        self.assertEqual(Lexicon.get_entry("testword")['antonyms'], [])
+        self.assertEqual(VocabularyCard.get_synonyms_antonyms.call_count, 1)
+
+class TestBulkImportRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+        self.app.config['JWT_SECRET_KEY'] = self.app.config['SECRET_KEY']
+        JWTManager(self.app)
+        self.client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity='test_user_id')}"
+
+    def tearDown(self):
+        self.app.db.datasets.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def test_malformed_dataset_id_is_rejected(self):
+        response = self.client.post('/datasets/not-an-id/cards/bulk', data="apple\n", content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_the_owner_can_import(self):
+        dataset_id = self.app.db.datasets.insert_one({"user_id": "other_user_id", "name": "Fruit"}).inserted_id
+        response = self.client.post(f'/datasets/{dataset_id}/cards/bulk', data="apple\n", content_type='text/plain')
+        self.assertEqual(response.status_code, 403)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import unittest
 from flask import json
+from flask_jwt_extended import JWTManager, create_access_token
 from bson import ObjectId
 from datetime import datetime
 from app import create_app
@@ -23,6 +24,11 @@ class TestDatasetCollectionRoutes(unittest.TestCase):
         self.dataset_name = "Test Dataset"
         self.dataset_description = "This is a test dataset."
 
+        # Authenticate the test client as the test user: the routes are behind login_required
+        self.app.config['JWT_SECRET_KEY'] = self.app.config['SECRET_KEY']
+        JWTManager(self.app)
+        self.client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity=self.user_id)}"
+
         # Create a test dataset
         self.test_dataset_data = {
             "user_id": self.user_id,
@@ -136,5 +142,15 @@ class TestDatasetCollectionRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertIn("Dataset not found", response.data.decode())
 
+    def test_get_all_datasets_as_ndjson(self):
+        self.client.post('/datasets', json=dict(self.test_dataset_data, name="Second Dataset"))
+        response = self.client.get(f'/datasets?user_id={self.user_id}&batch_size=1',
+                                   headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        datasets = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([d['name'] for d in datasets], [self.dataset_name, "Second Dataset"])
+        self.assertEqual(datasets[0]['_id'], self.dataset_id)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
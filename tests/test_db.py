@@ -0,0 +1,84 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from app.databases import db
+from app.databases.db import PoolStats, available_compressors, close_db, get_database, get_db, get_test_db, pool_stats
+
+CONFIG = {
+    "mongodb": {
+        "uri": "mongodb://localhost:27017/",
+        "database": "main_db",
+        "test_uri": "mongodb://localhost:27017/",
+        "test_database": "test_db",
+        "client": {"maxPoolSize": 20, "compressors": ["zlib"]},
+        "tenants": {
+            "acme": {"uri": "mongodb://localhost:27017/", "database": "acme_db"},
+            "reports": {
+                "uri": "mongodb://localhost:27017/",
+                "database": "acme_db",
+                "client": {"maxPoolSize": 5, "readPreference": "secondaryPreferred"}
+            }
+        }
+    }
+}
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        # Clients connect lazily, so no server is needed
+        self.patch = mock.patch.object(db, 'load_config', lambda env=None: CONFIG)
+        self.patch.start()
+        close_db()
+
+    def tearDown(self):
+        close_db()
+        self.patch.stop()
+
+    def test_main_and_test_databases_are_separate(self):
+        self.assertEqual(get_db().name, "main_db")
+        self.assertEqual(get_test_db().name, "test_db")
+        self.assertEqual(get_db().name, "main_db")
+
+    def test_clients_are_shared_by_identical_settings(self):
+        self.assertIs(get_database("acme").client, get_db().client)
+        self.assertIsNot(get_database("reports").client, get_db().client)
+        self.assertEqual(get_database("reports").name, "acme_db")
+
+    def test_client_options_are_applied(self):
+        client = get_database("reports").client
+        self.assertEqual(client.options.pool_options.max_pool_size, 5)
+        self.assertEqual(client.read_preference.mongos_mode, "secondaryPreferred")
+        self.assertEqual(get_db().client.options.pool_options.max_pool_size, 20)
+
+    def test_close_keeps_clients_still_in_use(self):
+        main_client = get_db().client
+        get_database("acme")
+        close_db("acme")
+        self.assertIs(get_db().client, main_client)
+        self.assertEqual(list(pool_stats()), ["default"])
+
+    def test_unavailable_compressors_are_skipped(self):
+        with mock.patch('importlib.util.find_spec', lambda name: None if name == 'snappy' else object()):
+            with self.assertLogs('app.databases.db', level='WARNING') as logs:
+                self.assertEqual(available_compressors("snappy, zstd,zlib,lz4"), ["zstd", "zlib"])
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("snappy", logs.output[0])
+
+    def test_pool_stats(self):
+        stats = PoolStats(max_pool_size=4)
+        event = SimpleNamespace(address=("localhost", 27017), duration=0.002)
+        stats.connection_created(event)
+        stats.connection_checked_out(event)
+        stats.connection_checked_out(event)
+        stats.connection_checked_in(event)
+        stats.connection_check_out_failed(event)
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["in_use"], 1)
+        self.assertEqual(snapshot["peak_in_use"], 2)
+        self.assertEqual(snapshot["utilization"], 0.25)
+        self.assertEqual(snapshot["open"], 1)
+        self.assertEqual(snapshot["checkout_failures"], 1)
+        self.assertEqual(snapshot["avg_wait_ms"], 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import time
+import unittest
+from app.utils.enrichment import EnrichmentExecutor
+
+def slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+class TestEnrichmentExecutor(unittest.TestCase):
+
+    def test_steps_run_concurrently(self):
+        # Five 0.2s steps should finish in roughly the time of one
+        with EnrichmentExecutor(max_workers=5, limits={"llm": 5}) as executor:
+            for i in range(5):
+                executor.submit(f"step{i}", slow, i, group="llm")
+            results = executor.results()
+            timings = executor.timing_breakdown()
+
+        self.assertEqual(results, {f"step{i}": i for i in range(5)})
+        self.assertLess(timings["total"], 0.6)
+        for i in range(5):
+            self.assertGreaterEqual(timings[f"step{i}"], 0.2)
+
+    def test_group_limit_bounds_concurrency(self):
+        # Only two "llm" steps may run at once, so four steps take two rounds
+        with EnrichmentExecutor(max_workers=4, limits={"llm": 2}) as executor:
+            for i in range(4):
+                executor.submit(f"step{i}", slow, i, group="llm")
+            executor.results()
+            timings = executor.timing_breakdown()
+
+        self.assertGreaterEqual(timings["total"], 0.4)
+
+    def test_group_limit_is_shared_by_executors(self):
+        # Two cards enriched at once share the process-wide limit of three "llm" steps
+        with EnrichmentExecutor(max_workers=4, limits={"llm": 3}) as first, \
+                EnrichmentExecutor(max_workers=4, limits={"llm": 3}) as second:
+            for i in range(3):
+                first.submit(f"step{i}", slow, i, group="llm")
+                second.submit(f"step{i}", slow, i, group="llm")
+            first.results()
+            second.results()
+            timings = second.timing_breakdown()
+
+        self.assertGreaterEqual(timings["total"], 0.4)
+
+    def test_dependent_step_starts_after_dependency(self):
+        with EnrichmentExecutor(max_workers=2) as executor:
+            executor.submit("examples", slow, ["First.", "Second."], 0.1)
+            executor.then("examples", "first_example", lambda examples: examples[0])
+            results = executor.results()
+
+        self.assertEqual(results["first_example"], "First.")
+
+    def test_dependent_step_receives_dependency_error(self):
+        def fail(word):
+            raise ValueError(word)
+
+        with EnrichmentExecutor(max_workers=2) as executor:
+            executor.submit("examples", fail, "apple")
+            executor.then("examples", "first_example", lambda examples: examples[0])
+            with self.assertRaises(ValueError):
+                executor.result("first_example")
+
+    def test_as_completed_yields_in_finishing_order(self):
+        def fail():
+            raise ValueError("no examples")
+
+        with EnrichmentExecutor(max_workers=3) as executor:
+            executor.submit("slow", slow, "late", 0.3)
+            executor.submit("fast", slow, "early", 0.05)
+            executor.submit("broken", fail)
+            events = list(executor.as_completed())
+
+        self.assertEqual([name for name, _, _ in events][-1], "slow")
+        self.assertIn(("fast", "early", None), events)
+        broken = [error for name, _, error in events if name == "broken"][0]
+        self.assertIsInstance(broken, ValueError)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pymongo.database import Database as MongoDatabase
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from app import create_app
+from app.databases.db import close_db
+from app.databases.indexes import INDEXES, ensure_indexes, plan_indexes
+from app.databases.sqlite_store import open_sqlite_database, close_sqlite_databases
+from scripts import ensure_indexes as ensure_indexes_script
+
+# Plan stages that read through an index rather than scanning the collection
+INDEX_STAGES = {"IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "EXPRESS_IDHACK", "COUNT_SCAN", "DISTINCT_SCAN"}
+
+# (collection, filter) of the queries issued by the routes and models
+ROUTE_QUERIES = [
+    ("users", {"username": "testuser"}),
+    ("users", {"email": "test@example.com"}),
+    ("users", {"user_id": "user"}),
+    ("vocabulary_cards", {"card_id": "card"}),
+    ("vocabulary_cards", {"user_id": "user"}),
+    ("vocabulary_cards", {"dataset_id": "dataset"}),
+    ("datasets", {"user_id": "user", "name": "Dataset"}),
+    ("datasets", {"user_id": "user"}),
+    ("user_progress", {"user_id": "user"}),
+    ("settings", {"user_id": "user"}),
+    ("lexicon", {"lemma": "apple"}),
+    ("audio_assets", {"path": {"$in": ["audio_files/a.ogg", "audio_files/b.ogg"]}}),
+    ("jobs", {"job_id": "job"}),
+]
+
+def plan_stages(plan):
+    stages = [plan.get("stage")]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages += plan_stages(child)
+    return stages
+
+class TestIndexes(unittest.TestCase):
+    """
+    The test suite runs on the SQLite backend (config_testing.json), where explain() reports SQLite's plan.
+    Run it with STORAGE_BACKEND=mongodb to check the plans of the MongoDB test database instead.
+    """
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.db = self.app.db
+        for collection in INDEXES:
+            self.db[collection].drop_indexes()
+        ensure_indexes(self.db)
+
+    def tearDown(self):
+        self.db.users.delete_many({"username": "testuser"})
+        close_db()
+        self.app_context.pop()
+
+    def test_route_queries_use_an_index(self):
+        for collection, query in ROUTE_QUERIES:
+            with self.subTest(collection=collection, query=query):
+                winning_plan = self.db[collection].find(query).explain()["queryPlanner"]["winningPlan"]
+                # Servers running the slot-based engine nest the classic plan under "queryPlan"
+                stages = plan_stages(winning_plan.get("queryPlan", winning_plan))
+                self.assertNotIn("COLLSCAN", stages)
+                self.assertTrue(INDEX_STAGES & set(stages), msg=f"Plan stages: {stages}")
+
+    def test_ensure_indexes_is_idempotent(self):
+        self.assertEqual(plan_indexes(self.db), [])
+        self.assertEqual(ensure_indexes(self.db), [])
+
+    def test_changed_definition_is_replaced(self):
+        self.db.settings.drop_index("user_id")
+        self.db.settings.create_index([("user_id", ASCENDING)], name="user_id", sparse=True)
+        self.db.users.create_index([("created_at", ASCENDING)], name="created_at")
+
+        self.assertEqual(ensure_indexes(self.db), [("settings", "replace", "user_id")])
+        self.assertNotIn("sparse", self.db.settings.index_information()["user_id"])
+
+        self.assertEqual(ensure_indexes(self.db, drop_unknown=True), [("users", "drop", "created_at")])
+        self.assertNotIn("created_at", self.db.users.index_information())
+
+    def test_username_and_email_are_unique(self):
+        self.db.users.insert_one({"username": "testuser", "email": "test@example.com"})
+        with self.assertRaises(DuplicateKeyError):
+            self.db.users.insert_one({"username": "testuser", "email": "other@example.com"})
+        with self.assertRaises(DuplicateKeyError):
+            self.db.users.insert_one({"username": "other", "email": "test@example.com"})
+        self.db.users.delete_many({"username": "other"})
+
+    @unittest.skipUnless(os.environ.get("STORAGE_BACKEND") == "mongodb", "set STORAGE_BACKEND=mongodb to run against MongoDB")
+    def test_runs_against_mongodb(self):
+        # The opt-in run checks real server plans, transactions and aggregations, not the SQLite emulation
+        self.assertIsInstance(self.db, MongoDatabase)
+
+class TestEnsureIndexesScript(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "store.sqlite3")
+
+    def tearDown(self):
+        close_sqlite_databases()
+        shutil.rmtree(self.directory)
+
+    def test_uses_the_configured_storage_backend(self):
+        config = {"storage": {"backend": "sqlite", "sqlite_path": self.path}}
+        with mock.patch.object(ensure_indexes_script, 'load_config', return_value=config), \
+                mock.patch('sys.argv', ['ensure_indexes', '--env', 'production']), mock.patch('builtins.print'):
+            ensure_indexes_script.main()
+        self.assertIn("username_unique", open_sqlite_database(self.path).users.index_information())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from unittest import mock
+import eng_to_ipa
+from app.utils.ipa import IPAService
+
+class TestIPAService(unittest.TestCase):
+    WORDS = ["apple", "Hello, world!", "ice cream", "don't", "reluctant"]
+
+    def test_matches_eng_to_ipa(self):
+        for preload in (False, True):
+            service = IPAService(preload=preload)
+            self.assertEqual(service.convert_many(self.WORDS), [eng_to_ipa.convert(word) for word in self.WORDS])
+            service.close()
+
+    def test_batch_uses_one_dictionary_lookup(self):
+        service = IPAService()
+        with mock.patch.object(service, '_phonemes', wraps=service._phonemes) as phonemes:
+            service.convert_many(self.WORDS)
+            service.convert_many(self.WORDS)
+        self.assertEqual(phonemes.call_count, 1)  # The second batch is served from the cache
+        self.assertEqual(service.stats()['hits'], len(self.WORDS))
+        service.close()
+
+    def test_cache_is_bounded(self):
+        service = IPAService(cache_size=2)
+        service.convert_many(["apple", "banana", "cherry"])
+        self.assertEqual(service.stats()['entries'], 2)
+        service.convert("apple")
+        self.assertEqual(service.stats()['hits'], 0)  # Evicted as the least recently used
+        service.close()
+
+    def test_out_of_vocabulary_words(self):
+        service = IPAService(fallback={"Staycation": "steɪˈkeɪʃən"})
+        self.assertEqual(service.convert("staycation"), "steɪˈkeɪʃən")
+        self.assertEqual(service.convert("my staycation"), "maɪ steɪˈkeɪʃən")
+        self.assertEqual(service.convert("glorptastic"), "glorptastic*")
+        self.assertEqual(service.stats()['out_of_vocabulary'], {"glorptastic": 1})
+        service.close()
+
+if __name__ == '__main__':
+    unittest.main()
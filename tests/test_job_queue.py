@@ -0,0 +1,90 @@
+import datetime
+import unittest
+from app.databases.db import close_db
+from app.utils.job_queue import register_handler, QUEUED, RUNNING, SUCCEEDED, FAILED
+from app import create_app
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        # Create the Flask app with the testing environment (no worker threads are started)
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.queue = self.app.job_queue
+        self.queue.retry_backoff = 0
+        self.app.db.jobs.delete_many({})
+
+        self.calls = []
+        register_handler('test_echo', self.echo)
+        register_handler('test_fail', self.fail)
+
+    def tearDown(self):
+        self.app.db.jobs.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def echo(self, payload):
+        self.calls.append(payload)
+        return {"echo": payload["value"]}
+
+    def fail(self, payload):
+        self.calls.append(payload)
+        raise RuntimeError("boom")
+
+    def test_enqueue_and_process(self):
+        job_id = self.queue.enqueue('test_echo', {"value": 42})
+        self.assertEqual(self.queue.get(job_id)['status'], QUEUED)
+
+        self.assertTrue(self.queue.process_one())
+        job = self.queue.get(job_id)
+        self.assertEqual(job['status'], SUCCEEDED)
+        self.assertEqual(job['result'], {"echo": 42})
+        self.assertEqual(job['attempts'], 1)
+
+        # Nothing left to do
+        self.assertFalse(self.queue.process_one())
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job_id = self.queue.enqueue('test_fail', {"value": 1}, max_attempts=2)
+
+        self.queue.process_one()
+        self.assertEqual(self.queue.get(job_id)['status'], QUEUED)
+
+        self.queue.process_one()
+        job = self.queue.get(job_id)
+        self.assertEqual(job['status'], FAILED)
+        self.assertEqual(job['error'], "boom")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_job_with_expired_lease_is_recovered(self):
+        job_id = self.queue.enqueue('test_echo', {"value": 7})
+
+        # Simulate a worker that claimed the job and crashed
+        job = self.queue.claim()
+        self.assertEqual(job['status'], RUNNING)
+        self.app.db.jobs.update_one(
+            {"_id": job['_id']},
+            {"$set": {"lease_expires_at": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)}}
+        )
+
+        self.assertTrue(self.queue.process_one())
+        job = self.queue.get(job_id)
+        self.assertEqual(job['status'], SUCCEEDED)
+        self.assertEqual(job['attempts'], 2)
+
+    def test_stale_worker_cannot_overwrite_outcome(self):
+        self.queue.enqueue('test_echo', {"value": 1})
+        stale = self.queue.claim()
+        self.app.db.jobs.update_one(
+            {"_id": stale['_id']},
+            {"$set": {"lease_expires_at": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)}}
+        )
+        current = self.queue.claim()
+
+        # The worker that lost its lease finishes late; its outcome is ignored
+        self.queue.run_job(dict(stale, type='test_fail'))
+        self.assertEqual(self.queue.get(current['job_id'])['status'], RUNNING)
+
+if __name__ == '__main__':
+    unittest.main()
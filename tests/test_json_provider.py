@@ -0,0 +1,55 @@
+import json
+import decimal
+import datetime
+import unittest
+from unittest import mock
+from bson import ObjectId, Decimal128
+from flask import Flask, jsonify, request
+from app.utils import json_provider
+from app.utils.json_provider import BSONJSONProvider
+
+class TestBSONJSONProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = BSONJSONProvider(self.app)
+        self.document = {
+            "_id": ObjectId("65f0c0ffee0000000000abcd"),
+            "created_at": datetime.datetime(2024, 5, 1, 12, 30, 15, 123000),
+            "reviewed_at": datetime.datetime(2024, 5, 1, 19, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=7))),
+            "ease_factor": Decimal128("2.50"),
+            "price": decimal.Decimal("0.10"),
+            "word": "táo",
+            "counts": {1: "one"},
+        }
+        self.expected = {
+            "_id": "65f0c0ffee0000000000abcd",
+            # Naive datetimes are UTC and carry their offset, so browsers do not read them as local time
+            "created_at": "2024-05-01T12:30:15.123000+00:00",
+            "reviewed_at": "2024-05-01T19:30:00+07:00",
+            "ease_factor": "2.50",
+            "price": "0.10",
+            "word": "táo",
+            "counts": {"1": "one"},
+        }
+
+    def test_bson_types_have_one_wire_format(self):
+        self.assertEqual(json.loads(self.app.json.dumps(self.document)), self.expected)
+        # Same output without orjson
+        with mock.patch.object(json_provider, 'orjson', None):
+            self.assertEqual(json.loads(self.app.json.dumps(self.document)), self.expected)
+
+    def test_unknown_types_are_rejected(self):
+        with self.assertRaises(TypeError):
+            self.app.json.dumps({"value": object()})
+
+    def test_jsonify_and_get_json(self):
+        @self.app.route('/echo', methods=['POST'])
+        def echo():
+            return jsonify(dict(request.get_json(), _id=self.document["_id"]))
+
+        response = self.app.test_client().post('/echo', json={"word": "táo"})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_json(), {"word": "táo", "_id": "65f0c0ffee0000000000abcd"})
+
+if __name__ == '__main__':
+    unittest.main()
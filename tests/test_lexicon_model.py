@@ -0,0 +1,60 @@
+import unittest
+from app.databases.db import close_db
+from app.models.lexicon import Lexicon
+from app import create_app
+
+class TestLexiconModel(unittest.TestCase):
+    def setUp(self):
+        # Create the Flask app with the testing environment
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        # Clear collections in the test database
+        self.test_db = self.app.db
+        self.test_db.lexicon.delete_many({})
+
+    def tearDown(self):
+        self.test_db.lexicon.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def test_normalize(self):
+        self.assertEqual(Lexicon.normalize("  Ice   Cream "), "ice cream")
+        self.assertEqual(Lexicon.normalize("APPLE"), Lexicon.normalize("apple"))
+
+    def test_get_or_create_entry_is_shared_by_lemma(self):
+        first = Lexicon.get_or_create_entry("Apple")
+        second = Lexicon.get_or_create_entry(" apple ")
+        self.assertEqual(first["_id"], second["_id"])
+        self.assertEqual(self.test_db.lexicon.count_documents({}), 1)
+
+    def test_save_fields_only_writes_shared_fields(self):
+        entry = Lexicon.get_or_create_entry("apple")
+        Lexicon.save_fields(str(entry["_id"]), {"word_type": "noun", "user_id": "someone"})
+
+        saved = Lexicon.get_entry("apple")
+        self.assertEqual(saved["word_type"], "noun")
+        self.assertNotIn("user_id", saved)
+
+    def test_save_fields_skips_failed_generations(self):
+        entry = Lexicon.get_or_create_entry("apple")
+        Lexicon.save_fields(str(entry["_id"]), {"word_type": "", "meaning_en": None, "antonyms": []})
+        # An empty list is a result ("none found"), not a failure
+        self.assertEqual(Lexicon.shared_fields(Lexicon.get_entry("apple")), {"antonyms": []})
+
+    def test_resolve_cards_prefers_card_overrides(self):
+        entry = Lexicon.get_or_create_entry("apple")
+        lexicon_id = str(entry["_id"])
+        Lexicon.save_fields(lexicon_id, {"word_type": "noun", "meaning_en": ["A fruit"]})
+
+        cards = Lexicon.resolve_cards([
+            {"card_id": "1", "word": "apple", "lexicon_id": lexicon_id},
+            {"card_id": "2", "word": "apple", "lexicon_id": lexicon_id, "meaning_en": ["My own meaning"]},
+        ])
+        self.assertEqual(cards[0]["meaning_en"], ["A fruit"])
+        self.assertEqual(cards[1]["meaning_en"], ["My own meaning"])
+        self.assertEqual(cards[1]["word_type"], "noun")
+
+if __name__ == '__main__':
+    unittest.main()
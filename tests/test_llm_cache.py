@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import json
+import unittest
+from unittest import mock
+from app import create_app
+from app.models import card_collection
+from app.models.card_collection import VocabularyCard
+from app.utils.llm_cache import LLMCache, cache_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'llm_cache.sqlite3')
+        self.clock = FakeClock()
+        self.cache = LLMCache(path=self.path, memory_entries=2, max_bytes=10_000, ttl=60, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_depends_on_every_input(self):
+        base = cache_key("apple", "model-a", 0.7, 100)
+        self.assertEqual(base, cache_key("apple", "model-a", 0.7, 100))
+        self.assertNotEqual(base, cache_key("apple", "model-b", 0.7, 100))
+        self.assertNotEqual(base, cache_key("apple", "model-a", 0.2, 100))
+        self.assertNotEqual(base, cache_key("apple", "model-a", 0.7, 200))
+        self.assertNotEqual(base, cache_key("pear", "model-a", 0.7, 100))
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.set("k", "answer")
+        self.assertEqual(self.cache.get("k"), "answer")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_disk_tier_survives_restart(self):
+        self.cache.set("k", "answer")
+        self.cache.close()
+
+        self.cache = LLMCache(path=self.path, clock=self.clock)
+        self.assertEqual(self.cache.get("k"), "answer")
+        self.assertEqual(self.cache.stats()["disk_hits"], 1)
+
+    def test_entries_expire(self):
+        self.cache.set("k", "answer")
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["disk_entries"], 0)
+
+    def test_memory_tier_is_bounded(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key)
+        self.assertEqual(self.cache.stats()["memory_entries"], 2)
+        # The evicted entry is still served from disk
+        self.assertEqual(self.cache.get("a"), "a")
+        self.assertEqual(self.cache.stats()["disk_hits"], 1)
+
+    def test_size_based_eviction_drops_least_recently_used(self):
+        value = "x" * 3000
+        for key in ("a", "b", "c"):
+            self.clock.now += 1
+            self.cache.set(key, value)
+        self.clock.now += 1
+        self.cache.get("a")  # "a" becomes the most recently used entry
+        self.clock.now += 1
+        self.cache.set("d", value)
+
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["disk_bytes"], 10_000)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), value)
+
+    def test_size_total_is_kept_without_scanning_the_table(self):
+        def summed():
+            return self.cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+        statements = []
+        self.cache._conn.set_trace_callback(statements.append)
+        self.cache.set("a", "x" * 3000)
+        self.cache.set("a", "x" * 100)  # Overwrite
+        self.cache.set("b", "x" * 5000)
+        self.cache._conn.set_trace_callback(None)
+        self.assertFalse([statement for statement in statements if "SUM(" in statement])
+        self.assertEqual(self.cache.stats()["disk_bytes"], summed())
+
+        self.clock.now += 61
+        self.cache.set("c", "x" * 9000)  # Expires "a" and "b"
+        self.assertEqual(self.cache.stats()["disk_bytes"], summed())
+
+    def test_size_total_of_an_existing_file_is_summed_once(self):
+        self.cache.set("k", "answer")
+        self.cache._conn.execute("DROP TABLE llm_cache_size")
+        self.cache.close()
+
+        self.cache = LLMCache(path=self.path, clock=self.clock)
+        self.assertEqual(self.cache.stats()["disk_bytes"], len("k") + len("answer"))
+
+class TestCompletionCaching(unittest.TestCase):
+    COMPLETE_ANSWER = json.dumps({
+        "meaning_en": ["A fruit (Food) - I ate an apple."],
+        "meaning_vi": ["Quả táo (Thức ăn) - Tôi đã ăn một quả táo."],
+        "example_sentences_en": ["I ate an apple.", "The apple fell from the tree."],
+        "word_type": "noun",
+        "vocab_family": ["Apples (noun)"],
+    })
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.cache = LLMCache(path=":memory:")
+        self.client = mock.Mock()
+        self.client.served_model.return_value = "model-a"
+        for name, value in [('get_llm_client', self.client), ('get_llm_cache', self.cache)]:
+            patch = mock.patch.object(card_collection, name, return_value=value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        self.app_context.pop()
+
+    def test_only_validated_answers_are_cached(self):
+        # A combined answer with an invalid field is used, but asked again for the next card
+        self.client.complete.return_value = json.dumps({"word_type": "noun", "meaning_en": "not a list"})
+        for _ in range(2):
+            self.assertEqual(VocabularyCard.get_combined_fields("apple"), {"word_type": "noun"})
+        self.assertEqual(self.client.complete.call_count, 2)
+
+        self.client.complete.return_value = self.COMPLETE_ANSWER
+        for _ in range(2):
+            self.assertEqual(VocabularyCard.get_combined_fields("apple")["word_type"], "noun")
+        self.assertEqual(self.client.complete.call_count, 3)
+
+    def test_answers_of_an_unknown_model_are_not_cached(self):
+        self.client.served_model.return_value = None
+        self.client.complete.return_value = "noun"
+        for _ in range(2):
+            self.assertEqual(VocabularyCard.get_word_type("apple"), "noun")
+        self.assertEqual(self.client.complete.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.utils.llm_client import LLMClient, LLMError, CircuitOpenError
+
+class FakeLMStudioHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint driven by the server's `responses` queue."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.requests.append(payload)
+
+        status, delay = self.server.responses.pop(0) if self.server.responses else (200, 0)
+        time.sleep(delay)
+        body = self.server.bodies.pop(0) if self.server.bodies else json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": f"  echo: {payload['messages'][0]['content']} "}}]
+        }).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.model_requests += 1
+        body = json.dumps({"data": [{"id": model, "object": "model"} for model in self.server.models]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLMStudioHandler)
+        self.server.requests = []
+        self.server.responses = []
+        self.server.bodies = []
+        self.server.models = ["model-a"]
+        self.server.model_requests = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = LLMClient(
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v1",
+            read_timeout=0.5,
+            max_retries=2,
+            backoff_base=0.01,
+            failure_threshold=3,
+            reset_timeout=0.2
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_complete_returns_stripped_content(self):
+        answer = self.client.complete("apple", max_tokens=50)
+        self.assertEqual(answer, "echo: apple")
+        self.assertEqual(self.server.requests[0]['max_tokens'], 50)
+
+    def test_retries_transient_errors(self):
+        self.server.responses = [(503, 0), (200, 0)]
+        self.assertEqual(self.client.complete("apple"), "echo: apple")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_does_not_retry_client_errors(self):
+        self.server.responses = [(400, 0)]
+        with self.assertRaises(LLMError):
+            self.client.complete("apple")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_read_timeout_is_enforced_and_not_retried(self):
+        self.server.responses = [(200, 1.0)] * 3
+        start = time.monotonic()
+        with self.assertRaises(LLMError):
+            self.client.complete("apple")
+        self.assertLess(time.monotonic() - start, 1.0)
+        # The model may still be working on it: the completion is never sent twice
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_server_errors_are_not_retried(self):
+        self.server.responses = [(500, 0), (200, 0)]
+        with self.assertRaises(LLMError):
+            self.client.complete("apple")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_malformed_body_counts_as_a_failure(self):
+        self.server.bodies = [b"{not json"] * 3
+        for _ in range(3):
+            with self.assertRaises(LLMError):
+                self.client.complete("apple")
+        self.assertEqual(self.client.breaker.state, "open")
+
+    def test_open_breaker_fails_fast_then_recovers(self):
+        self.server.responses = [(503, 0)] * 3
+        with self.assertRaises(LLMError):
+            self.client.complete("apple")
+        self.assertEqual(self.client.breaker.state, "open")
+
+        # While open, calls never reach the server
+        with self.assertRaises(CircuitOpenError):
+            self.client.complete("apple")
+        self.assertEqual(len(self.server.requests), 3)
+
+        # After the reset timeout a trial request goes through and closes the breaker
+        time.sleep(0.25)
+        self.assertEqual(self.client.complete("apple"), "echo: apple")
+        self.assertEqual(self.client.breaker.state, "closed")
+
+    def test_broken_responses_count_as_failures(self):
+        self.client.max_retries = 0
+        for _ in range(3):
+            self.client.breaker.record_failure()
+        time.sleep(0.25)
+        # The half-open trial ends with an error other than a connection error or timeout
+        with mock.patch.object(self.client.session, 'post', side_effect=requests.exceptions.ChunkedEncodingError("cut")):
+            with self.assertRaises(LLMError):
+                self.client.complete("apple")
+        self.assertEqual(self.client.breaker.state, "open")
+
+        time.sleep(0.25)
+        self.assertEqual(self.client.complete("apple"), "echo: apple")
+        self.assertEqual(self.client.breaker.state, "closed")
+
+    def test_served_model_is_read_from_the_server(self):
+        self.assertEqual(self.client.served_model(), "model-a")
+        self.server.models = ["model-b"]
+        self.assertEqual(self.client.served_model(), "model-a")
+        self.assertEqual(self.server.model_requests, 1)
+
+        self.client.model_ttl = 0
+        self.assertEqual(self.client.served_model(), "model-b")
+        # Several listed models: the one answering cannot be told
+        self.server.models = ["model-a", "model-b"]
+        self.assertIsNone(self.client.served_model())
+
+        self.client.model = "configured"
+        self.assertEqual(self.client.served_model(), "configured")
+
+if __name__ == '__main__':
+    unittest.main()
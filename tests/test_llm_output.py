@@ -0,0 +1,48 @@
+import unittest
+from app.utils.llm_output import (extract_json_object, parse_example_sentences, parse_numbered_list,
+                                  validate_combined_fields)
+
+class TestLLMOutputParsing(unittest.TestCase):
+
+    def test_parse_numbered_list_folds_detail_lines(self):
+        text = (
+            "1. To overstate (Speech)\n"
+            "   - He exaggerated the story.\n"
+            "2. To enlarge (Art)\n"
+            "   - The painter exaggerated the eyes.\n"
+        )
+        self.assertEqual(parse_numbered_list(text), [
+            "To overstate (Speech) - He exaggerated the story.",
+            "To enlarge (Art) - The painter exaggerated the eyes.",
+        ])
+
+    def test_parse_example_sentences_drops_blank_lines(self):
+        text = "1. I ate an apple.\n\n2. The apple tree is old.\n3. An extra one."
+        self.assertEqual(parse_example_sentences(text), ["I ate an apple.", "The apple tree is old."])
+
+    def test_parse_numbered_list_handles_missing_answer(self):
+        self.assertEqual(parse_numbered_list(None), [])
+
+    def test_extract_json_object_from_fenced_answer(self):
+        text = 'Sure!\n```json\n{"word_type": "noun"}\n```'
+        self.assertEqual(extract_json_object(text), {"word_type": "noun"})
+
+    def test_extract_json_object_invalid(self):
+        self.assertIsNone(extract_json_object('{"word_type": '))
+
+    def test_validate_combined_fields_keeps_only_valid_fields(self):
+        data = {
+            "meaning_en": ["A fruit (Food) - I ate an apple."],
+            "meaning_vi": "không phải danh sách",
+            "example_sentences_en": ["I ate an apple."],
+            "word_type": " noun ",
+            "vocab_family": [],
+        }
+        self.assertEqual(validate_combined_fields(data), {
+            "meaning_en": ["A fruit (Food) - I ate an apple."],
+            "word_type": "noun",
+            "vocab_family": [],
+        })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from app.databases.db import close_db
+from app.models import audio_asset
+from app.models.audio_asset import AudioAsset
+from app import create_app
+
+class TestMediaRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        self.app.db.audio_assets.delete_many({})
+
+        # Synthesize a clip with the offline stub into a temporary directory
+        self.app.config['tts'] = {'engine': 'stub'}
+        self.audio_dir = tempfile.mkdtemp()
+        self.patch = mock.patch.object(audio_asset, 'AUDIO_DIR', self.audio_dir)
+        self.patch.start()
+        self.path = AudioAsset.acquire("I ate an apple.")
+        self.url = AudioAsset.media_url(self.path)
+        with open(self.path, 'rb') as f:
+            self.content = f.read()
+
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.audio_dir)
+        self.app.db.audio_assets.delete_many({})
+        close_db()
+        self.app_context.pop()
+
+    def test_get_audio(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.content)
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        self.assertFalse(response.headers['ETag'].startswith('W/'))
+        # The bytes behind an id can change, so clients must revalidate
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=3600', response.headers['Cache-Control'])
+        response.close()
+
+    def test_range_request(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[10:20])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        response.close()
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(self.url).headers['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_etag_changes_with_the_file(self):
+        etag = self.client.get(self.url).headers['ETag']
+        # Re-encoded at another bitrate: same asset id, different bytes
+        with open(self.path, 'ab') as f:
+            f.write(b'\0' * 16)
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        response.close()
+
+    def test_unknown_audio(self):
+        self.assertEqual(self.client.get('/media/audio/' + '0' * 64).status_code, 404)
+        self.assertEqual(self.client.get('/media/audio/../config.json').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
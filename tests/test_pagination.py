@@ -0,0 +1,77 @@
+import json
+import unittest
+from bson import ObjectId
+from werkzeug.datastructures import MIMEAccept
+from app import create_app
+from app.databases.db import close_db
+from app.utils.pagination import find_page, iter_batches, page_params, stream_json_array, stream_ndjson, wants_ndjson
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.collection = self.app.db.vocabulary_cards
+        self.user_id = str(ObjectId())
+        self.collection.insert_many([
+            {"card_id": str(ObjectId()), "user_id": self.user_id, "word": f"word{i}"} for i in range(7)
+        ])
+        self.collection.insert_one({"card_id": str(ObjectId()), "user_id": str(ObjectId()), "word": "other"})
+
+    def tearDown(self):
+        self.collection.delete_many({"word": {"$regex": "^(word|other)"}})
+        close_db()
+        self.app_context.pop()
+
+    def test_pages_cover_the_listing_once(self):
+        words = []
+        after = None
+        while True:
+            page, next_after = find_page(self.collection, {"user_id": self.user_id}, 3, after)
+            words += [card["word"] for card in page]
+            if next_after is None:
+                break
+            after = ObjectId(next_after)
+        self.assertEqual(words, [f"word{i}" for i in range(7)])
+
+    def test_last_full_page_has_no_cursor(self):
+        page, next_after = find_page(self.collection, {"user_id": self.user_id}, 7)
+        self.assertEqual(len(page), 7)
+        self.assertIsNone(next_after)
+
+    def test_page_params(self):
+        self.assertIsNone(page_params({}))
+        self.assertEqual(page_params({"limit": "5"}), (5, None))
+        self.assertEqual(page_params({"limit": "100000"})[0], 1000)
+        cursor = ObjectId()
+        self.assertEqual(page_params({"after": str(cursor)}), (100, cursor))
+        for args in ({"limit": "0"}, {"limit": "ten"}, {"after": "nope"}):
+            with self.assertRaises(ValueError):
+                page_params(args)
+
+    def test_stream_json_array(self):
+        batches = iter_batches(self.collection, {"user_id": self.user_id}, {"_id": 0, "word": 1}, batch_size=3)
+        self.assertEqual(json.loads("".join(stream_json_array(batches, json.dumps))),
+                         [{"word": f"word{i}"} for i in range(7)])
+        self.assertEqual("".join(stream_json_array(iter([]), json.dumps)), "[]")
+
+    def test_stream_ndjson_reads_one_batch_at_a_time(self):
+        fetched = []
+        def batches():
+            for batch in iter_batches(self.collection, {"user_id": self.user_id}, {"_id": 0, "word": 1}, batch_size=3):
+                fetched.append(len(batch))
+                yield batch
+
+        chunks = stream_ndjson(batches(), json.dumps)
+        self.assertEqual(next(chunks), '{"word": "word0"}\n{"word": "word1"}\n{"word": "word2"}\n')
+        self.assertEqual(fetched, [3])
+        self.assertEqual(len("".join(chunks).splitlines()), 4)
+        self.assertEqual(fetched, [3, 3, 1])
+
+    def test_wants_ndjson(self):
+        self.assertTrue(wants_ndjson(MIMEAccept([("application/x-ndjson", 1)])))
+        self.assertFalse(wants_ndjson(MIMEAccept([("application/json", 1), ("*/*", 0.8)])))
+        self.assertFalse(wants_ndjson(MIMEAccept([("*/*", 1)])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import unittest
+import datetime
+from unittest import mock
+from bson import ObjectId
+from app import create_app
+from app.databases.db import close_db
+from app.models.card_collection import VocabularyCard
+from app.models.lexicon import Lexicon
+from app.models.user import User
+from app.utils.read_cache import ReadCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class DictStore:
+    """Stands in for the Redis client of the shared tier."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class TestReadCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.loads = 0
+
+    def loader(self, document):
+        def load():
+            self.loads += 1
+            return document
+        return load
+
+    def test_entries_expire_after_ttl(self):
+        cache = ReadCache(ttl=30, clock=self.clock)
+        self.assertEqual(cache.get("cards", "a", self.loader({"word": "apple"})), {"word": "apple"})
+        self.clock.now += 10
+        self.assertEqual(cache.get("cards", "a", self.loader({"word": "apple"})), {"word": "apple"})
+        self.assertEqual(self.loads, 1)
+        self.clock.now += 25
+        cache.get("cards", "a", self.loader({"word": "apple"}))
+        self.assertEqual(self.loads, 2)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"]), (1, 2, 1))
+        self.assertEqual(stats["max_served_age"], 10)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ReadCache(max_entries=2, clock=self.clock)
+        for key in ["a", "b"]:
+            cache.get("cards", key, self.loader({"key": key}))
+        cache.get("cards", "a", self.loader(None))
+        cache.get("cards", "c", self.loader({"key": "c"}))
+        self.assertEqual(cache.get("cards", "a", self.loader(None)), {"key": "a"})
+        self.assertIsNone(cache.get("cards", "b", self.loader(None)))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_missing_documents_and_callers_copies_are_not_cached(self):
+        cache = ReadCache(clock=self.clock)
+        self.assertIsNone(cache.get("users", "u", self.loader(None)))
+        document = cache.get("users", "u", self.loader({"tags": ["a"]}))
+        document["tags"].append("b")
+        self.assertEqual(cache.get("users", "u", self.loader(None)), {"tags": ["a"]})
+
+    def test_invalidation_wins_over_a_concurrent_load(self):
+        cache = ReadCache(clock=self.clock)
+
+        def stale_load():
+            # The document changes while it is being read
+            cache.invalidate("settings", "u")
+            return {"theme": "light"}
+
+        cache.get("settings", "u", stale_load)
+        self.assertEqual(cache.get("settings", "u", self.loader({"theme": "dark"})), {"theme": "dark"})
+
+    def test_shared_tier(self):
+        shared = DictStore()
+        first = ReadCache(shared=shared, clock=self.clock)
+        second = ReadCache(shared=shared, clock=self.clock)
+        document = {"_id": ObjectId(), "created_at": datetime.datetime(2024, 5, 1, 12, 30)}
+
+        first.get("cards", "a", self.loader(document))
+        self.clock.now += 5
+        self.assertEqual(second.get("cards", "a", self.loader(None)), document)
+        self.assertEqual(second.stats()["shared_hits"], 1)
+        self.assertEqual(second.stats()["max_served_age"], 5)
+
+        first.invalidate("cards", "a")
+        self.assertEqual(shared.values, {})
+
+    def test_invalidation_wins_over_a_concurrent_load_in_the_shared_tier(self):
+        shared = DictStore()
+        cache = ReadCache(shared=shared, clock=self.clock)
+
+        def stale_load():
+            cache.invalidate("cards", "a")
+            return {"word": "apple"}
+
+        cache.get("cards", "a", stale_load)
+        self.assertEqual(shared.values, {})
+
+    def test_shared_tier_errors_fall_back_to_the_loader(self):
+        shared = mock.Mock()
+        shared.get.side_effect = ConnectionError("down")
+        cache = ReadCache(shared=shared, clock=self.clock)
+        self.assertEqual(cache.get("cards", "a", self.loader({"word": "apple"})), {"word": "apple"})
+        self.assertEqual(cache.stats()["shared_errors"], 1)
+
+
+class TestReadThroughModels(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        self.card_id = str(ObjectId())
+        self.app.db.vocabulary_cards.insert_one({"card_id": self.card_id, "word": "apple", "meaning_vi": "Quả táo"})
+
+    def tearDown(self):
+        self.app.db.vocabulary_cards.delete_many({"card_id": self.card_id})
+        self.app.db.users.delete_many({"username": "cached_user"})
+        close_db()
+        self.app_context.pop()
+
+    def test_card_views_share_one_entry_and_updates_invalidate_it(self):
+        self.assertEqual(VocabularyCard.get_card_by_id(self.card_id)["word"], "apple")
+        self.assertEqual(VocabularyCard.get_card_by_id(self.card_id, ["word"]), {"word": "apple"})
+        self.assertEqual(self.app.read_cache.stats()["hits"], 1)
+
+        VocabularyCard.update_card(self.card_id, {"word": "pear"})
+        self.assertEqual(VocabularyCard.get_card_by_id(self.card_id)["word"], "pear")
+        VocabularyCard.delete_card(self.card_id)
+        self.assertIsNone(VocabularyCard.get_card_by_id(self.card_id))
+
+    def test_lexicon_writes_show_on_cached_cards(self):
+        entry = Lexicon.get_or_create_entry("cached_lexicon_word")
+        lexicon_id = str(entry["_id"])
+        self.app.db.vocabulary_cards.update_one({"card_id": self.card_id},
+                                                {"$set": {"lexicon_id": lexicon_id}, "$unset": {"meaning_vi": ""}})
+        try:
+            Lexicon.save_fields(lexicon_id, {"meaning_en": "A fruit"})
+            self.assertEqual(VocabularyCard.get_card_by_id(self.card_id)["meaning_en"], "A fruit")
+            Lexicon.save_fields(lexicon_id, {"meaning_en": "A round fruit"})
+            self.assertEqual(VocabularyCard.get_card_by_id(self.card_id, ["meaning_en"]), {"meaning_en": "A round fruit"})
+        finally:
+            self.app.db.lexicon.delete_one({"_id": entry["_id"]})
+
+    def test_audio_info_follows_the_lexicon_clip(self):
+        entry = Lexicon.get_or_create_entry("cached_lexicon_word")
+        lexicon_id = str(entry["_id"])
+        clip = f"audio_files/{'b' * 64}.ogg"
+        self.app.db.vocabulary_cards.update_one({"card_id": self.card_id}, {"$set": {"lexicon_id": lexicon_id}})
+        self.app.db.audio_assets.insert_one({"path": clip, "ref_count": 1, "duration": 1.5, "size": 4000})
+        try:
+            Lexicon.save_fields(lexicon_id, {"audio_url_word": clip})
+            self.assertEqual(VocabularyCard.get_card_by_id(self.card_id, ["audio_info"]),
+                             {"audio_info": {"audio_url_word": {"duration": 1.5, "size": 4000}}})
+            # Re-encoding updates the asset only; the card reports the new values
+            self.app.db.audio_assets.update_one({"path": clip}, {"$set": {"size": 1200}})
+            self.assertEqual(VocabularyCard.get_card_by_id(self.card_id)["audio_info"],
+                             {"audio_url_word": {"duration": 1.5, "size": 1200}})
+        finally:
+            self.app.db.lexicon.delete_one({"_id": entry["_id"]})
+            self.app.db.audio_assets.delete_many({"path": clip})
+
+    def test_user_is_read_once(self):
+        user = User.create_user("cached_user", "cached_user@example.com", "password")
+        with mock.patch.object(type(self.app.db.users), 'find_one', wraps=self.app.db.users.find_one) as find_one:
+            for _ in range(3):
+                self.assertEqual(User.get_user_by_id(user.user_id)["username"], "cached_user")
+            self.assertEqual(find_one.call_count, 1)
+            User.update_user(user.user_id, {"email": "new@example.com"})
+            self.assertEqual(User.get_user_by_id(user.user_id)["email"], "new@example.com")
+
+    def test_disabled_cache_reads_the_database(self):
+        self.app.read_cache = None
+        self.assertEqual(VocabularyCard.get_card_by_id(self.card_id, ["word"]), {"word": "apple"})
+
+if __name__ == '__main__':
+    unittest.main()
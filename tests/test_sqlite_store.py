@@ -0,0 +1,160 @@
+import os
+import shutil
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app.databases.repository import Collection, Database, open_database
+from app.databases.sqlite_store import SQLiteDatabase, matches
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.db = SQLiteDatabase(":memory:")
+        self.cards = self.db.vocabulary_cards
+        self.cards.create_indexes([
+            IndexModel([("card_id", ASCENDING)], name="card_id_unique", unique=True),
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+        ])
+        self.cards.insert_many([
+            {"card_id": f"c{i}", "user_id": "u1" if i < 4 else "u2", "word": f"word{i}", "streak": i,
+             "tags": ["fruit"] if i % 2 else [], "created_at": datetime.datetime(2024, 5, 1 + i)}
+            for i in range(6)
+        ])
+
+    def tearDown(self):
+        self.db.close()
+
+    def words(self, query, **kwargs):
+        return [card["word"] for card in self.cards.find(query, **kwargs)]
+
+    def test_is_a_storage_backend(self):
+        self.assertIsInstance(self.db, Database)
+        self.assertIsInstance(self.cards, Collection)
+        self.assertIsInstance(open_database({"storage": {"backend": "sqlite", "sqlite_path": ":memory:"}}),
+                              SQLiteDatabase)
+        with self.assertRaises(ValueError):
+            open_database({"storage": {"backend": "files"}})
+        with mock.patch.dict(os.environ, {"STORAGE_BACKEND": "sqlite"}):
+            self.assertIsInstance(open_database({"storage": {"backend": "mongodb", "sqlite_path": ":memory:"}}),
+                                  SQLiteDatabase)
+
+    def test_filters(self):
+        self.assertEqual(self.words({"user_id": "u2"}), ["word4", "word5"])
+        self.assertEqual(self.words({"streak": {"$gte": 2, "$lt": 4}}), ["word2", "word3"])
+        self.assertEqual(self.words({"card_id": {"$in": ["c0", "c5"]}}), ["word0", "word5"])
+        self.assertEqual(self.words({"tags": "fruit", "user_id": "u1"}), ["word1", "word3"])
+        self.assertEqual(self.words({"$or": [{"streak": 0}, {"word": {"$regex": "^word5$"}}]}), ["word0", "word5"])
+        self.assertEqual(self.words({"created_at": {"$gt": datetime.datetime(2024, 5, 5)}}), ["word5"])
+        self.assertEqual(self.words({"missing": None, "streak": {"$ne": 0}, "user_id": "u2"}), ["word4", "word5"])
+        # MongoDB never matches values of another type
+        self.assertFalse(matches({"streak": "3"}, {"streak": {"$gt": 1}}))
+        self.assertFalse(matches({"flag": True}, {"flag": 1}))
+
+    def test_sort_skip_limit_and_projection(self):
+        cursor = self.cards.find({}, {"_id": 0, "word": 1}).sort("streak", -1).skip(1).limit(2)
+        self.assertEqual(list(cursor), [{"word": "word4"}, {"word": "word3"}])
+        after = self.cards.find_one({"card_id": "c1"})["_id"]
+        self.assertEqual(self.words({"user_id": "u1", "_id": {"$gt": after}}, sort=[("_id", 1)]), ["word2", "word3"])
+        self.assertNotIn("tags", self.cards.find_one({"card_id": "c1"}, {"tags": 0}))
+
+    def test_updates(self):
+        result = self.cards.update_one({"card_id": "c1"}, {"$set": {"audio.word": "a.ogg"}, "$inc": {"streak": 2}})
+        self.assertEqual((result.matched_count, result.modified_count), (1, 1))
+        card = self.cards.find_one({"card_id": "c1"})
+        self.assertEqual((card["audio"], card["streak"]), ({"word": "a.ogg"}, 3))
+
+        self.assertEqual(self.cards.update_many({"user_id": "u2"}, {"$unset": {"tags": ""}}).modified_count, 2)
+        result = self.cards.update_one({"card_id": "c9"}, {"$setOnInsert": {"word": "new"}}, upsert=True)
+        self.assertEqual(self.cards.find_one({"_id": result.upserted_id})["card_id"], "c9")
+        self.assertEqual(self.cards.delete_many({"user_id": "u2"}).deleted_count, 2)
+
+        with self.assertRaises(ValueError):
+            self.cards.update_one({"card_id": "c1"}, {"word": "replaced"})
+        with self.assertRaises(OperationFailure):
+            self.cards.update_one({"card_id": "c1"}, {"$set": {"_id": ObjectId()}})
+
+    def test_find_one_and_update_takes_the_first_in_sort_order(self):
+        card = self.cards.find_one_and_update({"user_id": "u1"}, {"$inc": {"streak": 10}},
+                                              sort=[("created_at", -1)], return_document=ReturnDocument.AFTER)
+        self.assertEqual((card["word"], card["streak"]), ("word3", 13))
+        self.assertIsNone(self.cards.find_one_and_update({"user_id": "u3"}, {"$set": {"word": "x"}}))
+
+    def test_aggregate(self):
+        result = next(self.cards.aggregate([
+            {"$match": {"user_id": "u1"}},
+            {"$project": {"_id": 0, "streak": 1, "tags": 1}},
+            {"$facet": {
+                "tagged": [{"$match": {"tags": "fruit"}}, {"$count": "count"}],
+                "streaks": [{"$group": {
+                    "_id": None, "total": {"$sum": "$streak"}, "average": {"$avg": "$streak"},
+                    "high": {"$sum": {"$cond": [{"$gte": ["$streak", 2]}, 1, 0]}},
+                }}],
+                "none": [{"$match": {"streak": 99}}, {"$count": "count"}],
+            }},
+        ]))
+        self.assertEqual(result, {"tagged": [{"count": 2}],
+                                  "streaks": [{"_id": None, "total": 6, "average": 1.5, "high": 2}], "none": []})
+
+    def test_unique_indexes(self):
+        with self.assertRaises(DuplicateKeyError):
+            self.cards.insert_one({"card_id": "c1"})
+        with self.assertRaises(BulkWriteError) as raised:
+            self.cards.insert_many([{"card_id": "c7"}, {"card_id": "c2"}, {"card_id": "c8"}], ordered=False)
+        self.assertEqual([error["index"] for error in raised.exception.details["writeErrors"]], [1])
+        self.assertEqual(self.cards.count_documents({"card_id": {"$in": ["c7", "c8"]}}), 2)
+        # A failed update leaves the document unchanged
+        with self.assertRaises(DuplicateKeyError):
+            self.cards.update_one({"card_id": "c3"}, {"$set": {"card_id": "c4"}})
+        self.assertEqual(self.cards.count_documents({"card_id": "c3"}), 1)
+
+    def test_transactions_commit_or_roll_back_together(self):
+        with self.db.client.start_session() as session:
+            session.with_transaction(lambda s: (self.cards.insert_one({"card_id": "c7"}, session=s),
+                                                self.db.user_progress.insert_one({"card_id": "c7"}, session=s)))
+        self.assertEqual((self.cards.count_documents({"card_id": "c7"}), self.db.user_progress.count_documents({})), (1, 1))
+
+        def failing(s):
+            self.cards.insert_one({"card_id": "c8"}, session=s)
+            self.cards.insert_one({"card_id": "c1"}, session=s)
+
+        with self.db.client.start_session() as session:
+            with self.assertRaises(DuplicateKeyError):
+                session.with_transaction(failing)
+        self.assertEqual(self.cards.count_documents({"card_id": "c8"}), 0)
+
+    def test_indexed_fields_cannot_hold_arrays(self):
+        with self.assertRaises(OperationFailure):
+            self.cards.insert_one({"card_id": ["c10", "c11"]})
+
+    def test_explain_reports_index_use(self):
+        def plan(query):
+            return self.cards.find(query).explain()["queryPlanner"]["winningPlan"]
+
+        self.assertEqual(plan({"user_id": "u1"})["inputStage"], {"stage": "IXSCAN", "indexName": "user_id"})
+        self.assertEqual(plan({"card_id": {"$in": ["c1", "c2"]}})["inputStage"]["indexName"], "card_id_unique")
+        self.assertEqual(plan({"word": "word1"}), {"stage": "COLLSCAN"})
+
+    def test_file_database_keeps_documents_and_indexes(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "data", "store.sqlite3")
+            db = SQLiteDatabase(path)
+            db.users.create_index("username", name="username_unique", unique=True)
+            db.users.insert_one({"username": "alice", "created_at": datetime.datetime(2024, 5, 1, 12, 30)})
+            db.close()
+
+            db = SQLiteDatabase(path)
+            self.assertEqual(db.users.find_one({"username": "alice"})["created_at"], datetime.datetime(2024, 5, 1, 12, 30))
+            self.assertEqual(db.users.index_information()["username_unique"]["key"], [("username", 1)])
+            with self.assertRaises(DuplicateKeyError):
+                db.users.insert_one({"username": "alice"})
+            self.assertEqual(db.list_collection_names(), ["users"])
+            db.close()
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
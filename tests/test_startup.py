@@ -0,0 +1,32 @@
+import sys
+import unittest
+import subprocess
+from unittest import mock
+from app.utils import config as config_module
+from app.utils.config import load_config
+from benchmarks.startup_benchmark import HEAVY_MODULES
+
+class TestStartup(unittest.TestCase):
+    def test_models_and_routes_import_without_heavy_libraries(self):
+        output = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, app.models.card_collection, app.routes.card_collection_routes; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(output.stdout.strip(), "")
+
+    def test_config_is_read_once(self):
+        with mock.patch.object(config_module, '_configs', {}):
+            with mock.patch('builtins.open', wraps=open) as opened:
+                first = load_config()
+                second = load_config()
+            self.assertEqual(opened.call_count, 1)
+            self.assertEqual(first, second)
+
+            # Callers get their own copy
+            first['mongodb']['database'] = 'changed'
+            self.assertNotEqual(load_config()['mongodb']['database'], 'changed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app.utils.tts import StubBackend, GTTSBackend, LocalVitsBackend, create_tts_backend
+
+class TestTTSBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_create_backend_by_engine(self):
+        self.assertIsInstance(create_tts_backend('gtts'), GTTSBackend)
+        self.assertIsInstance(create_tts_backend('stub'), StubBackend)
+        local = create_tts_backend('local', local_models={'en': 'my/model'})
+        self.assertIsInstance(local, LocalVitsBackend)
+        self.assertEqual(local.voice, 'my/model')
+        self.assertTrue(local.batched)
+        with self.assertRaises(ValueError):
+            create_tts_backend('espeak')
+
+    def test_stub_is_deterministic(self):
+        self.assertEqual(StubBackend.render("apple"), StubBackend.render("apple"))
+        self.assertNotEqual(StubBackend.render("apple"), StubBackend.render("banana"))
+
+    def test_stub_batch_writes_every_clip(self):
+        backend = StubBackend()
+        items = [(text, 'en', os.path.join(self.tmp_dir, f"{index}.wav"))
+                 for index, text in enumerate(["apple", "I ate an apple.", "Apples are red."])]
+        backend.synthesize_batch(items)
+        for text, _, path in items:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), StubBackend.render(text))
+
+if __name__ == '__main__':
+    unittest.main()
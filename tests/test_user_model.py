@@ -36,6 +36,10 @@ class TestUserModel(unittest.TestCase):
         self.assertIsNotNone(user)
         self.assertEqual(user['email'], self.test_email)
 
+        # Written once, with user_id already derived from _id
+        self.assertEqual(user['user_id'], str(user['_id']))
+        self.assertEqual(self.user.user_id, user['user_id'])
+
     def test_validate_user(self):
         # Validate the user's credentials
         is_valid = User.validate_user(self.test_username, self.test_password)
@@ -1,5 +1,5 @@
 import unittest
-from datetime import datetime
+from datetime import date, datetime
 from bson import ObjectId
 from app.models.user_progress import UserProgress
 from app import create_app, close_db
@@ -74,5 +74,24 @@ class TestUserProgressModel(unittest.TestCase):
         self.assertEqual(saved_progress['card_id'], self.card_id)
         self.assertEqual(saved_progress['dataset_id'], self.dataset_id)
 
+    def test_get_stats(self):
+        user_id = str(self.user_id)
+        self.test_db.user_progress.insert_many([
+            {"user_id": user_id, "card_id": "a", "dataset_id": "fruit", "status": "learning",
+             "next_review": datetime(2024, 5, 1, 23, 59), "ease_factor": 2.0, "interval": 2},
+            {"user_id": user_id, "card_id": "b", "dataset_id": "fruit", "status": "completed",
+             "next_review": datetime(2024, 5, 2), "ease_factor": 3.0, "interval": 4},
+            UserProgress(str(ObjectId()), "c", "fruit", status="learning").to_dict(),
+        ])
+
+        stats = UserProgress.get_stats(user_id, date(2024, 5, 1))
+        self.assertEqual((stats['total'], stats['due_today']), (2, 1))
+        self.assertEqual(stats['by_status'], {'completed': 1, 'learning': 1})
+        # Dataset ids that are not ObjectIds get no name
+        self.assertEqual(stats['datasets'], [{'dataset_id': 'fruit', 'name': None, 'total': 2, 'completed': 1}])
+        self.assertEqual((stats['average_ease_factor'], stats['average_interval']), (2.5, 3))
+
+        self.assertEqual(UserProgress.get_stats(str(ObjectId()))['by_status'], {})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import unittest
 from flask import json
+from flask_jwt_extended import JWTManager, create_access_token
 from bson import ObjectId
 from datetime import datetime
 from app import create_app
@@ -23,6 +24,11 @@ class TestUserProgressRoutes(unittest.TestCase):
         self.card_id = str(ObjectId())
         self.dataset_id = str(ObjectId())
 
+        # Authenticate the test client as the test user: the routes are behind login_required
+        self.app.config['JWT_SECRET_KEY'] = self.app.config['SECRET_KEY']
+        JWTManager(self.app)
+        self.client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity=self.user_id)}"
+
         # Create a test progress record
         self.test_progress_data = {
             "user_id": self.user_id,
@@ -107,5 +113,77 @@ class TestUserProgressRoutes(unittest.TestCase):
         deleted_progress = self.app.db.user_progress.find_one({"_id": ObjectId(self.progress_id)})
         self.assertIsNone(deleted_progress)
 
+    def test_get_progress_by_user_in_pages(self):
+        for _ in range(4):
+            self.client.post('/api/progress', json=dict(self.test_progress_data, card_id=str(ObjectId())))
+
+        # Without paging parameters every entry is returned as a list
+        response = self.client.get(f'/api/progress/user/{self.user_id}')
+        self.assertEqual(response.status_code, 200)
+        everything = [p['progress_id'] for p in json.loads(response.data)]
+        self.assertEqual(len(everything), 5)
+
+        pages = []
+        after = ''
+        while after is not None:
+            response = self.client.get(f'/api/progress/user/{self.user_id}?limit=2&after={after}')
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            pages.append([p['progress_id'] for p in data['items']])
+            after = data['next_after']
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), everything)
+
+        response = self.client.get(f'/api/progress/user/{self.user_id}?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_progress_by_user_as_ndjson(self):
+        for _ in range(4):
+            self.client.post('/api/progress', json=dict(self.test_progress_data, card_id=str(ObjectId())))
+        headers = {'Accept': 'application/x-ndjson'}
+
+        response = self.client.get(f'/api/progress/user/{self.user_id}?batch_size=2', headers=headers)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0]['progress_id'], self.progress_id)
+
+        # Resuming after an entry
+        response = self.client.get(f'/api/progress/user/{self.user_id}?after={lines[2]["progress_id"]}',
+                                   headers=headers)
+        self.assertEqual([json.loads(line) for line in response.data.decode().splitlines()], lines[3:])
+
+    def test_get_stats(self):
+        dataset_id = str(self.app.db.datasets.insert_one({"user_id": self.user_id, "name": "Fruit"}).inserted_id)
+        self.app.db.user_progress.insert_many([
+            {"user_id": self.user_id, "card_id": "a", "dataset_id": dataset_id, "status": "learning",
+             "next_review": datetime(2024, 5, 1, 18), "ease_factor": 2.0, "interval": 3},
+            {"user_id": self.user_id, "card_id": "b", "dataset_id": dataset_id, "status": "completed",
+             "next_review": "2024-05-01T08:00:00.000Z", "ease_factor": 3.0, "interval": 10},
+            {"user_id": self.user_id, "card_id": "c", "dataset_id": dataset_id, "status": "learning",
+             "next_review": datetime(2024, 5, 2, 9), "ease_factor": 2.5, "interval": 1},
+            {"user_id": str(ObjectId()), "card_id": "d", "dataset_id": dataset_id, "status": "completed",
+             "next_review": datetime(2024, 4, 1), "ease_factor": 1.3, "interval": 1},
+        ])
+
+        response = self.client.get(f'/api/stats/{self.user_id}?date=2024-05-01')
+        self.assertEqual(response.status_code, 200)
+        stats = json.loads(response.data)
+        self.assertEqual(stats['total'], 4)
+        self.assertEqual(stats['by_status'], {'completed': 1, 'learning': 2, 'new': 1})
+        self.assertEqual(stats['due_today'], 2)
+        self.assertCountEqual(stats['datasets'], [
+            {'dataset_id': dataset_id, 'name': 'Fruit', 'total': 3, 'completed': 1},
+            {'dataset_id': self.dataset_id, 'name': None, 'total': 1, 'completed': 0},
+        ])
+        self.assertEqual(stats['average_ease_factor'], 2.5)
+        self.assertEqual(stats['average_interval'], 3.75)
+
+        response = self.client.get(f'/api/stats/{str(ObjectId())}')
+        self.assertEqual(json.loads(response.data)['total'], 0)
+        self.assertIsNone(json.loads(response.data)['average_interval'])
+        self.assertEqual(self.client.get(f'/api/stats/{self.user_id}?date=May').status_code, 400)
+        self.app.db.datasets.delete_many({"_id": ObjectId(dataset_id)})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app.utils.wordnet_index import WordNetIndex, build_index, synonyms_antonyms
+
+class FakeLemma:
+    def __init__(self, name, antonym=None):
+        self._name = name
+        self._antonym = antonym
+
+    def name(self):
+        return self._name
+
+    def antonyms(self):
+        return [FakeLemma(self._antonym)] if self._antonym else []
+
+class FakeSynset:
+    def __init__(self, *lemmas):
+        self._lemmas = lemmas
+
+    def lemmas(self):
+        return list(self._lemmas)
+
+class FakeWordNet:
+    """Just enough of nltk's WordNet reader to build an index."""
+    SYNSETS = {
+        "good": [FakeSynset(FakeLemma("good", "bad"), FakeLemma("goodness", "evil")), FakeSynset(FakeLemma("full"))],
+        "bad": [FakeSynset(FakeLemma("bad", "good"), FakeLemma("badness"))],
+        "ice_cream": [FakeSynset(FakeLemma("ice_cream"), FakeLemma("icecream"))],
+        "lonely": [],
+    }
+
+    def all_lemma_names(self):
+        return iter(self.SYNSETS)
+
+    def synsets(self, word):
+        return self.SYNSETS.get(word, [])
+
+class TestWordNetIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'index.bin')
+        self.wordnet = FakeWordNet()
+        self.assertEqual(build_index(self.wordnet, self.path), 4)
+        self.index = WordNetIndex(self.path)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_lookup_matches_synset_walk(self):
+        for word in FakeWordNet.SYNSETS:
+            self.assertEqual(self.index.lookup(word), synonyms_antonyms(self.wordnet, word))
+        self.assertEqual(self.index.lookup("good"), (["full", "good", "goodness"], ["bad", "evil"]))
+
+    def test_lookup_normalizes_word(self):
+        self.assertEqual(self.index.lookup(" Ice Cream "), (["ice_cream", "icecream"], []))
+
+    def test_unknown_word(self):
+        self.assertIsNone(self.index.lookup("goods"))
+        self.assertEqual(self.index.lookup("lonely"), ([], []))
+
+    def test_rejects_other_files(self):
+        other = os.path.join(self.tmp_dir, 'other.bin')
+        with open(other, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            WordNetIndex(other)
+
+if __name__ == '__main__':
+    unittest.main()